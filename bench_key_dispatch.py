@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""按键分发的微基准测试
+
+对比旧版 `_handle_mouse_control_key` 的 elif 链（方向键每次重建 key_map）、
+按虚拟键码索引的只读分发表，以及当前钩子使用的绑定引擎（前缀树匹配 + 动作表查找）
+在每个钩子事件上的开销。所有实现都接到不产生副作用的空动作上，只测量分发本身。
+
+用法:
+    python bench_key_dispatch.py [事件数]
+"""
+
+import sys
+import timeit
+from functools import partial
+from types import MappingProxyType, SimpleNamespace
+
+from binding_engine import BindingMatcher, BindingTrie
+
+# 与默认 config.ini 一致的虚拟按键码
+CONFIG = SimpleNamespace(
+    MOVE_UP_VK=0x49, MOVE_DOWN_VK=0x4B, MOVE_LEFT_VK=0x4A, MOVE_RIGHT_VK=0x4C,
+    MOVE_UP_CHAR='i', MOVE_DOWN_CHAR='k', MOVE_LEFT_CHAR='j', MOVE_RIGHT_CHAR='l',
+    SCROLL_UP_VK=0xBC, SCROLL_DOWN_VK=0x4D,
+    LEFT_CLICK_VK=0xBA, RIGHT_CLICK_VK=0xDE, MIDDLE_CLICK_VK=0xA1,
+    STICKY_LEFT_CLICK_VK=0x4E, TOGGLE_MODE_INTERNAL_VK=0x51,
+)
+CONFIG.MOUSE_CONTROL_VKS = {
+    CONFIG.MOVE_UP_VK, CONFIG.MOVE_DOWN_VK, CONFIG.MOVE_LEFT_VK, CONFIG.MOVE_RIGHT_VK,
+    CONFIG.SCROLL_DOWN_VK, CONFIG.SCROLL_UP_VK, CONFIG.LEFT_CLICK_VK,
+    CONFIG.RIGHT_CLICK_VK, CONFIG.MIDDLE_CLICK_VK, CONFIG.TOGGLE_MODE_INTERNAL_VK,
+    CONFIG.STICKY_LEFT_CLICK_VK,
+}
+
+
+class NullActions:
+    """不产生任何副作用的动作对象"""
+    def handle_button(self, is_key_down):
+        pass
+
+    def scroll(self):
+        pass
+
+    def toggle(self):
+        pass
+
+
+def legacy_dispatch(cfg, actions, direction_keys, vk, is_key_down):
+    """旧版 elif 链分发（结构与重构前的 _handle_mouse_control_key 相同）"""
+    if vk not in cfg.MOUSE_CONTROL_VKS:
+        return
+    if vk == cfg.TOGGLE_MODE_INTERNAL_VK and is_key_down:
+        actions.toggle()
+    elif vk == cfg.STICKY_LEFT_CLICK_VK and is_key_down:
+        actions.toggle()
+    elif vk == cfg.LEFT_CLICK_VK:
+        actions.handle_button(is_key_down)
+    elif vk == cfg.RIGHT_CLICK_VK:
+        actions.handle_button(is_key_down)
+    elif vk == cfg.MIDDLE_CLICK_VK:
+        actions.handle_button(is_key_down)
+    elif vk == cfg.SCROLL_DOWN_VK:
+        actions.scroll()
+    elif vk == cfg.SCROLL_UP_VK:
+        actions.scroll()
+    elif vk in {cfg.MOVE_UP_VK, cfg.MOVE_DOWN_VK,
+                cfg.MOVE_LEFT_VK, cfg.MOVE_RIGHT_VK}:
+        key_map = {
+            cfg.MOVE_UP_VK: cfg.MOVE_UP_CHAR,
+            cfg.MOVE_DOWN_VK: cfg.MOVE_DOWN_CHAR,
+            cfg.MOVE_LEFT_VK: cfg.MOVE_LEFT_CHAR,
+            cfg.MOVE_RIGHT_VK: cfg.MOVE_RIGHT_CHAR
+        }
+        char_key = key_map.get(vk)
+        if char_key:
+            if is_key_down:
+                direction_keys.add(char_key)
+            else:
+                direction_keys.discard(char_key)
+
+
+def build_table(cfg, actions, direction_keys):
+    """构建绑定引擎之前以虚拟键码为键的只读分发表（当前按动作名查表，见 MouseControl._build_action_handlers）"""
+    handlers = {
+        cfg.TOGGLE_MODE_INTERNAL_VK: (None, actions.toggle),
+        cfg.STICKY_LEFT_CLICK_VK: (None, actions.toggle),
+        cfg.LEFT_CLICK_VK: (partial(actions.handle_button, False), partial(actions.handle_button, True)),
+        cfg.RIGHT_CLICK_VK: (partial(actions.handle_button, False), partial(actions.handle_button, True)),
+        cfg.MIDDLE_CLICK_VK: (partial(actions.handle_button, False), partial(actions.handle_button, True)),
+        cfg.SCROLL_DOWN_VK: (actions.scroll, actions.scroll),
+        cfg.SCROLL_UP_VK: (actions.scroll, actions.scroll),
+    }
+    for vk, char in ((cfg.MOVE_UP_VK, cfg.MOVE_UP_CHAR), (cfg.MOVE_DOWN_VK, cfg.MOVE_DOWN_CHAR),
+                     (cfg.MOVE_LEFT_VK, cfg.MOVE_LEFT_CHAR), (cfg.MOVE_RIGHT_VK, cfg.MOVE_RIGHT_CHAR)):
+        handlers[vk] = (partial(direction_keys.discard, char), partial(direction_keys.add, char))
+    return MappingProxyType(handlers)
+
+
+def table_dispatch(table, vk, is_key_down):
+    """按虚拟键码索引的分发表查找"""
+    handlers = table.get(vk)
+    if handlers is not None:
+        handler = handlers[is_key_down]
+        if handler is not None:
+            handler()
+
+
+def build_engine(table):
+    """用与分发表相同的按键构建绑定引擎，动作名直接使用虚拟键码"""
+    trie = BindingTrie([(((vk, None),), vk, hex(vk)) for vk in table])
+    return BindingMatcher({'mouse': trie}, timeout=1.0)
+
+
+def engine_dispatch(matcher, table, vk, is_key_down):
+    """绑定引擎匹配后按动作查表（win32_event_filter 与事件消费线程两侧的开销之和）"""
+    action, suppress = matcher.feed('mouse', vk, is_key_down, 0, 0.0)
+    if action is not None:
+        handler = table[action][is_key_down]
+        if handler is not None:
+            handler()
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    actions = NullActions()
+    direction_keys = set()
+    table = build_table(CONFIG, actions, direction_keys)
+    matcher = build_engine(table)
+
+    scenarios = {
+        '方向键 (最坏情况)': CONFIG.MOVE_RIGHT_VK,
+        '左键': CONFIG.LEFT_CLICK_VK,
+        '内部切换键 (最好情况)': CONFIG.TOGGLE_MODE_INTERNAL_VK,
+        '非绑定键 (直通)': 0x41,
+    }
+
+    print(f"每个场景 {count} 次按下/释放事件，取 5 轮中的最小值\n")
+    print(f"{'场景':<24}{'elif 链 (ns/事件)':>20}{'分发表 (ns/事件)':>20}"
+          f"{'绑定引擎 (ns/事件)':>20}{'分发表加速比':>14}")
+    for name, vk in scenarios.items():
+        legacy = min(timeit.repeat(
+            lambda: (legacy_dispatch(CONFIG, actions, direction_keys, vk, True),
+                     legacy_dispatch(CONFIG, actions, direction_keys, vk, False)),
+            number=count // 2, repeat=5))
+        lookup = min(timeit.repeat(
+            lambda: (table_dispatch(table, vk, True),
+                     table_dispatch(table, vk, False)),
+            number=count // 2, repeat=5))
+        engine = min(timeit.repeat(
+            lambda: (engine_dispatch(matcher, table, vk, True),
+                     engine_dispatch(matcher, table, vk, False)),
+            number=count // 2, repeat=5))
+        legacy_ns = legacy / count * 1e9
+        lookup_ns = lookup / count * 1e9
+        engine_ns = engine / count * 1e9
+        print(f"{name:<24}{legacy_ns:>20.1f}{lookup_ns:>20.1f}{engine_ns:>20.1f}"
+              f"{legacy_ns / lookup_ns:>13.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""区域选择网格绘制的基准测试
+
+在 1080p 和 4K 大小的画布上分别测量每一级网格的绘制时间，对比旧版的即时模式绘制
+（每一级先 delete("all")，再为每个格子新建 1 个矩形和 5 个文字图元）与
+`GridRenderer` 的保留模式绘制（图元只创建一次，每一级只移动图元、修改共用字体的字号）。
+
+每次绘制后调用 update_idletasks()，计时包含画布在 Tk 空闲回调中的重绘。
+需要图形桌面；窗口超出实际屏幕的部分系统不会真正绘制，4K 的结果应在 4K 显示器上测量。
+
+用法:
+    python bench_region_grid.py [每级重复次数]
+"""
+
+import statistics
+import sys
+import time
+import tkinter as tk
+
+from region_selector import GridRenderer, cell_bounds, layout_index
+
+# 与默认 config.ini 的 [RegionSelectLayout] 一致
+LAYOUT = [
+    ['1', '2', '3', '4', '5'],
+    ['6', '7', '8', '9', '0'],
+    ['w', 'e', 'r', 't', 'y'],
+    ['z', 'x', 'c', 'v', 'b'],
+]
+
+RESOLUTIONS = (('1080p', 1920, 1080), ('4K', 3840, 2160))
+
+
+def legacy_draw_grid(canvas, bounds, layout):
+    """旧版 _draw_grid 的结构: 清空画布后为每个格子新建 6 个图元，并记录每个格子的矩形"""
+    canvas.delete("all")
+    x1, y1, x2, y2 = bounds
+    cell_width, cell_height = (x2 - x1) / len(layout[0]), (y2 - y1) / len(layout)
+    font = ("Consolas", max(8, int(cell_height * 0.6)), "bold")
+    rects = {}
+    for row_index, row in enumerate(layout):
+        for col_index, key in enumerate(row):
+            cell_x1, cell_y1 = x1 + col_index * cell_width, y1 + row_index * cell_height
+            cell_x2, cell_y2 = cell_x1 + cell_width, cell_y1 + cell_height
+            canvas.create_rectangle(cell_x1, cell_y1, cell_x2, cell_y2,
+                                    fill="#333333", outline="#FFD700", width=1)
+            center_x, center_y = cell_x1 + cell_width / 2, cell_y1 + cell_height / 2
+            text = key.upper()
+            for ox, oy in ((-1, -1), (1, -1), (-1, 1), (1, 1)):
+                canvas.create_text(center_x + ox, center_y + oy, text=text, font=font, fill="#FFD700")
+            canvas.create_text(center_x, center_y, text=text, font=font, fill="black")
+            rects[key] = (cell_x1, cell_y1, cell_x2, cell_y2)
+    return rects
+
+
+def measure(canvas, draw, width, height, repeat):
+    """交替绘制第一级和第二级（选中中间的格子），返回每级的耗时列表（毫秒）"""
+    screen = (0, 0, width, height)
+    level2 = cell_bounds(screen, len(LAYOUT), len(LAYOUT[0]), *layout_index(LAYOUT)['8'])
+    timings = {1: [], 2: []}
+    for _ in range(repeat):
+        start = time.perf_counter()
+        draw(screen)
+        canvas.update_idletasks()
+        timings[1].append((time.perf_counter() - start) * 1000)
+
+        start = time.perf_counter()
+        draw(level2)
+        canvas.update_idletasks()
+        timings[2].append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    root = tk.Tk()
+    root.withdraw()
+
+    print(f"布局 {len(LAYOUT)}x{len(LAYOUT[0])}，每级重复 {repeat} 次，单位毫秒\n")
+    print(f"{'分辨率':<8}{'实现':<10}{'级别':>6}{'中位数':>10}{'最小值':>10}{'图元数':>8}")
+    for name, width, height in RESOLUTIONS:
+        window = tk.Toplevel(root)
+        window.overrideredirect(True)
+        window.geometry(f"{width}x{height}+0+0")
+        canvas = tk.Canvas(window, width=width, height=height, bg='black', highlightthickness=0)
+        canvas.pack()
+        window.update()
+
+        implementations = (
+            ('即时模式', lambda: lambda bounds: legacy_draw_grid(canvas, bounds, LAYOUT)),
+            ('保留模式', lambda: GridRenderer(canvas, LAYOUT).draw),
+        )
+        for label, make_draw in implementations:
+            draw = make_draw()
+            # 预热一轮，排除字体首次加载等一次性开销
+            measure(canvas, draw, width, height, 1)
+            timings = measure(canvas, draw, width, height, repeat)
+            items = len(canvas.find_all())
+            for level in (1, 2):
+                print(f"{name:<8}{label:<10}{level:>6}{statistics.median(timings[level]):>10.3f}"
+                      f"{min(timings[level]):>10.3f}{items:>8}")
+            canvas.delete("all")
+        window.destroy()
+    root.destroy()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""滚轮输入构造的微基准测试
+
+模拟 1 kHz 的滚动输出流：每帧产生一个像素级滚轮事件并提交一次。对比旧版
+`WinPlatformScroller.scroll_vertical`（每次调用新建 INPUT_I/MOUSEINPUT/INPUT 和
+ctypes.pointer）与 `Win32OutputBackend` 预分配缓冲区原地改写字段的开销。
+
+SendInput 被替换为不产生任何输入的空函数，只测量 Python 侧准备输入的时间和内存分配，
+因此在任何平台上都可以运行，也不会真的滚动窗口。
+
+用法:
+    python bench_scroll_input.py [帧数]
+"""
+
+import ctypes
+import sys
+import timeit
+import tracemalloc
+from types import SimpleNamespace
+
+from win_platform import INPUT, INPUT_I, INPUT_MOUSE, MOUSEEVENTF_WHEEL, MOUSEINPUT, Win32OutputBackend
+
+STREAM_RATE_HZ = 1000
+
+
+def null_send_input(count, inputs, size):
+    """不产生输入的 SendInput 替身"""
+    return count
+
+
+def fixed_get_cursor_pos(point):
+    """GetCursorPos 替身: 真实光标始终停在屏幕中央"""
+    point.contents.x = 960
+    point.contents.y = 540
+    return 1
+
+
+# 提供 Win32OutputBackend 所需函数的替身，虚拟桌面为单个 1920x1080 显示器
+NULL_USER32 = SimpleNamespace(
+    SendInput=null_send_input,
+    GetCursorPos=fixed_get_cursor_pos,
+    GetSystemMetrics=lambda index: {78: 1920, 79: 1080}.get(index, 0),
+)
+
+
+def legacy_scroll_vertical(distance):
+    """旧版 scroll_vertical 的结构: 每次调用都新建全部 ctypes 对象"""
+    if distance == 0:
+        return
+    inp = INPUT_I()
+    inp.mi = MOUSEINPUT(0, 0, distance, MOUSEEVENTF_WHEEL, 0, None)
+    command = INPUT(INPUT_MOUSE, inp)
+    null_send_input(1, ctypes.pointer(command), ctypes.sizeof(command))
+
+
+def transient_bytes(tick, samples=1000):
+    """单帧执行期间的平均临时内存分配峰值（字节）以及执行后残留的内存（字节）"""
+    tracemalloc.start()
+    tick()
+    total = 0
+    start = tracemalloc.get_traced_memory()[0]
+    for _ in range(samples):
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+        tick()
+        total += tracemalloc.get_traced_memory()[1] - base
+    retained = tracemalloc.get_traced_memory()[0] - start
+    tracemalloc.stop()
+    return total / samples, retained
+
+
+def main():
+    frames = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    batcher = Win32OutputBackend(user32=NULL_USER32)
+    batcher.move_to(960, 540)
+    batcher.flush()
+    step = [3]
+
+    def pooled_tick():
+        batcher.wheel(-7)
+        batcher.flush()
+
+    def pooled_tick_with_move():
+        # 来回移动；替身光标不随移动改变，每帧的校验都会重新同步，是最坏情况
+        step[0] = -step[0]
+        batcher.move(step[0], 1 if step[0] > 0 else -1)
+        batcher.wheel(-7)
+        batcher.flush()
+
+    scenarios = {
+        '旧版: 每次新建结构体': lambda: legacy_scroll_vertical(-7),
+        '预分配: 滚轮 + 提交': pooled_tick,
+        '预分配: 移动 + 滚轮 + 提交': pooled_tick_with_move,
+    }
+
+    print(f"{frames} 帧，取 5 轮中的最小值；{STREAM_RATE_HZ} Hz 下的 CPU 占比按单帧耗时折算\n")
+    print(f"{'场景':<28}{'ns/帧':>10}{'CPU 占比':>12}{'临时分配 (B/帧)':>20}{'残留 (B)':>12}")
+    for name, tick in scenarios.items():
+        elapsed = min(timeit.repeat(tick, number=frames, repeat=5))
+        per_tick_ns = elapsed / frames * 1e9
+        cpu_share = per_tick_ns * STREAM_RATE_HZ / 1e9
+        allocated, retained = transient_bytes(tick)
+        print(f"{name:<28}{per_tick_ns:>10.1f}{cpu_share:>11.3%}{allocated:>20.1f}{retained:>12}")
+
+    print(f"\n预分配批次统计: {batcher.get_stats()}")
+
+
+if __name__ == '__main__':
+    main()
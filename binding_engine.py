@@ -0,0 +1,218 @@
+"""按键绑定引擎模块
+
+把配置中的所有按键绑定（单键、组合键、按键序列）编译成前缀树（trie），
+运行时每个钩子事件只需常数次字典查找即可推进匹配状态。
+
+组合键在编译时展开为所有允许的修饰键状态（8 位，左右分开，见 utool.MOD_*），
+因此匹配时只需用 "虚拟键码 | 修饰键状态 << 8" 做一次精确查找；
+不带修饰键的单键则另以通配键存放，忽略当前的修饰键状态。
+没有未完成的序列时，单键和单个组合键绑定直接查 single_actions 表，不经过逐层推进。
+
+典型用法:
+    trie = BindingTrie([(((0x41, frozenset({0x04})),), 'toggle_mode', '<lalt>+a')])
+    matcher = BindingMatcher({AppMode.NORMAL: trie}, timeout=1.0)
+    action, suppress = matcher.feed(AppMode.NORMAL, vk, True, modifier_state, now)
+"""
+
+from typing import Dict, FrozenSet, Hashable, Iterable, Mapping, Optional, Sequence, Set, Tuple
+
+# 组合键: (虚拟键码, 允许的修饰键状态集合)，状态集合为 None 表示不限修饰键
+Chord = Tuple[int, Optional[FrozenSet[int]]]
+
+# 不限修饰键的单键在字典中的标记位
+BARE_KEY_FLAG = 1 << 16
+
+# 区分左右的修饰键虚拟键码: 左右 Shift/Ctrl/Alt 与左右 Win 键
+MODIFIER_VKS = frozenset({0xA0, 0xA1, 0xA2, 0xA3, 0xA4, 0xA5, 0x5B, 0x5C})
+
+
+class _Node:
+    """前缀树节点"""
+    __slots__ = ('children', 'action', 'binding')
+
+    def __init__(self) -> None:
+        self.children: Dict[int, '_Node'] = {}
+        self.action: Optional[str] = None
+        self.binding: Optional[str] = None
+
+
+class BindingTrie:
+    """编译后的只读绑定前缀树"""
+
+    def __init__(self, bindings: Iterable[Tuple[Sequence[Chord], str, str]]) -> None:
+        """编译绑定。
+
+        Args:
+            bindings: (组合键序列, 动作名, 原始绑定文本) 的可迭代对象，按优先级从高到低排列；
+                      完全相同的序列只保留第一个动作
+
+        Raises:
+            ValueError: 某个绑定是另一个绑定的前缀时抛出
+        """
+        self.root = _Node()
+        for chords, action, text in bindings:
+            self._insert(chords, action, text)
+        self.single_actions = self._build_single_actions()
+
+    def _insert(self, chords: Sequence[Chord], action: str, text: str) -> None:
+        """插入一条绑定，组合键的每个允许状态都会生成一条边。"""
+        nodes = [self.root]
+        for vk, states in chords:
+            keys = [vk | BARE_KEY_FLAG] if states is None else [vk | (state << 8) for state in states]
+            next_nodes = []
+            for node in nodes:
+                if node.action is not None:
+                    raise ValueError(f"按键绑定 '{node.binding}' 是 '{text}' 的前缀，无法区分！")
+                for key in keys:
+                    child = node.children.get(key)
+                    if child is None:
+                        child = node.children[key] = _Node()
+                    if child not in next_nodes:
+                        next_nodes.append(child)
+            nodes = next_nodes
+
+        for node in nodes:
+            if node.children:
+                raise ValueError(f"按键绑定 '{text}' 是另一个按键序列的前缀，无法区分！")
+            # 相同的按键已被更高优先级的动作占用时保留原动作
+            if node.action is None:
+                node.action = action
+                node.binding = text
+
+    def _build_single_actions(self) -> Dict[int, str]:
+        """构建 "虚拟键码 | 修饰键状态 << 8" -> 动作名 的表，只含从根节点一步就完成的绑定。
+
+        通配键按 256 种修饰键状态展开，但不覆盖根节点上同一状态的精确边，
+        与逐层匹配中精确状态优先于通配键的顺序一致。
+        """
+        children = self.root.children
+        single: Dict[int, str] = {}
+        for key, child in children.items():
+            if child.action is None:
+                continue
+            if key & BARE_KEY_FLAG:
+                vk = key & 0xFF
+                for state in range(256):
+                    exact = vk | (state << 8)
+                    if exact not in children:
+                        single[exact] = child.action
+            else:
+                single[key] = child.action
+        return single
+
+    def key_codes(self) -> Set[int]:
+        """获取树中出现过的所有虚拟键码（任何位置、任何修饰键状态）。"""
+        codes: Set[int] = set()
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            for key, child in node.children.items():
+                codes.add(key & 0xFF)
+                stack.append(child)
+        return codes
+
+
+class BindingMatcher:
+    """在一组按上下文区分的前缀树上推进匹配状态。
+
+    每个上下文（例如应用程序模式）对应一棵前缀树，匹配状态在上下文之间共享，
+    切换上下文时未完成的序列会被丢弃。
+    """
+
+    def __init__(self, tries: Mapping[Hashable, BindingTrie], timeout: float,
+                 suppress_prefix: Optional[Mapping[Hashable, bool]] = None) -> None:
+        """初始化匹配器。
+
+        Args:
+            tries: 上下文 -> 前缀树
+            timeout: 按键序列中相邻两键的最大间隔（秒），超时后从头开始匹配
+            suppress_prefix: 上下文 -> 是否拦截序列中尚未完成的前缀按键，默认拦截
+        """
+        self.tries = dict(tries)
+        self.timeout = timeout
+        self.suppress_prefix = dict(suppress_prefix or {})
+        self._context: Optional[Hashable] = None
+        self._node: Optional[_Node] = None
+        self._last_time = 0.0
+        # 已触发动作的按键 -> 动作名，用于把释放事件送到同一个动作
+        self.held: Dict[int, str] = {}
+        # 作为序列前缀被拦截的按键，其释放事件同样需要拦截
+        self._swallowed: Set[int] = set()
+
+    def reset(self) -> None:
+        """丢弃未完成的按键序列。"""
+        self._node = None
+
+    def feed(self, context: Hashable, vk: int, is_key_down: bool,
+             modifier_state: int, timestamp: float) -> Tuple[Optional[str], bool]:
+        """输入一个按键事件。
+
+        Args:
+            context: 当前上下文
+            vk: 虚拟按键码
+            is_key_down: 是否为按下事件
+            modifier_state: 当前修饰键位掩码
+            timestamp: 事件时间（秒）
+
+        Returns:
+            Tuple[Optional[str], bool]: (触发的动作名, 是否拦截该事件)。
+            按下事件完成绑定时返回其动作；释放事件返回按下时触发的动作，
+            以便调用方执行对应的释放处理。
+        """
+        if not is_key_down:
+            action = self.held.pop(vk, None)
+            if action is not None:
+                return action, True
+            if vk in self._swallowed:
+                self._swallowed.discard(vk)
+                return None, True
+            return None, False
+
+        # 已触发的按键再次按下（自动重复），拦截但不重复触发
+        if vk in self.held:
+            return None, True
+
+        trie = self.tries.get(context)
+        if trie is None:
+            self._node = None
+            return None, False
+
+        node = self._node
+        if node is None:
+            # 快速路径: 没有未完成的序列时，单键绑定只需一次查找
+            action = trie.single_actions.get(vk | (modifier_state << 8))
+            if action is not None:
+                self.held[vk] = action
+                return action, True
+            node = trie.root
+        elif context != self._context or timestamp - self._last_time > self.timeout:
+            node = trie.root
+
+        children = node.children
+        child = children.get(vk | (modifier_state << 8))
+        if child is None:
+            child = children.get(vk | BARE_KEY_FLAG)
+        if child is None and node is not trie.root:
+            # 修饰键不打断按键序列，其他按键使序列中断并从根节点重新开始匹配
+            if vk in MODIFIER_VKS:
+                return None, False
+            node = trie.root
+            child = node.children.get(vk | (modifier_state << 8))
+            if child is None:
+                child = node.children.get(vk | BARE_KEY_FLAG)
+        if child is None:
+            self._node = None
+            return None, False
+
+        if child.action is not None:
+            self._node = None
+            self.held[vk] = child.action
+            return child.action, True
+
+        self._node = child
+        self._context = context
+        self._last_time = timestamp
+        suppress = self.suppress_prefix.get(context, True)
+        if suppress:
+            self._swallowed.add(vk)
+        return None, suppress
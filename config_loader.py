@@ -2,14 +2,152 @@
 
 该模块负责从配置文件中加载和解析应用程序的配置信息。
 包括按键绑定、鼠标移动设置、滚动设置等。
+
+按键绑定的语法:
+    单键:      i
+    组合键:    <ctrl>+<shift>+a
+    按键序列:  g g    或    leader, x    （以空格或逗号分隔，leader 指 [Keybindings] 中的 leader 键）
 """
 
 import configparser
 import os
+import re
 import sys
-from typing import List, Set
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+from binding_engine import BindingTrie, Chord
+from modeswitch import AppMode
+from scroll_curves import ScrollCurve, build_scroll_curve, parse_curve_points
+from utool import (KEY_TO_VK, MODIFIER_NAME_TO_MASKS,
+                   MOD_LCTRL, MOD_LALT, MOD_LSHIFT, MOD_LWIN)
+
+# 鼠标控制模式下的绑定，按优先级从高到低排列: (配置键名, 动作名)
+MOUSE_CONTROL_BINDINGS = [
+    ('enter_region_select_mode', 'enter_region_select'),
+    ('exit_program', 'exit_program'),
+    ('toggle_mode_internal', 'toggle_mode'),
+    ('sticky_left_click', 'sticky_left_click'),
+    ('left_click', 'left_click'),
+    ('right_click', 'right_click'),
+    ('middle_click', 'middle_click'),
+    ('scroll_down', 'scroll_down'),
+    ('scroll_up', 'scroll_up'),
+    ('move_up', 'move_up'),
+    ('move_down', 'move_down'),
+    ('move_left', 'move_left'),
+    ('move_right', 'move_right'),
+]
+
+# 可选的鼠标控制模式绑定，配置文件中缺少时不绑定（兼容旧配置文件）
+OPTIONAL_MOUSE_CONTROL_BINDINGS = [
+    ('scroll_left', 'scroll_left'),
+    ('scroll_right', 'scroll_right'),
+]
+
+
+# 修饰键位 -> RegisterHotKey 的 fsModifiers 标志（MOD_CONTROL、MOD_ALT、MOD_SHIFT、MOD_WIN）
+_OS_HOTKEY_MODIFIERS = ((MOD_LCTRL, 0x0002), (MOD_LALT, 0x0001), (MOD_LSHIFT, 0x0004), (MOD_LWIN, 0x0008))
+
+# 区域选择布局中的标点字符 -> KEY_TO_VK 中的键名
+_LAYOUT_PUNCTUATION = {';': 'semicolon', "'": 'apostrophe', ',': 'comma', '.': 'period', '/': 'slash'}
+
+
+def _expand_modifier_states(sideless_mask: int, sided_mask: int) -> List[int]:
+    """把不区分左右的修饰键展开为所有满足要求的精确修饰键状态。"""
+    states = [sided_mask]
+    for bit in (MOD_LCTRL, MOD_LALT, MOD_LSHIFT, MOD_LWIN):
+        if sideless_mask & bit:
+            states = [state | variant for state in states
+                      for variant in (bit, bit << 1, bit | (bit << 1))]
+    return states
+
+
+def _chord_modifier_masks(states: Optional[FrozenSet[int]]) -> Tuple[int, int]:
+    """从组合键允许的修饰键状态集合还原 (不区分左右的掩码, 指定侧的掩码)。
+
+    某个修饰键的左、右、两侧三种状态都出现时视为不区分左右，只出现一种时视为指定侧。
+    不限修饰键（None）时两个掩码都为 0。
+    """
+    sideless_mask = sided_mask = 0
+    for bit in (MOD_LCTRL, MOD_LALT, MOD_LSHIFT, MOD_LWIN):
+        pair = bit | (bit << 1)
+        variants = {state & pair for state in states or ()}
+        if variants == {bit, bit << 1, pair}:
+            sideless_mask |= bit
+        elif len(variants) == 1:
+            sided_mask |= variants.pop()
+    return sideless_mask, sided_mask
+
+
+def _modifier_names(sideless_mask: int, sided_mask: int) -> List[str]:
+    """把修饰键掩码还原为修饰键名（ctrl、ralt 等）。"""
+    names = []
+    for bit, name in ((MOD_LCTRL, 'ctrl'), (MOD_LALT, 'alt'), (MOD_LSHIFT, 'shift'), (MOD_LWIN, 'win')):
+        if sideless_mask & bit:
+            names.append(name)
+            continue
+        if sided_mask & bit:
+            names.append('l' + name)
+        if sided_mask & (bit << 1):
+            names.append('r' + name)
+    return names
+
+
+def parse_chord(text: str) -> Chord:
+    """解析单个组合键，例如 'i' 或 '<ctrl>+<shift>+a'。
+
+    Args:
+        text: 组合键文本
+
+    Returns:
+        (虚拟按键码, 允许的修饰键状态集合)，不带修饰键时状态集合为 None
+
+    Raises:
+        ValueError: 按键名或修饰键名无效时抛出
+    """
+    parts = text.replace('<', '').replace('>', '').lower().split('+')
+    *modifier_names, key_name = parts
+    if key_name not in KEY_TO_VK:
+        raise ValueError(f"按键绑定 '{text}' 中的按键 '{key_name}' 无效！")
+    if not modifier_names:
+        return KEY_TO_VK[key_name], None
 
-from utool import KEY_TO_VK, NAME_TO_PYNPUT_KEY
+    sideless_mask = sided_mask = 0
+    for name in modifier_names:
+        if name not in MODIFIER_NAME_TO_MASKS:
+            raise ValueError(f"按键绑定 '{text}' 中的修饰键 '{name}' 无效！")
+        sideless, sided = MODIFIER_NAME_TO_MASKS[name]
+        sideless_mask |= sideless
+        sided_mask |= sided
+    return KEY_TO_VK[key_name], frozenset(_expand_modifier_states(sideless_mask, sided_mask))
+
+
+def parse_binding(text: str, leader: Optional[Tuple[Chord, ...]] = None) -> Tuple[Chord, ...]:
+    """解析按键绑定（单键、组合键或按键序列）。
+
+    Args:
+        text: 绑定文本
+        leader: leader 键解析后的组合键序列，绑定中的 'leader' 会被替换为它
+
+    Returns:
+        组合键序列
+
+    Raises:
+        ValueError: 绑定为空、按键无效或使用了未配置的 leader 键时抛出
+    """
+    chords: List[Chord] = []
+    for token in re.split(r'[\s,]+', text.strip()):
+        if not token:
+            continue
+        if token.lower() == 'leader':
+            if leader is None:
+                raise ValueError(f"按键绑定 '{text}' 使用了 leader，但配置中没有设置 leader 键！")
+            chords.extend(leader)
+        else:
+            chords.append(parse_chord(token))
+    if not chords:
+        raise ValueError("按键绑定不能为空！")
+    return tuple(chords)
 
 
 def get_base_path() -> str:
@@ -32,10 +170,8 @@ class AppConfig:
 
     属性:
         config_path: 配置文件的完整路径
-        MOVE_*_VK: 移动相关的虚拟按键码
-        SCROLL_*_VK: 滚动相关的虚拟按键码
-        *_CLICK_VK: 点击相关的虚拟按键码
-        MOUSE_CONTROL_VKS: 所有鼠标控制相关的虚拟按键码集合
+        KEY_BINDINGS: 配置键名到解析后组合键序列的映射
+        BINDING_TRIES: 每个模式对应的已编译绑定前缀树
         其他各种配置属性
     """
 
@@ -67,8 +203,7 @@ class AppConfig:
 
         # 加载按键绑定配置
         keybindings = config['Keybindings']
-        self._load_movement_keys(keybindings, get_key)
-        self._load_mouse_action_keys(keybindings, get_key)
+        self._load_key_bindings(keybindings, get_key)
         self._load_hotkey_settings(keybindings, get_key)
         self._load_character_mappings(keybindings, get_key)
         
@@ -80,32 +215,61 @@ class AppConfig:
         
         # 加载区域选择布局
         self.REGION_SELECT_LAYOUT = self._load_region_select_layout(config)
+        self._load_region_select_depth(config)
+        if self.REGION_SELECT_IN_PROCESS:
+            self.REGION_SELECT_KEY_VKS = self._region_select_key_vks(self.REGION_SELECT_LAYOUT)
 
-    def _load_movement_keys(self, keybindings: configparser.SectionProxy, get_key: callable) -> None:
-        """加载移动相关的按键设置。"""
-        self.MOVE_UP_VK = KEY_TO_VK[get_key(keybindings, 'move_up')]
-        self.MOVE_DOWN_VK = KEY_TO_VK[get_key(keybindings, 'move_down')]
-        self.MOVE_LEFT_VK = KEY_TO_VK[get_key(keybindings, 'move_left')]
-        self.MOVE_RIGHT_VK = KEY_TO_VK[get_key(keybindings, 'move_right')]
-        self.SCROLL_UP_VK = KEY_TO_VK[get_key(keybindings, 'scroll_up')]
-        self.SCROLL_DOWN_VK = KEY_TO_VK[get_key(keybindings, 'scroll_down')]
-
-    def _load_mouse_action_keys(self, keybindings: configparser.SectionProxy, get_key: callable) -> None:
-        """加载鼠标动作相关的按键设置。"""
-        self.LEFT_CLICK_VK = KEY_TO_VK[get_key(keybindings, 'left_click')]
-        self.RIGHT_CLICK_VK = KEY_TO_VK[get_key(keybindings, 'right_click')]
-        self.MIDDLE_CLICK_VK = KEY_TO_VK[get_key(keybindings, 'middle_click')]
-        self.STICKY_LEFT_CLICK_VK = KEY_TO_VK[get_key(keybindings, 'sticky_left_click')]
-        self.TOGGLE_MODE_INTERNAL_VK = KEY_TO_VK[get_key(keybindings, 'toggle_mode_internal')]
-        self.ENTER_REGION_SELECT_VK = KEY_TO_VK[get_key(keybindings, 'enter_region_select_mode')]
+    def _load_key_bindings(self, keybindings: configparser.SectionProxy, get_key: callable) -> None:
+        """解析所有按键绑定，并编译为每个模式各一棵绑定前缀树。"""
+        leader_str = keybindings.get('leader')
+        leader = parse_binding(leader_str) if leader_str else None
+        self.SEQUENCE_TIMEOUT = keybindings.getfloat('sequence_timeout', 1.0)
+
+        # 配置键名 -> 组合键序列
+        self.KEY_BINDINGS: Dict[str, Tuple[Chord, ...]] = {}
+        option_names = ['toggle_mode_hotkey'] + [option for option, _ in MOUSE_CONTROL_BINDINGS]
+        for option in option_names:
+            self.KEY_BINDINGS[option] = parse_binding(get_key(keybindings, option), leader)
+        optional_bindings = [(option, action) for option, action in OPTIONAL_MOUSE_CONTROL_BINDINGS
+                             if keybindings.get(option)]
+        for option, _ in optional_bindings:
+            self.KEY_BINDINGS[option] = parse_binding(keybindings[option], leader)
+
+        def entries(options):
+            return [(self.KEY_BINDINGS[option], action, keybindings[option])
+                    for option, action in options]
+
+        # 全局切换热键在普通模式和鼠标控制模式下都生效，且优先级最高
+        global_bindings = [('toggle_mode_hotkey', 'toggle_mode')]
+        self.BINDING_TRIES: Dict[AppMode, BindingTrie] = {
+            AppMode.NORMAL: BindingTrie(entries(global_bindings)),
+            AppMode.MOUSE_CONTROL: BindingTrie(entries(global_bindings + MOUSE_CONTROL_BINDINGS
+                                                       + optional_bindings)),
+        }
 
     def _load_hotkey_settings(self, keybindings: configparser.SectionProxy, get_key: callable) -> None:
-        """加载热键设置。"""
+        """加载热键设置（修饰键取自解析后的绑定，leader 等别名已经展开）。"""
         hotkey_str = get_key(keybindings, 'toggle_mode_hotkey')
-        parts = hotkey_str.replace('<', '').replace('>', '').lower().split('+')
-        self.HOTKEY_MODIFIER = parts[0]
-        self.HOTKEY_TRIGGER_KEY = parts[1]
-        self.HOTKEY_TRIGGER_VK = KEY_TO_VK[self.HOTKEY_TRIGGER_KEY]
+        hotkey = self.KEY_BINDINGS['toggle_mode_hotkey']
+        # 只有单个组合键形式的热键可以交给操作系统的热键机制
+        self.HOTKEY_IS_CHORD = len(hotkey) == 1
+        self.HOTKEY_TRIGGER_VK, states = hotkey[-1]
+
+        # 预先计算修饰键掩码
+        self.HOTKEY_SIDELESS_MASK, self.HOTKEY_SIDED_MASK = _chord_modifier_masks(states)
+        self.HOTKEY_MODIFIERS = _modifier_names(self.HOTKEY_SIDELESS_MASK, self.HOTKEY_SIDED_MASK)
+        expressible = states is None or states == frozenset(
+            _expand_modifier_states(self.HOTKEY_SIDELESS_MASK, self.HOTKEY_SIDED_MASK))
+
+        # RegisterHotKey 只能表达不区分左右的修饰键组合，序列、指定左右侧的热键
+        # 和通过 leader 给出的热键只能由钩子匹配
+        uses_leader = any(token.lower() == 'leader' for token in re.split(r'[\s,]+', hotkey_str))
+        self.HOTKEY_REGISTRABLE = (self.HOTKEY_IS_CHORD and not uses_leader and expressible
+                                   and self.HOTKEY_SIDED_MASK == 0)
+        self.HOTKEY_OS_MODIFIERS = 0
+        for bit, os_modifier in _OS_HOTKEY_MODIFIERS:
+            if self.HOTKEY_SIDELESS_MASK & bit:
+                self.HOTKEY_OS_MODIFIERS |= os_modifier
 
     def _load_character_mappings(self, keybindings: configparser.SectionProxy, get_key: callable) -> None:
         """加载字符映射设置。"""
@@ -113,30 +277,51 @@ class AppConfig:
         self.MOVE_DOWN_CHAR = get_key(keybindings, 'move_down')
         self.MOVE_LEFT_CHAR = get_key(keybindings, 'move_left')
         self.MOVE_RIGHT_CHAR = get_key(keybindings, 'move_right')
-        exit_key_name = get_key(keybindings, 'exit_program')
-        self.EXIT_PROGRAM_PYNPUT = NAME_TO_PYNPUT_KEY[exit_key_name]
-
-        # 初始化鼠标控制虚拟按键集合
-        self.MOUSE_CONTROL_VKS: Set[int] = {
-            self.MOVE_UP_VK, self.MOVE_DOWN_VK, self.MOVE_LEFT_VK, self.MOVE_RIGHT_VK,
-            self.SCROLL_DOWN_VK, self.SCROLL_UP_VK, self.LEFT_CLICK_VK,
-            self.RIGHT_CLICK_VK, self.MIDDLE_CLICK_VK, self.TOGGLE_MODE_INTERNAL_VK,
-            self.STICKY_LEFT_CLICK_VK
-        }
 
     def _load_general_settings(self, settings: configparser.SectionProxy) -> None:
         """加载通用设置。"""
-        self.MOUSE_MOVE_SPEED = settings.getint('mouse_move_speed')
         self.MOUSE_SPEED_SHIFT = settings.getfloat('mouse_speed_shift_multiplier')
         self.MOUSE_SPEED_CAPLOCK = settings.getfloat('mouse_speed_capslock_multiplier')
         self.DELAY_PER_STEP = settings.getfloat('delay_per_step')
+        # 仅滚动、仅有一次性动作时的循环间隔（秒）；光标移动时使用 delay_per_step
+        self.SCROLL_DELAY_PER_STEP = settings.getfloat('scroll_delay_per_step', self.DELAY_PER_STEP)
+        self.IDLE_DELAY_PER_STEP = settings.getfloat('idle_delay_per_step', 0.1)
+        # 每帧截止时间前用于自旋等待的最大时长（秒）
+        self.TIMER_SPIN_MARGIN = settings.getfloat('timer_spin_margin', 0.002)
+        # 光标速度(像素/秒)，与循环频率无关。
+        # 旧配置只有按每步像素数给出的 mouse_move_speed，据此换算以保持原有手感。
+        if settings.get('mouse_move_velocity') is not None:
+            self.MOUSE_MOVE_VELOCITY = settings.getfloat('mouse_move_velocity')
+        else:
+            self.MOUSE_MOVE_VELOCITY = settings.getint('mouse_move_speed') / self.DELAY_PER_STEP
         self.RUN_AS_ADMIN = settings.getboolean('run_as_admin', False)
+        # 普通模式下改用系统热键监听切换热键，并卸载低级键盘钩子
+        self.USE_SYSTEM_HOTKEY = settings.getboolean('use_system_hotkey', True)
+        # 区域选择器运行在主程序的 UI 线程上，选择按键由键盘钩子拦截后送入
+        self.REGION_SELECT_IN_PROCESS = settings.getboolean('region_select_in_process', False)
+        self.REGION_SELECT_KEY_VKS: Dict[int, str] = {}
 
     def _load_smooth_scrolling_settings(self, scrolling_settings: configparser.SectionProxy) -> None:
         """加载平滑滚动设置。"""
         self.SCROLL_INITIAL_VELOCITY = scrolling_settings.getfloat('initial_velocity')
         self.SCROLL_MAX_VELOCITY = scrolling_settings.getfloat('max_velocity')
         self.SCROLL_ACCELERATION = scrolling_settings.getfloat('acceleration')
+        # 加速曲线在加载时编译成查找表，滚动时每帧只查表
+        self.SCROLL_CURVE_NAME = scrolling_settings.get('curve', 'linear').strip().lower()
+        points = parse_curve_points(scrolling_settings.get('curve_points', ''))
+        self.SCROLL_CURVE: ScrollCurve = build_scroll_curve(
+            self.SCROLL_CURVE_NAME, self.SCROLL_INITIAL_VELOCITY,
+            self.SCROLL_MAX_VELOCITY, self.SCROLL_ACCELERATION, points
+        )
+        # 惯性滚动: 释放滚动键后按摩擦系数（1/秒）指数减速滑行，低于停止速度（像素/秒）时结束
+        self.SCROLL_KINETIC = scrolling_settings.getboolean('kinetic', False)
+        self.SCROLL_KINETIC_FRICTION = scrolling_settings.getfloat('kinetic_friction', 4.0)
+        self.SCROLL_KINETIC_STOP_VELOCITY = scrolling_settings.getfloat('kinetic_stop_velocity', 30.0)
+        if self.SCROLL_KINETIC and self.SCROLL_KINETIC_FRICTION <= 0:
+            raise ValueError("配置文件 [SmoothScrolling] 中的 kinetic_friction 必须大于 0！")
+        # 指数减速永远到不了 0，停止速度不大于 0 时滑行不会结束
+        if self.SCROLL_KINETIC and self.SCROLL_KINETIC_STOP_VELOCITY <= 0:
+            raise ValueError("配置文件 [SmoothScrolling] 中的 kinetic_stop_velocity 必须大于 0！")
 
     def _load_region_select_layout(self, config: configparser.ConfigParser) -> List[List[str]]:
         """加载区域选择布局配置。
@@ -168,4 +353,34 @@ class AppConfig:
         if not all(len(row) == first_row_len for row in layout):
             raise ValueError("配置文件 [RegionSelectLayout] 中所有行的键位数必须相同！")
             
-        return layout
\ No newline at end of file
+        return layout
+
+    def _load_region_select_depth(self, config: configparser.ConfigParser) -> None:
+        """加载区域选择的级数设置。
+
+        Raises:
+            ValueError: depth 小于 1 或 min_cell_size 为负数时抛出
+        """
+        # 每次选择按键的次数
+        self.REGION_SELECT_DEPTH = config.getint('RegionSelectLayout', 'depth', fallback=2)
+        # 大于 0 时忽略 depth，一直细分到选中的格子宽高都小于这么多像素为止
+        self.REGION_SELECT_MIN_CELL_SIZE = config.getfloat('RegionSelectLayout', 'min_cell_size', fallback=0.0)
+        if self.REGION_SELECT_DEPTH < 1:
+            raise ValueError("配置文件 [RegionSelectLayout] 中的 depth 必须至少为 1！")
+        if self.REGION_SELECT_MIN_CELL_SIZE < 0:
+            raise ValueError("配置文件 [RegionSelectLayout] 中的 min_cell_size 不能为负数！")
+
+    @staticmethod
+    def _region_select_key_vks(layout: List[List[str]]) -> Dict[int, str]:
+        """为进程内区域选择器建立虚拟键码到布局键名的映射。
+
+        Raises:
+            ValueError: 布局中有无法对应到虚拟键码的按键时抛出
+        """
+        key_vks = {}
+        for key in (key for row in layout for key in row):
+            name = _LAYOUT_PUNCTUATION.get(key, key.lower())
+            if name not in KEY_TO_VK:
+                raise ValueError(f"配置文件 [RegionSelectLayout] 中的按键 '{key}' 无法用于进程内区域选择！")
+            key_vks[KEY_TO_VK[name]] = key
+        return key_vks
\ No newline at end of file
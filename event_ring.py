@@ -0,0 +1,118 @@
+"""钩子事件环形缓冲区模块
+
+低级键盘钩子回调必须尽快返回，否则 Windows 会按 LowLevelHooksTimeout 静默移除钩子，
+而且整个系统的打字延迟都取决于这个回调。因此钩子只负责判断是否拦截，
+并把一个紧凑的事件记录写入本模块的有界环形缓冲区，其余工作由消费线程完成。
+
+缓冲区为单生产者（钩子线程）/单消费者（事件处理线程）设计：
+写指针只由生产者修改，读指针只由消费者修改，读写槽位本身不需要加锁。
+"""
+
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+# 事件记录类型: (事件种类, 参数, 是否按下)
+EventRecord = Tuple[int, Any, bool]
+
+# 事件种类: 绑定引擎匹配到的动作，参数为动作名
+EVENT_ACTION = 1
+
+
+class EventRing:
+    """单生产者/单消费者的有界环形缓冲区"""
+
+    def __init__(self, capacity: int = 256) -> None:
+        """初始化环形缓冲区。
+
+        Args:
+            capacity: 缓冲区容量，会向上取整为 2 的幂
+        """
+        size = 1
+        while size < capacity:
+            size <<= 1
+        self.capacity = size
+        self._mask = size - 1
+        self._slots = [None] * size
+        # 单调递增的写/读计数，槽位下标为计数与掩码按位与
+        self._head = 0
+        self._tail = 0
+        self._ready = threading.Event()
+
+        self.pushed_count = 0
+        self.overflow_count = 0
+        self.max_depth = 0
+
+    def push(self, record: EventRecord) -> bool:
+        """写入一条事件记录（仅供生产者调用）。
+
+        Args:
+            record: 事件记录
+
+        Returns:
+            bool: 写入成功返回 True；缓冲区已满时丢弃记录并返回 False
+        """
+        head = self._head
+        depth = head - self._tail
+        if depth >= self.capacity:
+            self.overflow_count += 1
+            return False
+        self._slots[head & self._mask] = record
+        # 先写槽位再推进写指针，消费者看到新指针时槽位已就绪
+        self._head = head + 1
+        self.pushed_count += 1
+        if depth + 1 > self.max_depth:
+            self.max_depth = depth + 1
+        if not self._ready.is_set():
+            self._ready.set()
+        return True
+
+    def pop(self) -> Optional[EventRecord]:
+        """取出一条事件记录（仅供消费者调用）。
+
+        Returns:
+            Optional[EventRecord]: 最早写入的记录，缓冲区为空时返回 None
+        """
+        tail = self._tail
+        if tail == self._head:
+            return None
+        index = tail & self._mask
+        record = self._slots[index]
+        self._slots[index] = None
+        self._tail = tail + 1
+        return record
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """阻塞直到缓冲区中有记录（仅供消费者调用）。
+
+        Args:
+            timeout: 最长等待时间（秒），None 表示一直等待
+
+        Returns:
+            bool: 缓冲区非空时返回 True
+        """
+        # 先清除信号再复查，避免丢失两次检查之间写入的记录
+        self._ready.clear()
+        if self._tail != self._head:
+            return True
+        return self._ready.wait(timeout)
+
+    def notify(self) -> None:
+        """唤醒等待中的消费者，例如在程序退出时。"""
+        self._ready.set()
+
+    def depth(self) -> int:
+        """获取当前缓冲区中的记录数量。"""
+        return self._head - self._tail
+
+    def get_stats(self) -> Dict[str, int]:
+        """获取缓冲区统计信息。
+
+        Returns:
+            Dict[str, int]: 当前深度、历史最大深度、写入总数和溢出丢弃次数
+        """
+        return {
+            'depth': self.depth(),
+            'max_depth': self.max_depth,
+            'pushed': self.pushed_count,
+            'overflow': self.overflow_count,
+        }
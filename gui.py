@@ -5,8 +5,8 @@ import configparser
 import os
 import sys
 import subprocess
-from config_loader import AppConfig, get_base_path
-from utool import KEY_TO_VK, NAME_TO_PYNPUT_KEY
+from config_loader import AppConfig, OPTIONAL_MOUSE_CONTROL_BINDINGS, get_base_path, parse_binding
+from ini_writer import write_config
 import autostart_manager
 import path_manager
 
@@ -139,6 +139,8 @@ class KeyMouseGUI:
             'move_right': 'l',
             'scroll_up': 'comma',
             'scroll_down': 'm',
+            'scroll_left': 'u',
+            'scroll_right': 'o',
             'left_click': 'semicolon',
             'right_click': 'apostrophe',
             'middle_click': 'rshift',
@@ -149,7 +151,7 @@ class KeyMouseGUI:
         }
         
         setting_defaults = {
-            'mouse_move_speed': 20,
+            'mouse_move_velocity': 2000.0,
             'mouse_speed_shift_multiplier': 0.5,
             'mouse_speed_capslock_multiplier': 0.2,
             'delay_per_step': 0.01,
@@ -176,6 +178,8 @@ class KeyMouseGUI:
         self.create_key_setting(move_frame, "向右移动", "move_right", 3)
         self.create_key_setting(move_frame, "向上滚动", "scroll_up", 4)
         self.create_key_setting(move_frame, "向下滚动", "scroll_down", 5)
+        self.create_key_setting(move_frame, "向左滚动 (可留空)", "scroll_left", 6)
+        self.create_key_setting(move_frame, "向右滚动 (可留空)", "scroll_right", 7)
         
         # 鼠标点击控制
         click_frame = ttk.LabelFrame(keybindings_container, text="鼠标点击控制")
@@ -251,16 +255,16 @@ class KeyMouseGUI:
         speed_frame.pack(fill=tk.X, pady=5, padx=10)
         
         # 基础移动速度
-        ttk.Label(speed_frame, text="基础移动速度").grid(
+        ttk.Label(speed_frame, text="基础移动速度 (px/s)").grid(
             row=0, column=0, padx=5, pady=5, sticky=tk.W
         )
-        self.move_speed_var = tk.IntVar(
-            value=self.config_parser.getint('Settings', 'mouse_move_speed')
+        self.move_speed_var = tk.DoubleVar(
+            value=self.config.MOUSE_MOVE_VELOCITY
         )
         ttk.Scale(
             speed_frame,
-            from_=1,
-            to=50,
+            from_=100,
+            to=5000,
             variable=self.move_speed_var,
             orient=tk.HORIZONTAL
         ).grid(row=0, column=1, padx=5, pady=5, sticky=tk.EW)
@@ -487,10 +491,18 @@ class KeyMouseGUI:
             invalid_keys = []
             key_values = {}
             
+            leader_str = self.config_parser.get('Keybindings', 'leader', fallback='')
+            leader = parse_binding(leader_str) if leader_str else None
+            optional_keys = {option for option, _ in OPTIONAL_MOUSE_CONTROL_BINDINGS}
             for key, var in self.key_vars.items():
-                key_value = var.get()
+                key_value = var.get().strip()
                 key_values[key] = key_value
-                if '+' not in key_value and key_value not in KEY_TO_VK:
+                if not key_value and key in optional_keys:
+                    # 可选绑定留空表示不绑定
+                    continue
+                try:
+                    parse_binding(key_value, leader)
+                except ValueError:
                     invalid_keys.append(f"{key}: {key_value}")
                     
             if invalid_keys:
@@ -505,8 +517,10 @@ class KeyMouseGUI:
                 self.config_parser.set('Keybindings', key, value)
             
             # 写入通用设置
-            self.config_parser.set('Settings', 'mouse_move_speed',
-                                 str(self.move_speed_var.get()))
+            self.config_parser.set('Settings', 'mouse_move_velocity',
+                                 f"{self.move_speed_var.get():.1f}")
+            # 旧版按每步像素数的速度设置已被 mouse_move_velocity 取代
+            self.config_parser.remove_option('Settings', 'mouse_move_speed')
             self.config_parser.set('Settings', 'mouse_speed_shift_multiplier',
                                  f"{self.shift_mult_var.get():.1f}")
             self.config_parser.set('Settings', 'mouse_speed_capslock_multiplier',
@@ -524,9 +538,8 @@ class KeyMouseGUI:
             self.config_parser.set('SmoothScrolling', 'acceleration',
                                  f"{self.acceleration_var.get():.1f}")
             
-            # 保存到文件
-            with open(self.config_path, 'w', encoding='utf-8') as f:
-                self.config_parser.write(f)
+            # 保存到文件，保留配置文件中的注释
+            write_config(self.config_path, self.config_parser)
             
             self.status_var.set("设置已保存")
             
@@ -588,9 +601,7 @@ class KeyMouseGUI:
                 var.set(self.config_parser.get('Keybindings', key, fallback=''))
             
             # 刷新通用设置
-            self.move_speed_var.set(
-                self.config_parser.getint('Settings', 'mouse_move_speed')
-            )
+            self.move_speed_var.set(self.config.MOUSE_MOVE_VELOCITY)
             self.shift_mult_var.set(
                 self.config_parser.getfloat('Settings', 'mouse_speed_shift_multiplier')
             )
@@ -631,7 +642,7 @@ class KeyMouseGUI:
                     self.key_vars[key].set(value)
             
             # 重置通用设置
-            self.move_speed_var.set(setting_defaults['mouse_move_speed'])
+            self.move_speed_var.set(setting_defaults['mouse_move_velocity'])
             self.shift_mult_var.set(setting_defaults['mouse_speed_shift_multiplier'])
             self.caps_mult_var.set(setting_defaults['mouse_speed_capslock_multiplier'])
             self.delay_var.set(setting_defaults['delay_per_step'])
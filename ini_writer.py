@@ -0,0 +1,88 @@
+"""保留注释的配置文件写入
+
+configparser.ConfigParser.write 会丢掉配置文件中的所有注释（包括被注释掉的示例配置）。
+这里按原文件逐行改写: 已有配置项原地替换值，解析器中已删除的配置项删去，
+新增的配置项追加到所在节的末尾，注释、空行和顺序都保持不变。
+"""
+
+import configparser
+import re
+from typing import List
+
+_SECTION_RE = re.compile(r'^\s*\[([^\]]+)\]')
+_OPTION_RE = re.compile(r'^\s*([^;#\s\[][^=:]*?)\s*[=:]')
+
+
+def render_config(original: str, parser: configparser.ConfigParser) -> str:
+    """
+    以 original 为模板生成与 parser 内容一致的配置文本。
+
+    Args:
+        original: 原配置文件的文本
+        parser: 包含要写入的全部节和配置项的解析器
+
+    Returns:
+        str: 新的配置文件文本
+    """
+    lines: List[str] = []
+    written_sections = set()
+    section = None
+    written_options = set()
+
+    def close_section():
+        # 解析器中有、原文件中没有的配置项追加到节末尾（节末尾的空行之前）
+        if section is None or not parser.has_section(section):
+            return
+        missing = [f"{name} = {value}" for name, value in parser.items(section, raw=True)
+                   if name not in written_options and name not in parser.defaults()]
+        if not missing:
+            return
+        insert_at = len(lines)
+        while insert_at > 0 and not lines[insert_at - 1].strip():
+            insert_at -= 1
+        lines[insert_at:insert_at] = missing
+
+    for line in original.splitlines():
+        match = _SECTION_RE.match(line)
+        if match:
+            close_section()
+            section = match.group(1).strip()
+            written_sections.add(section)
+            written_options = set()
+            if parser.has_section(section):
+                lines.append(line)
+            continue
+        if section is not None and not parser.has_section(section):
+            # 整节已被删除
+            continue
+        match = _OPTION_RE.match(line)
+        if match and section is not None:
+            name = parser.optionxform(match.group(1).strip())
+            if not parser.has_option(section, name):
+                continue
+            written_options.add(name)
+            lines.append(f"{match.group(1).strip()} = {parser.get(section, name, raw=True)}")
+            continue
+        lines.append(line)
+    close_section()
+
+    for section in parser.sections():
+        if section in written_sections:
+            continue
+        if lines and lines[-1].strip():
+            lines.append('')
+        lines.append(f"[{section}]")
+        lines.extend(f"{name} = {value}" for name, value in parser.items(section, raw=True))
+    return '\n'.join(lines) + '\n'
+
+
+def write_config(path: str, parser: configparser.ConfigParser) -> None:
+    """把 parser 写入 path，保留原文件中的注释和配置项顺序；文件不存在时直接写入。"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            original = f.read()
+    except FileNotFoundError:
+        original = ''
+    text = render_config(original, parser)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(text)
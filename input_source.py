@@ -0,0 +1,134 @@
+"""按键输入源模块
+
+把平台相关的键盘钩子归一化为 `KeyEvent`，交给同一个处理函数决定是否拦截，
+模式切换和按键分发逻辑因此不依赖任何具体的钩子实现。
+
+现有实现:
+    - win_platform.Win32HookSource: Windows 低级键盘钩子
+    - linux_platform.EvdevSource: Linux evdev 设备，独占抓取后把不拦截的按键转发到虚拟键盘
+    - ScriptedSource: 按脚本或录制的事件序列回放，用于无界面的测试和吞吐量测量
+
+按键标识统一使用 Windows 虚拟键码（0-255），与配置中的按键绑定一致。
+"""
+
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional
+
+
+class KeyEvent(NamedTuple):
+    """归一化的按键事件"""
+    vk: int            # Windows 虚拟键码
+    is_down: bool      # 按下为 True，释放为 False
+    is_repeat: bool    # 按住不放时系统产生的自动重复按下
+    timestamp: float   # time.perf_counter 时间基准（秒）
+
+
+# 按键事件处理函数: 返回 True 表示拦截该事件，不再传给其他程序
+KeyEventHandler = Callable[[KeyEvent], bool]
+
+
+class InputSource(ABC):
+    """按键输入源的抽象接口
+
+    处理函数在输入源自己的线程上同步调用，必须尽快返回。
+    """
+
+    @abstractmethod
+    def start(self, handler: KeyEventHandler) -> None:
+        """开始接收按键事件，每个事件调用一次 handler。"""
+
+    @abstractmethod
+    def stop(self) -> None:
+        """停止接收按键事件并释放钩子或设备。"""
+
+    @abstractmethod
+    def is_alive(self) -> bool:
+        """输入源线程是否仍在运行。"""
+
+    @abstractmethod
+    def join(self, timeout: Optional[float] = None) -> None:
+        """等待输入源线程结束。"""
+
+    def set_idle(self, idle: bool) -> None:
+        """进入或离开空闲状态。
+
+        空闲状态下输入源可以改用开销更低的方式只监听切换热键（例如系统热键），
+        不支持的输入源忽略此调用，继续把所有按键交给处理函数。
+        """
+
+    def get_stats(self) -> Dict[str, int]:
+        """获取输入源的统计信息。"""
+        return {}
+
+
+class RepeatTracker:
+    """根据按下/释放历史判断自动重复，供不直接提供重复标志的钩子使用。"""
+    __slots__ = ('_held',)
+
+    def __init__(self) -> None:
+        self._held = bytearray(256)
+
+    def update(self, vk: int, is_down: bool) -> bool:
+        """记录一个事件，返回它是否为自动重复的按下。"""
+        held = self._held
+        is_repeat = is_down and held[vk] == 1
+        held[vk] = 1 if is_down else 0
+        return is_repeat
+
+
+class ScriptedSource(InputSource):
+    """
+    按给定的事件序列回放的输入源。
+
+    事件可以是 KeyEvent，也可以是 (vk, is_down) 二元组（时间戳取回放时刻，重复标志自动推断）。
+    realtime 为 True 时按事件时间戳之间的间隔回放，否则尽快回放。
+    每个事件的拦截结果按顺序保存在 decisions 中。
+    """
+
+    def __init__(self, events: Iterable, realtime: bool = False) -> None:
+        self.events = list(events)
+        self.realtime = realtime
+        self.decisions: List[bool] = []
+        self._thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+
+    def start(self, handler: KeyEventHandler) -> None:
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self.run, args=(handler,), daemon=True)
+        self._thread.start()
+
+    def run(self, handler: KeyEventHandler) -> List[bool]:
+        """在当前线程中同步回放全部事件，返回每个事件的拦截结果。"""
+        tracker = RepeatTracker()
+        decisions = self.decisions
+        first_time: Optional[float] = None
+        start = time.perf_counter()
+        for item in self.events:
+            if self._stop_event.is_set():
+                break
+            if isinstance(item, KeyEvent):
+                event = item
+                if self.realtime:
+                    if first_time is None:
+                        first_time = event.timestamp
+                    delay = start + (event.timestamp - first_time) - time.perf_counter()
+                    if delay > 0:
+                        self._stop_event.wait(delay)
+                tracker.update(event.vk, event.is_down)
+            else:
+                vk, is_down = item
+                event = KeyEvent(vk, is_down, tracker.update(vk, is_down), time.perf_counter())
+            decisions.append(bool(handler(event)))
+        return decisions
+
+    def stop(self) -> None:
+        self._stop_event.set()
+
+    def is_alive(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def join(self, timeout: Optional[float] = None) -> None:
+        if self._thread is not None:
+            self._thread.join(timeout)
@@ -0,0 +1,382 @@
+"""
+该文件负责封装 Linux 平台的鼠标输出后端和按键输入源
+
+- UinputOutputBackend: 通过 /dev/uinput 创建虚拟鼠标（需要 python-evdev 以及 /dev/uinput 的写权限），
+  X11 和 Wayland 下都能工作，但只能产生相对移动，无法读取或设置绝对光标位置。
+- XTestOutputBackend: 通过 X11 的 XTest 扩展注入输入（需要 python-xlib 和 X11 会话），
+  支持绝对移动；滚轮只能以整格（按钮 4/5/6/7）发送，像素级距离会累积到满一格再发送。
+- EvdevSource: 从 /dev/input 下的键盘设备读取按键（需要 python-evdev 以及设备的读权限），
+  独占抓取（grab）设备后，不拦截的按键原样转发到一个虚拟键盘。
+
+create_linux_backend() 在 X11 会话中优先使用 XTest，否则使用 uinput。
+"""
+# linux_platform.py
+
+import logging
+import os
+import select
+import struct
+import threading
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from input_source import InputSource, KeyEvent, KeyEventHandler
+from output_backend import OutputBackend
+
+try:
+    import evdev
+    from evdev import ecodes
+except ImportError:
+    evdev = None
+    ecodes = None
+
+try:
+    from Xlib import X
+    from Xlib import display as xdisplay
+    from Xlib.ext import xtest
+except ImportError:
+    X = None
+    xdisplay = None
+    xtest = None
+
+# 与 Windows 的 WHEEL_DELTA 一致: 滚轮距离以 1/120 格为单位
+WHEEL_DELTA = 120
+
+# struct input_event: struct timeval (两个 long) + __u16 type + __u16 code + __s32 value
+_INPUT_EVENT = struct.Struct('llHHi')
+
+# uinput 后端的按键名 -> evdev 按键码（BTN_LEFT/BTN_RIGHT/BTN_MIDDLE）
+_UINPUT_BUTTONS = {'left': 0x110, 'right': 0x111, 'middle': 0x112}
+
+# XTest 后端的按键名 -> X11 按钮编号
+_X_BUTTONS = {'left': 1, 'middle': 2, 'right': 3}
+# X11 中滚轮以按钮模拟: 4 上、5 下、6 左、7 右
+_X_WHEEL_UP, _X_WHEEL_DOWN, _X_WHEEL_LEFT, _X_WHEEL_RIGHT = 4, 5, 6, 7
+
+
+class UinputOutputBackend(OutputBackend):
+    """
+    基于 uinput 虚拟设备的输出后端。
+
+    排队的事件在 flush() 时打包成一个 input_event 数组，连同 SYN_REPORT 一次 write() 写入设备，
+    与 Windows 后端每帧一次 SendInput 对应。滚轮同时发送高精度（REL_*_HI_RES，1/120 格）
+    和传统整格事件，兼容只识别整格滚动的程序。
+    """
+    supports_absolute = False
+
+    def __init__(self, name: str = 'KeyMouse virtual pointer'):
+        if evdev is None:
+            raise RuntimeError("uinput 输出后端需要 python-evdev，请先安装: pip install evdev")
+        capabilities = {
+            ecodes.EV_KEY: list(_UINPUT_BUTTONS.values()),
+            ecodes.EV_REL: [ecodes.REL_X, ecodes.REL_Y, ecodes.REL_WHEEL, ecodes.REL_HWHEEL,
+                            ecodes.REL_WHEEL_HI_RES, ecodes.REL_HWHEEL_HI_RES],
+        }
+        self._device = evdev.UInput(capabilities, name=name)
+        self._fd = self._device.fd
+        self._pending: List[Tuple[int, int, int]] = []
+        # 高精度滚轮尚未凑满一格的部分，按轴分别累积
+        self._wheel_remainder = 0
+        self._hwheel_remainder = 0
+        self._lock = threading.Lock()
+
+        self.requested_count = 0
+        self.syscall_count = 0
+
+    def move(self, dx: int, dy: int):
+        with self._lock:
+            self.requested_count += 1
+            if dx:
+                self._pending.append((ecodes.EV_REL, ecodes.REL_X, dx))
+            if dy:
+                self._pending.append((ecodes.EV_REL, ecodes.REL_Y, dy))
+
+    def move_to(self, x: int, y: int):
+        # 虚拟相对设备无法得知光标位置，绝对移动需要 XTestOutputBackend
+        logging.warning(f"uinput 输出后端不支持绝对移动，已忽略移动到 ({x}, {y}) 的请求")
+
+    def press(self, button: str):
+        self._button(button, 1)
+
+    def release(self, button: str):
+        self._button(button, 0)
+
+    def wheel(self, distance: int):
+        if distance == 0:
+            return
+        with self._lock:
+            self.requested_count += 1
+            self._wheel_remainder = self._queue_wheel(
+                ecodes.REL_WHEEL, ecodes.REL_WHEEL_HI_RES, distance, self._wheel_remainder)
+
+    def hwheel(self, distance: int):
+        if distance == 0:
+            return
+        with self._lock:
+            self.requested_count += 1
+            self._hwheel_remainder = self._queue_wheel(
+                ecodes.REL_HWHEEL, ecodes.REL_HWHEEL_HI_RES, distance, self._hwheel_remainder)
+
+    def flush(self):
+        with self._lock:
+            self._flush_locked()
+
+    def close(self):
+        """销毁虚拟设备。"""
+        self._device.close()
+
+    def get_stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                'requested': self.requested_count,
+                'syscalls': self.syscall_count,
+                'saved_syscalls': self.requested_count - self.syscall_count,
+            }
+
+    def _button(self, button: str, value: int):
+        with self._lock:
+            self.requested_count += 1
+            self._pending.append((ecodes.EV_KEY, _UINPUT_BUTTONS[button], value))
+            self._flush_locked()
+
+    def _queue_wheel(self, code: int, hi_res_code: int, distance: int, remainder: int) -> int:
+        self._pending.append((ecodes.EV_REL, hi_res_code, distance))
+        remainder += distance
+        notches = int(remainder / WHEEL_DELTA)
+        if notches:
+            self._pending.append((ecodes.EV_REL, code, notches))
+            remainder -= notches * WHEEL_DELTA
+        return remainder
+
+    def _flush_locked(self):
+        if not self._pending:
+            return
+        now = time.time()
+        sec = int(now)
+        usec = int((now - sec) * 1_000_000)
+        pack = _INPUT_EVENT.pack
+        data = b''.join(pack(sec, usec, etype, code, value) for etype, code, value in self._pending)
+        data += pack(sec, usec, ecodes.EV_SYN, ecodes.SYN_REPORT, 0)
+        os.write(self._fd, data)
+        self.syscall_count += 1
+        self._pending.clear()
+
+
+class XTestOutputBackend(OutputBackend):
+    """
+    基于 X11 XTest 扩展的输出后端。
+
+    XTest 请求在 Xlib 的发送缓冲区中排队，flush() 时一次性写入 X 连接。
+    """
+
+    def __init__(self, display_name: str = None):
+        if xdisplay is None:
+            raise RuntimeError("XTest 输出后端需要 python-xlib，请先安装: pip install python-xlib")
+        self._display = xdisplay.Display(display_name)
+        if not self._display.has_extension('XTEST'):
+            raise RuntimeError("X 服务器不支持 XTEST 扩展")
+        self._root = self._display.screen().root
+        self._wheel_remainder = 0
+        self._hwheel_remainder = 0
+        self._lock = threading.Lock()
+
+        self.requested_count = 0
+        self.flush_count = 0
+
+    def move(self, dx: int, dy: int):
+        with self._lock:
+            self.requested_count += 1
+            # detail=True 表示相对移动
+            xtest.fake_input(self._display, X.MotionNotify, detail=True, x=dx, y=dy)
+
+    def move_to(self, x: int, y: int):
+        with self._lock:
+            self.requested_count += 1
+            xtest.fake_input(self._display, X.MotionNotify, detail=False, root=self._root, x=x, y=y)
+
+    def position(self) -> Tuple[int, int]:
+        """获取光标位置，包括尚未提交的移动。"""
+        with self._lock:
+            # 先提交已排队的移动，读取到的位置才包含它们
+            self._display.flush()
+            pointer = self._root.query_pointer()
+            return pointer.root_x, pointer.root_y
+
+    def press(self, button: str):
+        self._button(X.ButtonPress, _X_BUTTONS[button])
+
+    def release(self, button: str):
+        self._button(X.ButtonRelease, _X_BUTTONS[button])
+
+    def wheel(self, distance: int):
+        if distance == 0:
+            return
+        with self._lock:
+            self.requested_count += 1
+            self._wheel_remainder = self._queue_wheel(
+                _X_WHEEL_UP, _X_WHEEL_DOWN, distance, self._wheel_remainder)
+
+    def hwheel(self, distance: int):
+        if distance == 0:
+            return
+        with self._lock:
+            self.requested_count += 1
+            self._hwheel_remainder = self._queue_wheel(
+                _X_WHEEL_RIGHT, _X_WHEEL_LEFT, distance, self._hwheel_remainder)
+
+    def flush(self):
+        with self._lock:
+            self._display.flush()
+            self.flush_count += 1
+
+    def get_stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                'requested': self.requested_count,
+                'flushes': self.flush_count,
+            }
+
+    def _button(self, event_type: int, button: int):
+        with self._lock:
+            self.requested_count += 1
+            xtest.fake_input(self._display, event_type, button)
+            self._display.flush()
+
+    def _queue_wheel(self, positive_button: int, negative_button: int,
+                     distance: int, remainder: int) -> int:
+        # X11 没有像素级滚轮，累积满一格才发送一次按钮点击
+        remainder += distance
+        notches = int(remainder / WHEEL_DELTA)
+        if notches:
+            button = positive_button if notches > 0 else negative_button
+            for _ in range(abs(notches)):
+                xtest.fake_input(self._display, X.ButtonPress, button)
+                xtest.fake_input(self._display, X.ButtonRelease, button)
+            remainder -= notches * WHEEL_DELTA
+        return remainder
+
+
+def create_linux_backend() -> OutputBackend:
+    """
+    创建适合当前会话的 Linux 输出后端。
+
+    X11 会话（设置了 DISPLAY 且不是 Wayland）且安装了 python-xlib 时使用 XTest，
+    否则使用 uinput。
+
+    Raises:
+        RuntimeError: 两种后端都不可用时抛出
+    """
+    is_x11 = bool(os.environ.get('DISPLAY')) and os.environ.get('XDG_SESSION_TYPE') != 'wayland'
+    if is_x11 and xdisplay is not None:
+        return XTestOutputBackend()
+    return UinputOutputBackend()
+
+
+# evdev 按键名 -> Windows 虚拟键码，未列出的按键不交给处理函数，直接转发
+_EVDEV_KEY_TO_VK_NAMES = {
+    **{f'KEY_{chr(c)}': c for c in range(ord('A'), ord('Z') + 1)},
+    **{f'KEY_{d}': ord(str(d)) for d in range(10)},
+    **{f'KEY_F{n}': 0x70 + n - 1 for n in range(1, 13)},
+    'KEY_BACKSPACE': 0x08, 'KEY_TAB': 0x09, 'KEY_ENTER': 0x0D, 'KEY_PAUSE': 0x13,
+    'KEY_CAPSLOCK': 0x14, 'KEY_ESC': 0x1B, 'KEY_SPACE': 0x20,
+    'KEY_PAGEUP': 0x21, 'KEY_PAGEDOWN': 0x22, 'KEY_END': 0x23, 'KEY_HOME': 0x24,
+    'KEY_LEFT': 0x25, 'KEY_UP': 0x26, 'KEY_RIGHT': 0x27, 'KEY_DOWN': 0x28,
+    'KEY_SYSRQ': 0x2C, 'KEY_INSERT': 0x2D, 'KEY_DELETE': 0x2E,
+    'KEY_LEFTMETA': 0x5B, 'KEY_RIGHTMETA': 0x5C, 'KEY_COMPOSE': 0x5D,
+    'KEY_NUMLOCK': 0x90, 'KEY_SCROLLLOCK': 0x91,
+    'KEY_LEFTSHIFT': 0xA0, 'KEY_RIGHTSHIFT': 0xA1, 'KEY_LEFTCTRL': 0xA2,
+    'KEY_RIGHTCTRL': 0xA3, 'KEY_LEFTALT': 0xA4, 'KEY_RIGHTALT': 0xA5,
+    'KEY_SEMICOLON': 0xBA, 'KEY_EQUAL': 0xBB, 'KEY_COMMA': 0xBC, 'KEY_MINUS': 0xBD,
+    'KEY_DOT': 0xBE, 'KEY_SLASH': 0xBF, 'KEY_GRAVE': 0xC0, 'KEY_LEFTBRACE': 0xDB,
+    'KEY_BACKSLASH': 0xDC, 'KEY_RIGHTBRACE': 0xDD, 'KEY_APOSTROPHE': 0xDE,
+}
+
+
+class EvdevSource(InputSource):
+    """
+    基于 evdev 键盘设备的按键输入源。
+
+    读取线程独占抓取所有键盘设备，把按键事件归一化为 KeyEvent 交给处理函数；
+    处理函数不拦截的事件（以及无法映射的按键）写入一个虚拟键盘，其他程序照常收到。
+    evdev 直接提供自动重复标志（value == 2）。
+    """
+
+    def __init__(self, device_paths: Optional[Sequence[str]] = None, grab: bool = True):
+        """
+        Args:
+            device_paths: 要读取的设备路径，默认自动选择所有带字母键的设备
+            grab: 是否独占抓取设备；不抓取时无法拦截按键，只能观察
+        """
+        if evdev is None:
+            raise RuntimeError("evdev 输入源需要 python-evdev，请先安装: pip install evdev")
+        if device_paths is None:
+            device_paths = [path for path in evdev.list_devices()
+                            if ecodes.KEY_A in evdev.InputDevice(path).capabilities().get(ecodes.EV_KEY, [])]
+        self._devices = [evdev.InputDevice(path) for path in device_paths]
+        if not self._devices:
+            raise RuntimeError("没有找到可读取的键盘设备")
+        self.grab = grab
+        self._key_to_vk = {ecodes.ecodes[name]: vk for name, vk in _EVDEV_KEY_TO_VK_NAMES.items()
+                           if name in ecodes.ecodes}
+        self._passthrough = None
+        self._handler: Optional[KeyEventHandler] = None
+        self._thread: Optional[threading.Thread] = None
+        # 用于唤醒读取线程的自管道，停止时不必等待下一次按键
+        self._wake_read, self._wake_write = os.pipe()
+
+    def start(self, handler: KeyEventHandler):
+        self._handler = handler
+        if self.grab:
+            self._passthrough = evdev.UInput.from_device(*self._devices, name='KeyMouse passthrough keyboard')
+            for device in self._devices:
+                device.grab()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        os.write(self._wake_write, b'\0')
+
+    def is_alive(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def join(self, timeout: Optional[float] = None):
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(self):
+        devices = {device.fd: device for device in self._devices}
+        key_to_vk = self._key_to_vk
+        handler = self._handler
+        passthrough = self._passthrough
+        try:
+            while True:
+                ready, _, _ = select.select([self._wake_read, *devices], [], [])
+                if self._wake_read in ready:
+                    break
+                for fd in ready:
+                    for raw in devices[fd].read():
+                        if raw.type != ecodes.EV_KEY:
+                            continue
+                        vk = key_to_vk.get(raw.code)
+                        suppress = False
+                        if vk is not None:
+                            event = KeyEvent(vk, raw.value != 0, raw.value == 2, time.perf_counter())
+                            try:
+                                suppress = handler(event)
+                            except Exception as e:
+                                # 与 Win32HookSource 一致: 处理函数出错时放行该按键，读取线程继续运行
+                                logging.error(f"处理键盘事件时发生错误: {e}", exc_info=True)
+                        if passthrough is not None and not suppress:
+                            passthrough.write(ecodes.EV_KEY, raw.code, raw.value)
+                            passthrough.syn()
+        except OSError as e:
+            logging.error(f"读取键盘设备失败: {e}", exc_info=True)
+        finally:
+            if self.grab:
+                for device in self._devices:
+                    try:
+                        device.ungrab()
+                    except OSError:
+                        pass
+            if passthrough is not None:
+                passthrough.close()
@@ -6,15 +6,11 @@
     python main.py [--gui]
 
 属性:
-    region_selector_process: 区域选择器子进程
-    keyboard_listener: 键盘监听器实例
+    keyboard_listener: 按键输入源实例
 """
 
-import pynput
 import time
 import threading
-import win32con
-import win32api
 import modeswitch
 import config_loader
 import os
@@ -22,18 +18,23 @@ import sys
 import argparse
 import traceback
 import ctypes
-import subprocess
 import logging
-import json
-import tempfile
 import queue
-from typing import Optional, Set, Dict, Tuple
+from functools import partial
+from types import MappingProxyType
+from typing import Callable, Mapping, Optional, Set, Dict, Tuple
 
-from utool import KEY_TO_VK
+from utool import MODIFIER_BITS_BY_VK, VK_CAPITAL, VK_LSHIFT
 from scroll_controller import ScrollController
-from win_platform import WinPlatformScroller
-from gui import run_gui
-from tray_icon import TrayIcon
+from output_backend import OutputBackend
+from input_source import InputSource, KeyEvent
+from win_platform import Win32HookSource, Win32OutputBackend
+from linux_platform import EvdevSource, create_linux_backend
+from precision_timer import PrecisionTimer
+from event_ring import EventRing, EVENT_ACTION
+from binding_engine import BindingMatcher
+from tick_governor import TickGovernor, TickTier
+from region_selector_host import InProcessRegionSelector, RegionSelectorHost
 from modeswitch import AppMode
 
 try:
@@ -56,59 +57,110 @@ def is_admin() -> bool:
     except:
         return False
 
-region_selector_process: Optional[subprocess.Popen] = None
+def create_output_backend() -> OutputBackend:
+    """按当前平台创建鼠标输出后端: Windows 使用 SendInput，其他平台见 create_linux_backend"""
+    if sys.platform == 'win32':
+        return Win32OutputBackend()
+    return create_linux_backend()
+
+def create_input_source(passthrough_mask: bytearray,
+                        idle_hotkey: Optional[Tuple[int, int]] = None) -> InputSource:
+    """按当前平台创建按键输入源
+
+    Args:
+        passthrough_mask: 直通掩码，Windows 键盘钩子据此直接放行按键
+        idle_hotkey: 空闲状态下注册的系统热键 (修饰键, 虚拟键码)，只有 Windows 支持
+    """
+    if sys.platform == 'win32':
+        return Win32HookSource(passthrough_mask, idle_hotkey)
+    return EvdevSource()
+
+# 工作线程单帧允许的最大时长（秒）
+MAX_FRAME_DELTA = 0.1
+# suppressed_held 中的标记: 按下事件已交给进程内区域选择器
+_HELD_BY_REGION_SELECT = 2
 
 class MouseActionManager:
     """鼠标动作管理器,处理所有鼠标相关操作"""
     
-    def __init__(self, mouse_controller, mode_switch, mouse_state, config, active_direction_keys, action_queue):
-        self.mouse_controller = mouse_controller
+    def __init__(self, mode_switch, mouse_state, config, active_direction_keys, action_queue,
+                 output: OutputBackend):
+        # 一帧内的移动、按键和滚轮事件都写入输出后端的同一个批次，帧末统一提交
+        self.output = output
         self.mouse_state = mouse_state
         self.config = config
         self.mode_switch = mode_switch
         self.active_direction_keys = active_direction_keys
         self.action_queue = action_queue
-        platform_scroller = WinPlatformScroller()
-        self.scroll_controller = ScrollController(config, platform_scroller)
+        self.scroll_controller = ScrollController(config, output)
+        # 光标位移的小数部分（像素），在帧之间累积以免慢速移动丢失精度
+        self.move_accumulator_x = 0.0
+        self.move_accumulator_y = 0.0
+        # 工作线程按绝对截止时间调度，自旋余量由配置给出上限
+        self.tick_timer = PrecisionTimer(config.TIMER_SPIN_MARGIN)
+        # 按当前活动选择循环间隔，没有输出时让工作线程休眠
+        self.tick_governor = TickGovernor(config)
+        # 工作线程在没有任何运动源时阻塞在此事件上，由按键处理和动作队列唤醒
+        self.wake_event = threading.Event()
+
+    def wake(self) -> None:
+        """唤醒鼠标移动工作线程"""
+        self.wake_event.set()
+
+    def _has_pending_work(self) -> bool:
+        """是否有待处理的一次性动作（队列命令、尚未按下的粘滞左键）"""
+        sticky_pending = (self.mode_switch.is_mouse_control_mode() and
+                          self.mouse_state.sticky_left_click_active and
+                          not self.mouse_state.is_left_mouse_button_held_by_keyboard)
+        return sticky_pending or not self.action_queue.empty()
+
+    def _select_tick_tier(self) -> TickTier:
+        """根据当前的运动源为工作线程选择帧率档位"""
+        moving = self.mode_switch.is_mouse_control_mode() and bool(self.active_direction_keys)
+        return self.tick_governor.select(
+            moving,
+            self.scroll_controller.is_wheeling(),
+            self._has_pending_work()
+        )
 
     def handle_left_button_event(self, is_key_down: bool) -> None:
         """处理左键按下/释放事件"""
         if is_key_down:
             if not self.mouse_state.is_left_mouse_button_held_by_keyboard:
-                self.mouse_controller.press(pynput.mouse.Button.left)
+                self.output.press('left')
                 self.mouse_state.is_left_mouse_button_held_by_keyboard = True
         else:
             if self.mouse_state.is_left_mouse_button_held_by_keyboard:
-                self.mouse_controller.release(pynput.mouse.Button.left)
+                self.output.release('left')
                 self.mouse_state.is_left_mouse_button_held_by_keyboard = False
 
     def handle_right_button_event(self, is_key_down: bool) -> None:
         """处理右键按下/释放事件"""
         if is_key_down:
             if not self.mouse_state.is_right_mouse_button_held_by_keyboard:
-                self.mouse_controller.press(pynput.mouse.Button.right)
+                self.output.press('right')
                 self.mouse_state.is_right_mouse_button_held_by_keyboard = True
         else:
             if self.mouse_state.is_right_mouse_button_held_by_keyboard:
-                self.mouse_controller.release(pynput.mouse.Button.right)
+                self.output.release('right')
                 self.mouse_state.is_right_mouse_button_held_by_keyboard = False
 
     def handle_middle_button_event(self, is_key_down: bool) -> None:
         """处理中键按下/释放事件"""
         if is_key_down:
             if not self.mouse_state.is_middle_mouse_button_held_by_keyboard:
-                self.mouse_controller.press(pynput.mouse.Button.middle)
+                self.output.press('middle')
                 self.mouse_state.is_middle_mouse_button_held_by_keyboard = True
         else:
             if self.mouse_state.is_middle_mouse_button_held_by_keyboard:
-                self.mouse_controller.release(pynput.mouse.Button.middle)
+                self.output.release('middle')
                 self.mouse_state.is_middle_mouse_button_held_by_keyboard = False
 
     def release_sticky_click(self) -> None:
         """释放粘滞点击状态"""
         if self.mouse_state.sticky_left_click_active:
             if self.mouse_state.is_left_mouse_button_held_by_keyboard:
-                self.mouse_controller.release(pynput.mouse.Button.left)
+                self.output.release('left')
                 self.mouse_state.is_left_mouse_button_held_by_keyboard = False
             self.mouse_state.sticky_left_click_active = False
 
@@ -128,240 +180,378 @@ class MouseActionManager:
         """停止向上滚动"""
         self.scroll_controller.stop_scroll_up()
 
+    def start_scrolling_left(self) -> None:
+        """开始向左滚动"""
+        self.scroll_controller.start_scroll_left()
+
+    def stop_scrolling_left(self) -> None:
+        """停止向左滚动"""
+        self.scroll_controller.stop_scroll_left()
+
+    def start_scrolling_right(self) -> None:
+        """开始向右滚动"""
+        self.scroll_controller.start_scroll_right()
+
+    def stop_scrolling_right(self) -> None:
+        """停止向右滚动"""
+        self.scroll_controller.stop_scroll_right()
+
     def process_action_queue(self) -> None:
         """处理动作队列中的命令"""
         try:
             while not self.action_queue.empty():
                 action, data = self.action_queue.get_nowait()
                 if action == 'move_mouse_to':
-                    self.mouse_controller.position = data
+                    self.output.move_to(*data)
         except queue.Empty:
             pass
 
     def mouse_movement_worker(self, stop_event: threading.Event) -> None:
         """鼠标移动工作线程"""
         last_time = time.perf_counter()
+        deadline = last_time
         
         while not stop_event.is_set():
-            self.process_action_queue()
+            # 先清除信号再读取状态: 之后到达的唤醒会打断本帧末尾的等待或休眠，不会丢失
+            self.wake_event.clear()
+            tier = self._select_tick_tier()
+            if tier is TickTier.PARKED:
+                # 休眠前让滚动控制器复位计时状态
+                self.scroll_controller.update(0.0)
+                logging.debug(f"移动线程进入休眠，定时统计: {self.tick_timer.get_stats()}，"
+                              f"档位统计: {self.tick_governor.get_stats()}，"
+                              f"输出后端统计: {self.output.get_stats()}")
+                self.wake_event.wait()
+                if stop_event.is_set():
+                    break
+                # 休眠期间用户可能用物理鼠标移动过光标，影子光标需要重新同步
+                self.output.invalidate_position()
+                last_time = time.perf_counter()
+                deadline = last_time
+                continue
+
+            try:
+                self.process_action_queue()
+            except Exception as e:
+                # 单条命令出错不能结束移动线程
+                logging.error(f"处理动作队列时发生错误: {e}", exc_info=True)
             
             current_time = time.perf_counter()
-            delta = current_time - last_time
+            # 限制单帧时长，避免线程被长时间挂起后光标一次跳出很远
+            delta = min(current_time - last_time, MAX_FRAME_DELTA)
             last_time = current_time
             
             self.scroll_controller.update(delta)
-            dx, dy = 0, 0
             cfg = self.config
-            move_speed = cfg.MOUSE_MOVE_SPEED
             
-            if self.mode_switch.is_mouse_control_mode():
+            if not self.mode_switch.is_mouse_control_mode():
+                self.move_accumulator_x = self.move_accumulator_y = 0.0
+            else:
                 if (self.mouse_state.sticky_left_click_active and 
                     not self.mouse_state.is_left_mouse_button_held_by_keyboard):
-                    self.mouse_controller.press(pynput.mouse.Button.left)
+                    self.output.press('left')
                     self.mouse_state.is_left_mouse_button_held_by_keyboard = True
                 
+                dir_x, dir_y = 0, 0
                 if cfg.MOVE_UP_CHAR in self.active_direction_keys:
-                    dy -= move_speed
+                    dir_y -= 1
                 if cfg.MOVE_DOWN_CHAR in self.active_direction_keys:
-                    dy += move_speed
+                    dir_y += 1
                 if cfg.MOVE_LEFT_CHAR in self.active_direction_keys:
-                    dx -= move_speed
+                    dir_x -= 1
                 if cfg.MOVE_RIGHT_CHAR in self.active_direction_keys:
-                    dx += move_speed
-                    
-                speed_multiplier = 1.0
-                if self.mouse_state.mouse_speed_shift_active:
-                    speed_multiplier *= cfg.MOUSE_SPEED_SHIFT
-                if self.mouse_state.mouse_speed_caplock_active:
-                    speed_multiplier *= cfg.MOUSE_SPEED_CAPLOCK
+                    dir_x += 1
                     
-                dx, dy = int(dx * speed_multiplier), int(dy * speed_multiplier)
-                if dx != 0 or dy != 0:
-                    self.mouse_controller.move(dx, dy)
+                if dir_x == 0 and dir_y == 0:
+                    self.move_accumulator_x = self.move_accumulator_y = 0.0
+                else:
+                    velocity = cfg.MOUSE_MOVE_VELOCITY
+                    if self.mouse_state.mouse_speed_shift_active:
+                        velocity *= cfg.MOUSE_SPEED_SHIFT
+                    if self.mouse_state.mouse_speed_caplock_active:
+                        velocity *= cfg.MOUSE_SPEED_CAPLOCK
+                        
+                    # 按实际经过的时间计算位移，小数部分留在累加器中供下一帧使用
+                    distance = velocity * delta
+                    self.move_accumulator_x += dir_x * distance
+                    self.move_accumulator_y += dir_y * distance
+                    dx, dy = int(self.move_accumulator_x), int(self.move_accumulator_y)
+                    self.move_accumulator_x -= dx
+                    self.move_accumulator_y -= dy
+                    if dx != 0 or dy != 0:
+                        self.output.move(dx, dy)
                     
-            time.sleep(cfg.DELAY_PER_STEP)
+            # 本帧产生的所有输入一次性提交
+            self.output.flush()
+            if tier is TickTier.IDLE and not self._has_pending_work():
+                # 一次性动作已在本帧处理完，不按 IDLE 间隔等待，立即重新选择档位（通常随即休眠）
+                deadline = time.perf_counter()
+                continue
+            deadline = self.tick_timer.next_deadline(deadline, self.tick_governor.interval())
+            if self.tick_timer.sleep_until(deadline, self.wake_event) is None:
+                # 新的按键动作打断了等待，立即开始下一帧并重新选择档位
+                deadline = time.perf_counter()
 
 class MouseControl:
     """鼠标控制类,管理所有鼠标相关功能"""
     
-    def __init__(self, config, tray_icon=None):
+    def __init__(self, config, tray_icon=None,
+                 output_factory: Callable[[], OutputBackend] = create_output_backend):
+        """
+        Args:
+            config: 应用配置
+            tray_icon: 托盘图标，可以稍后再设置
+            output_factory: 创建鼠标输出后端的函数，测试中可以传入返回 RecordingBackend 的函数
+        """
         self.config = config
-        self.mouse_controller = pynput.mouse.Controller()
         self.mode_switch = modeswitch.ModeSwitch(self.config, tray_icon)
         self.mouse_state = modeswitch.ControlStateManager()
         self.active_direction_keys: Set[str] = set()
         self.action_queue: queue.Queue = queue.Queue()
         self.mouse_action = MouseActionManager(
-            self.mouse_controller,
             self.mode_switch,
             self.mouse_state,
             self.config,
             self.active_direction_keys,
-            self.action_queue
+            self.action_queue,
+            output_factory()
+        )
+        self.action_handlers = self._build_action_handlers()
+        # 所有按键绑定（单键、组合键、按键序列）都由绑定引擎匹配
+        self.binding_matcher = BindingMatcher(
+            self.config.BINDING_TRIES,
+            self.config.SEQUENCE_TIMEOUT,
+            # 普通模式下序列前缀不能吞掉用户的正常输入
+            suppress_prefix={AppMode.NORMAL: False}
         )
+        # 钩子线程只写入事件记录，由 event_consumer_worker 执行所有副作用
+        self.event_ring = EventRing()
+        # 由钩子自身的按下/释放事件维护的修饰键位掩码（见 utool.MOD_*）
+        self.modifier_state = 0
+        # 按下事件已被拦截、尚未释放的按键，用于直接拦截自动重复的按下事件
+        self.suppressed_held = bytearray(256)
+        self.repeat_collapsed_count = 0
+        # 输入源直通掩码: 为 1 的按键不交给 handle_key_event，由钩子直接放行。
+        # 掩码对象只创建一次，模式切换时原地改写，输入源始终持有同一个引用
+        self.passthrough_masks = self._build_passthrough_masks()
+        self.passthrough_mask = bytearray(self.passthrough_masks[self.mode_switch.current_mode])
+        self.mode_switch.add_mode_listener(self._on_mode_changed)
+        # 常驻的区域选择器（独立进程，或主程序内的 UI 线程），由主程序启动时一起启动
+        refinement = {'depth': self.config.REGION_SELECT_DEPTH,
+                      'min_cell_size': self.config.REGION_SELECT_MIN_CELL_SIZE}
+        if self.config.REGION_SELECT_IN_PROCESS:
+            self.region_selector = InProcessRegionSelector(self.config.REGION_SELECT_LAYOUT,
+                                                           self._on_region_selected, **refinement)
+        else:
+            self.region_selector = RegionSelectorHost(self.config.REGION_SELECT_LAYOUT,
+                                                      self._on_region_selected, **refinement)
 
-    def on_press(self, key) -> Optional[bool]:
-        """处理键盘按下事件"""
-        if self.mode_switch.is_mouse_control_mode():
-            if key == pynput.keyboard.Key.shift_l:
-                self.mouse_state.mouse_speed_shift_active = True
-            elif key == pynput.keyboard.Key.caps_lock:
-                self.mouse_state.mouse_speed_caplock_active = not self.mouse_state.mouse_speed_caplock_active
-                
-        if key == self.config.EXIT_PROGRAM_PYNPUT and self.mode_switch.is_mouse_control_mode():
-            if self.mode_switch.tray_icon:
-                self.mode_switch.tray_icon.on_exit()
-            return False
-            
-    def on_release(self, key) -> None:
-        """处理键盘释放事件"""
-        if key == pynput.keyboard.Key.shift_l:
-            self.mouse_state.mouse_speed_shift_active = False
-
-    def win32_event_filter(self, msg: int, data) -> bool:
-        """Windows消息过滤器"""
-        global keyboard_listener, region_selector_process
-        
-        if not self.mode_switch.keyboard_hook_active:
-            return True
-            
-        is_key_down = (msg == win32con.WM_KEYDOWN or msg == win32con.WM_SYSKEYDOWN)
-        vk = data.vkCode
+    def _build_action_handlers(self) -> Mapping[str, Tuple[Optional[Callable[[], None]], Optional[Callable[[], None]]]]:
+        """将绑定引擎产生的动作名绑定到具体的处理函数
+
+        Returns:
+            只读映射: 动作名 -> (释放处理函数, 按下处理函数)，
+            以 is_key_down 作为下标取出，None 表示该方向无动作
+        """
         cfg = self.config
-        
-        if is_key_down:
-            if (vk == cfg.HOTKEY_TRIGGER_VK and 
-                win32api.GetKeyState(win32con.VK_MENU) < 0):
-                self.mode_switch.toggle_mouse_control_mode()
-                keyboard_listener.suppress_event()
-                return
-                
-            elif (vk == cfg.ENTER_REGION_SELECT_VK and 
-                  self.mode_switch.is_mouse_control_mode()):
-                self._handle_region_select()
-                keyboard_listener.suppress_event()
-                return
-
-        if self.mode_switch.is_mouse_control_mode() and vk in cfg.MOUSE_CONTROL_VKS:
-            self._handle_mouse_control_key(vk, is_key_down)
-            keyboard_listener.suppress_event()
-            
-        return True
+        action = self.mouse_action
+        direction_keys = self.active_direction_keys
+        # 模式切换通过 lambda 延迟查找，托盘图标会替换 toggle_mouse_control_mode
+        handlers = {
+            'toggle_mode': (None, lambda: self.mode_switch.toggle_mouse_control_mode()),
+            'enter_region_select': (None, self._handle_region_select),
+            'exit_program': (None, self._request_exit),
+            'sticky_left_click': (None, self._toggle_sticky_left_click),
+            'left_click': (partial(action.handle_left_button_event, False),
+                           partial(action.handle_left_button_event, True)),
+            'right_click': (partial(action.handle_right_button_event, False),
+                            partial(action.handle_right_button_event, True)),
+            'middle_click': (partial(action.handle_middle_button_event, False),
+                             partial(action.handle_middle_button_event, True)),
+            'scroll_down': (action.stop_scrolling_down, action.start_scrolling_down),
+            'scroll_up': (action.stop_scrolling_up, action.start_scrolling_up),
+            'scroll_left': (action.stop_scrolling_left, action.start_scrolling_left),
+            'scroll_right': (action.stop_scrolling_right, action.start_scrolling_right),
+            'move_up': (partial(direction_keys.discard, cfg.MOVE_UP_CHAR),
+                        partial(direction_keys.add, cfg.MOVE_UP_CHAR)),
+            'move_down': (partial(direction_keys.discard, cfg.MOVE_DOWN_CHAR),
+                          partial(direction_keys.add, cfg.MOVE_DOWN_CHAR)),
+            'move_left': (partial(direction_keys.discard, cfg.MOVE_LEFT_CHAR),
+                          partial(direction_keys.add, cfg.MOVE_LEFT_CHAR)),
+            'move_right': (partial(direction_keys.discard, cfg.MOVE_RIGHT_CHAR),
+                           partial(direction_keys.add, cfg.MOVE_RIGHT_CHAR)),
+        }
+        return MappingProxyType(handlers)
 
-    def _handle_region_select(self) -> None:
-        """处理区域选择功能"""
-        global region_selector_process
-        
-        self.mode_switch.pause_keyboard_hook()
-        try:
-            if region_selector_process and region_selector_process.poll() is None:
-                region_selector_process.terminate()
-            self.mode_switch.set_mode(AppMode.REGION_SELECT)
-            
-            pid = os.getpid()
-            temp_dir = tempfile.gettempdir()
-            layout_file = os.path.join(temp_dir, f"keymouse_layout_{pid}.tmp")
-            coords_file = os.path.join(temp_dir, f"keymouse_coords_{pid}.tmp")
-
-            with open(layout_file, 'w', encoding='utf-8') as f:
-                json.dump(self.config.REGION_SELECT_LAYOUT, f)
-
-            base_path = config_loader.get_base_path()
-            command = []
-            if getattr(sys, 'frozen', False):
-                command = [os.path.join(base_path, "RegionSelector.exe"), 
-                          layout_file, coords_file]
-            else:
-                command = [sys.executable, 
-                          os.path.join(base_path, "region_selector.py"),
-                          layout_file, coords_file]
-
-            startupinfo = subprocess.STARTUPINFO()
-            startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
-            region_selector_process = subprocess.Popen(command, 
-                                                     startupinfo=startupinfo)
-            
-            threading.Thread(target=self.wait_for_region_selector,
-                           args=(layout_file, coords_file),
-                           daemon=True).start()
-                           
-        except Exception as e:
-            logging.error(f"启动区域选择器时发生致命错误: {e}", exc_info=True)
-            self.mode_switch.return_from_region_select()
-            self.mode_switch.resume_keyboard_hook()
+    def _build_passthrough_masks(self) -> Dict[AppMode, bytes]:
+        """为每个模式构建输入源的直通掩码
 
-    def _handle_mouse_control_key(self, vk: int, is_key_down: bool) -> None:
-        """处理鼠标控制按键"""
-        cfg = self.config
-        
-        if vk == cfg.TOGGLE_MODE_INTERNAL_VK and is_key_down:
-            self.mode_switch.toggle_mouse_control_mode()
-        elif vk == cfg.STICKY_LEFT_CLICK_VK and is_key_down:
-            self.mouse_state.sticky_left_click_active = not self.mouse_state.sticky_left_click_active
-            if not self.mouse_state.sticky_left_click_active:
-                self.mouse_action.release_sticky_click()
-        elif vk == cfg.LEFT_CLICK_VK:
-            self.mouse_action.handle_left_button_event(is_key_down)
-        elif vk == cfg.RIGHT_CLICK_VK:
-            self.mouse_action.handle_right_button_event(is_key_down)
-        elif vk == cfg.MIDDLE_CLICK_VK:
-            self.mouse_action.handle_middle_button_event(is_key_down)
-        elif vk == cfg.SCROLL_DOWN_VK:
+        只有普通模式允许直通: 普通模式下既不在绑定中出现、也不是修饰键的按键
+        不可能触发任何动作，钩子可以直接放行。其他模式下所有按键都需要处理。
+        """
+        normal = bytearray(b'\x01' * 256)
+        trie = self.config.BINDING_TRIES.get(AppMode.NORMAL)
+        for vk in (trie.key_codes() if trie is not None else ()):
+            normal[vk] = 0
+        for vk in range(256):
+            if MODIFIER_BITS_BY_VK[vk]:
+                normal[vk] = 0
+        masks = {mode: bytes(256) for mode in AppMode}
+        masks[AppMode.NORMAL] = bytes(normal)
+        return masks
+
+    def _on_mode_changed(self, mode: AppMode) -> None:
+        """模式切换后更新输入源的直通掩码，并结束惯性滚动"""
+        self.passthrough_mask[:] = self.passthrough_masks[mode]
+        self.mouse_action.scroll_controller.cancel_glide()
+
+    def handle_key_event(self, event: KeyEvent) -> bool:
+        """处理输入源送来的按键事件
+
+        运行在输入源（键盘钩子）线程上，只决定是否拦截事件并写入事件记录，
+        不做任何其他工作。
+
+        Returns:
+            bool: 是否拦截该事件
+        """
+        vk = event.vk
+        is_key_down = event.is_down
+        held = self.suppressed_held[vk]
+
+        if is_key_down:
+            # 按住已拦截的按键时系统按键盘重复速率持续发送按下事件，
+            # 工作线程轮询按键状态，这些重复事件不携带任何信息，直接拦截
+            if held and self.mode_switch.keyboard_hook_active:
+                self.repeat_collapsed_count += 1
+                return True
+        else:
+            self.suppressed_held[vk] = 0
+            if held == _HELD_BY_REGION_SELECT:
+                # 按下事件已交给进程内区域选择器，释放事件同样拦截
+                return True
+
+        # 钩子暂停期间也要跟踪修饰键，避免恢复后状态过期
+        modifier_bit = MODIFIER_BITS_BY_VK[vk]
+        if modifier_bit:
             if is_key_down:
-                self.mouse_action.start_scrolling_down()
+                self.modifier_state |= modifier_bit
             else:
-                self.mouse_action.stop_scrolling_down()
-        elif vk == cfg.SCROLL_UP_VK:
+                self.modifier_state &= ~modifier_bit
+
+        # 速度修饰键: 左 Shift 按住时加速，CapsLock 每按一次切换一次
+        if vk == VK_LSHIFT:
+            if not is_key_down:
+                self.mouse_state.mouse_speed_shift_active = False
+            elif self.mode_switch.is_mouse_control_mode():
+                self.mouse_state.mouse_speed_shift_active = True
+        elif vk == VK_CAPITAL and is_key_down and not event.is_repeat:
+            if self.mode_switch.is_mouse_control_mode():
+                self.mouse_state.mouse_speed_caplock_active = not self.mouse_state.mouse_speed_caplock_active
+
+        if self.config.REGION_SELECT_IN_PROCESS and self.mode_switch.current_mode is AppMode.REGION_SELECT:
+            # 进程内区域选择期间，非修饰键都交给选择器，不在布局中的按键取消选择
             if is_key_down:
-                self.mouse_action.start_scrolling_up()
-            else:
-                self.mouse_action.stop_scrolling_up()
-        elif vk in {cfg.MOVE_UP_VK, cfg.MOVE_DOWN_VK,
-                   cfg.MOVE_LEFT_VK, cfg.MOVE_RIGHT_VK}:
-            key_map = {
-                cfg.MOVE_UP_VK: cfg.MOVE_UP_CHAR,
-                cfg.MOVE_DOWN_VK: cfg.MOVE_DOWN_CHAR,
-                cfg.MOVE_LEFT_VK: cfg.MOVE_LEFT_CHAR,
-                cfg.MOVE_RIGHT_VK: cfg.MOVE_RIGHT_CHAR
-            }
-            char_key = key_map.get(vk)
-            if char_key:
-                if is_key_down:
-                    self.active_direction_keys.add(char_key)
-                else:
-                    self.active_direction_keys.discard(char_key)
+                if modifier_bit:
+                    return False
+                self.suppressed_held[vk] = _HELD_BY_REGION_SELECT
+                self.region_selector.feed_key(self.config.REGION_SELECT_KEY_VKS.get(vk))
+                return True
+            # 释放事件仍交给绑定引擎（例如进入区域选择的按键），按下被拦截过的释放同样拦截
+            action, _ = self.binding_matcher.feed(
+                self.mode_switch.current_mode, vk, False,
+                self.modifier_state, event.timestamp
+            )
+            if action is not None:
+                self.event_ring.push((EVENT_ACTION, action, False))
+            return bool(held)
 
-    def wait_for_region_selector(self, layout_file: str, coords_file: str) -> None:
-        """等待区域选择器进程完成"""
-        global region_selector_process
-        if not region_selector_process:
-            return
-            
-        try:
-            region_selector_process.wait()
-            if os.path.exists(coords_file):
-                with open(coords_file, 'r', encoding='utf-8') as f:
-                    content = f.read().strip()
-                if content:
-                    try:
-                        x_str, y_str = content.split(',')
-                        target_x, target_y = float(x_str), float(y_str)
-                        self.action_queue.put(('move_mouse_to', 
-                                             (target_x, target_y)))
-                    except Exception as e:
-                        logging.error(f"解析坐标文件内容失败: {e}")
-        except Exception as e:
-            logging.error(f"等待区域选择器时发生错误: {e}", exc_info=True)
-        finally:
-            for f in [layout_file, coords_file]:
-                if os.path.exists(f):
-                    try:
-                        os.remove(f)
-                    except Exception as e:
-                        logging.error(f"删除临时文件 {f} 失败: {e}")
+        if not self.mode_switch.keyboard_hook_active:
+            # 暂停期间仍把释放事件交给绑定引擎，保证已触发的动作能收到释放
+            if not is_key_down:
+                action, _ = self.binding_matcher.feed(
+                    self.mode_switch.current_mode, vk, False,
+                    self.modifier_state, event.timestamp
+                )
+                if action is not None:
+                    self.event_ring.push((EVENT_ACTION, action, False))
+            return False
+
+        action, suppress = self.binding_matcher.feed(
+            self.mode_switch.current_mode, vk, is_key_down,
+            self.modifier_state, event.timestamp
+        )
+        if action is not None:
+            self.event_ring.push((EVENT_ACTION, action, is_key_down))
+        if suppress and is_key_down:
+            self.suppressed_held[vk] = 1
+        return suppress
+
+    def event_consumer_worker(self, stop_event: threading.Event) -> None:
+        """钩子事件消费线程，执行钩子回调中推迟的所有工作"""
+        ring = self.event_ring
+        while not stop_event.is_set():
+            record = ring.pop()
+            if record is None:
+                ring.wait()
+                continue
+            try:
+                self._process_hook_event(*record)
+            except Exception as e:
+                logging.error(f"处理键盘事件时发生错误: {e}", exc_info=True)
+
+    def _process_hook_event(self, kind: int, action: str, is_key_down: bool) -> None:
+        """处理一条钩子事件记录"""
+        if kind == EVENT_ACTION:
+            handler = self.action_handlers[action][is_key_down]
+            if handler is not None:
+                handler()
+            self.mouse_action.wake()
+
+    def _request_exit(self) -> None:
+        """通过托盘图标执行退出序列"""
+        if self.mode_switch.tray_icon:
+            self.mode_switch.tray_icon.on_exit()
+
+    def get_hook_stats(self) -> Dict[str, int]:
+        """获取钩子事件缓冲区的统计信息以及被直接拦截的自动重复次数"""
+        stats = self.event_ring.get_stats()
+        stats['repeat_collapsed'] = self.repeat_collapsed_count
+        return stats
+
+    def _handle_region_select(self) -> None:
+        """处理区域选择功能: 显示常驻区域选择器的网格
+
+        选择器在独立进程中运行时需要暂停钩子，让按键到达选择器窗口；
+        进程内选择器的按键由钩子直接送入，钩子保持工作。
+        """
+        in_process = self.config.REGION_SELECT_IN_PROCESS
+        if not in_process:
+            self.mode_switch.pause_keyboard_hook()
+        self.mode_switch.set_mode(AppMode.REGION_SELECT)
+        if not self.region_selector.activate():
+            logging.error("区域选择器不可用，已取消区域选择")
             self.mode_switch.return_from_region_select()
+            if not in_process:
+                self.mode_switch.resume_keyboard_hook()
+
+    def _toggle_sticky_left_click(self) -> None:
+        """切换粘滞左键状态"""
+        self.mouse_state.sticky_left_click_active = not self.mouse_state.sticky_left_click_active
+        if not self.mouse_state.sticky_left_click_active:
+            self.mouse_action.release_sticky_click()
+
+    def _on_region_selected(self, coords: Optional[Tuple[float, float]]) -> None:
+        """区域选择结束（在区域选择器宿主的读取线程或进程内选择器的 UI 线程上调用）
+
+        Args:
+            coords: 光标应移动到的屏幕坐标，取消时为 None
+        """
+        if coords is not None:
+            self.action_queue.put(('move_mouse_to', coords))
+            self.mouse_action.wake()
+        self.mode_switch.return_from_region_select()
+        if not self.config.REGION_SELECT_IN_PROCESS:
             self.mode_switch.resume_keyboard_hook()
-            region_selector_process = None
 
 # if __name__ == "__main__": 部分完全不变
 if __name__ == "__main__":
@@ -404,6 +594,10 @@ if __name__ == "__main__":
                           help=argparse.SUPPRESS)
         args = parser.parse_args()
         
+        # 界面模块只在入口处导入，MouseControl 等类可以在没有图形界面依赖的环境中使用
+        from gui import run_gui
+        from tray_icon import TrayIcon
+
         if args.gui:
             try:
                 run_gui()
@@ -432,11 +626,13 @@ if __name__ == "__main__":
             
         mouse_control = MouseControl(config)
         stop_event = threading.Event()
-        keyboard_listener = pynput.keyboard.Listener(
-            on_press=mouse_control.on_press,
-            on_release=mouse_control.on_release,
-            win32_event_filter=mouse_control.win32_event_filter
-        )
+        # 普通模式下只需要监听切换热键，能用系统热键表达时卸载键盘钩子
+        idle_hotkey = None
+        if config.USE_SYSTEM_HOTKEY and config.HOTKEY_REGISTRABLE:
+            idle_hotkey = (config.HOTKEY_OS_MODIFIERS, config.HOTKEY_TRIGGER_VK)
+        keyboard_listener = create_input_source(mouse_control.passthrough_mask, idle_hotkey)
+        mouse_control.mode_switch.add_mode_listener(
+            lambda mode: keyboard_listener.set_idle(mode is AppMode.NORMAL))
         
         tray = None
         try:
@@ -454,8 +650,19 @@ if __name__ == "__main__":
             args=(stop_event,),
             daemon=True
         )
+        event_thread = threading.Thread(
+            target=mouse_control.event_consumer_worker,
+            args=(stop_event,),
+            daemon=True
+        )
         
-        keyboard_listener.start()
+        event_thread.start()
+        try:
+            mouse_control.region_selector.start()
+        except Exception as e:
+            logging.error(f"启动区域选择器失败: {e}", exc_info=True)
+        keyboard_listener.start(mouse_control.handle_key_event)
+        keyboard_listener.set_idle(mouse_control.mode_switch.current_mode is AppMode.NORMAL)
         movement_thread.start()
         
         logging.info("KeyMouse 主程序已启动。")
@@ -463,6 +670,11 @@ if __name__ == "__main__":
         while not stop_event.is_set():
             time.sleep(1)
             
+        logging.info(f"钩子事件统计: {mouse_control.get_hook_stats()}")
+        logging.info(f"输入源统计: {keyboard_listener.get_stats()}")
+        logging.info(f"输出后端统计: {mouse_control.mouse_action.output.get_stats()}")
+        logging.info(f"区域选择器统计: {mouse_control.region_selector.get_stats()}")
+        mouse_control.region_selector.stop()
         logging.info("收到停止事件，程序已安全退出。")
         
     except Exception as e:
@@ -5,7 +5,7 @@
 """
 
 from enum import Enum, auto
-from typing import Optional
+from typing import Callable, List, Optional
 
 
 class AppMode(Enum):
@@ -41,6 +41,16 @@ class ModeSwitch:
         self.previous_mode_before_region_select: AppMode = AppMode.NORMAL
         # --- 核心修复：新增一个状态，用于控制 pynput 钩子是否激活 ---
         self.keyboard_hook_active: bool = True
+        # 模式变化监听器，在模式切换后按注册顺序调用
+        self.mode_listeners: List[Callable[[AppMode], None]] = []
+
+    def add_mode_listener(self, listener: Callable[[AppMode], None]) -> None:
+        """注册模式变化监听器
+
+        Args:
+            listener: 模式切换后调用，参数为新模式
+        """
+        self.mode_listeners.append(listener)
 
     def is_mouse_control_mode(self) -> bool:
         """检查是否处于鼠标控制模式"""
@@ -72,6 +82,9 @@ class ModeSwitch:
         self.current_mode = new_mode
         print(f"模式切换：>>> 进入 {self.current_mode.name} 模式 <<<")
 
+        for listener in self.mode_listeners:
+            listener(new_mode)
+
         if hasattr(self.tray_icon, 'update_icon'):
             self.tray_icon.update_icon()
 
@@ -0,0 +1,173 @@
+"""鼠标输出后端模块
+
+移动、按键和滚轮输出都通过 `OutputBackend` 接口发送，`MouseActionManager` 和
+`ScrollController` 只依赖这个接口，不直接调用任何平台 API。
+
+现有实现:
+    - win_platform.Win32OutputBackend: Windows SendInput，每帧一次调用
+    - linux_platform.UinputOutputBackend / XTestOutputBackend: Linux 虚拟设备或 X11 XTest
+    - RecordingBackend: 只在内存中记录带时间戳的事件，用于测试和基准测试
+
+后端按批次工作: 移动和滚轮只排队，调用方在每帧末尾调用 flush() 统一提交；
+按键事件写入后立即提交，保证与之前排队的事件保持顺序。
+"""
+
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+# 支持的鼠标按键名
+BUTTONS = ('left', 'right', 'middle')
+
+
+class OutputBackend(ABC):
+    """鼠标输出后端的抽象接口"""
+
+    # 是否支持移动到绝对坐标（move_to）。读取光标位置（position）不属于公共接口:
+    # uinput 这样的相对设备无从得知光标位置，能读取的后端各自提供 position() 方法
+    supports_absolute = True
+
+    @abstractmethod
+    def move(self, dx: int, dy: int) -> None:
+        """相对当前位置移动光标（像素）。"""
+
+    @abstractmethod
+    def move_to(self, x: int, y: int) -> None:
+        """把光标移动到屏幕坐标 (x, y)。"""
+
+    @abstractmethod
+    def press(self, button: str) -> None:
+        """按下鼠标按键（'left'、'right' 或 'middle'）并立即提交。"""
+
+    @abstractmethod
+    def release(self, button: str) -> None:
+        """释放鼠标按键并立即提交。"""
+
+    @abstractmethod
+    def wheel(self, distance: int) -> None:
+        """排队一个垂直滚轮事件，单位为 1/120 格（像素级），正数向上。"""
+
+    @abstractmethod
+    def hwheel(self, distance: int) -> None:
+        """排队一个水平滚轮事件，单位为 1/120 格（像素级），正数向右。"""
+
+    @abstractmethod
+    def flush(self) -> None:
+        """提交本批次中排队的所有事件。"""
+
+    def invalidate_position(self) -> None:
+        """丢弃缓存的光标位置，下一次移动前重新读取。没有缓存的后端无需实现。"""
+
+    def get_stats(self) -> Dict[str, int]:
+        """获取后端的统计信息。"""
+        return {}
+
+
+class OutputEvent(NamedTuple):
+    """RecordingBackend 记录的一个输出事件"""
+    timestamp: float
+    kind: str    # 'move'、'move_to'、'press'、'release'、'wheel' 或 'hwheel'
+    x: int       # move 为 dx，move_to 为 x，滚轮为距离，按键为 0
+    y: int       # move 为 dy，move_to 为 y，其他为 0
+    button: Optional[str] = None
+
+
+class RecordingBackend(OutputBackend):
+    """
+    只在内存中记录事件的输出后端。
+
+    每个事件在写入时记录时间戳，flush() 时移入 events 并在 batches 中记录本批次的事件数，
+    同时维护一个虚拟的光标位置，便于在任何平台上运行和验证移动、滚动逻辑。
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.perf_counter,
+                 start_position: Tuple[int, int] = (0, 0)) -> None:
+        """
+        Args:
+            clock: 时间戳来源，默认 time.perf_counter
+            start_position: 虚拟光标的初始位置
+        """
+        self.clock = clock
+        self.events: List[OutputEvent] = []
+        self.batches: List[int] = []
+        self._pending: List[OutputEvent] = []
+        self._position = start_position
+        self._lock = threading.Lock()
+
+    def move(self, dx: int, dy: int) -> None:
+        with self._lock:
+            x, y = self._position
+            self._position = (x + dx, y + dy)
+            self._pending.append(OutputEvent(self.clock(), 'move', dx, dy))
+
+    def move_to(self, x: int, y: int) -> None:
+        with self._lock:
+            self._position = (x, y)
+            self._pending.append(OutputEvent(self.clock(), 'move_to', x, y))
+
+    def position(self) -> Tuple[int, int]:
+        """获取虚拟光标位置，包括尚未提交的移动。"""
+        with self._lock:
+            return self._position
+
+    def press(self, button: str) -> None:
+        self._button('press', button)
+
+    def release(self, button: str) -> None:
+        self._button('release', button)
+
+    def wheel(self, distance: int) -> None:
+        if distance == 0:
+            return
+        with self._lock:
+            self._pending.append(OutputEvent(self.clock(), 'wheel', distance, 0))
+
+    def hwheel(self, distance: int) -> None:
+        if distance == 0:
+            return
+        with self._lock:
+            self._pending.append(OutputEvent(self.clock(), 'hwheel', distance, 0))
+
+    def flush(self) -> None:
+        with self._lock:
+            self._flush_locked()
+
+    def clear(self) -> None:
+        """清空已记录的事件和批次。"""
+        with self._lock:
+            self.events.clear()
+            self.batches.clear()
+            self._pending.clear()
+
+    def total(self, kind: str) -> Tuple[int, int]:
+        """按事件种类累加已提交事件的 (x, y)，例如滚动的总距离。"""
+        with self._lock:
+            total_x = total_y = 0
+            for event in self.events:
+                if event.kind == kind:
+                    total_x += event.x
+                    total_y += event.y
+            return total_x, total_y
+
+    def get_stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                'events': len(self.events),
+                'batches': len(self.batches),
+                'pending': len(self._pending),
+            }
+
+    def _button(self, kind: str, button: str) -> None:
+        if button not in BUTTONS:
+            raise ValueError(f"未知的鼠标按键: {button}")
+        with self._lock:
+            self._pending.append(OutputEvent(self.clock(), kind, 0, 0, button))
+            self._flush_locked()
+
+    def _flush_locked(self) -> None:
+        if not self._pending:
+            return
+        self.events.extend(self._pending)
+        self.batches.append(len(self._pending))
+        self._pending.clear()
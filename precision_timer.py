@@ -0,0 +1,154 @@
+"""高精度定时器模块
+
+为鼠标移动工作线程提供按绝对截止时间调度的定时器。
+每次等待先用 time.sleep 睡到截止时间前的一小段余量，再自旋到截止时间，
+并根据实际观测到的睡眠超时自动校准这段余量。
+传入唤醒事件时，睡眠阶段改为等待该事件，事件被设置后立即返回。
+
+典型用法:
+    timer = PrecisionTimer(max_spin_margin=0.002)
+    deadline = time.perf_counter()
+    while running:
+        do_work()
+        deadline = timer.next_deadline(deadline, 0.01)
+        timer.sleep_until(deadline)
+"""
+
+import math
+import threading
+import time
+from typing import Dict, Optional
+
+
+class PrecisionTimer:
+    """混合睡眠/自旋的截止时间定时器，带自校准和抖动统计。"""
+
+    def __init__(self, max_spin_margin: float = 0.002,
+                 min_spin_margin: float = 0.0002,
+                 calibration_rate: float = 0.05) -> None:
+        """初始化定时器。
+
+        Args:
+            max_spin_margin: 自旋阶段的最大时长（秒），也是初始余量
+            min_spin_margin: 自旋阶段的最小时长（秒）
+            calibration_rate: 超时统计的指数平滑系数，越大校准越快
+        """
+        self.max_spin_margin = max(max_spin_margin, 0.0)
+        self.min_spin_margin = min(min_spin_margin, self.max_spin_margin)
+        self.calibration_rate = calibration_rate
+        self.spin_margin = self.max_spin_margin
+
+        # 睡眠阶段超时的平滑均值与平均偏差，用于推算所需余量
+        self._overshoot_avg = 0.0
+        self._overshoot_dev = 0.0
+
+        # 抖动统计（Welford 在线算法）
+        self.tick_count = 0
+        self.late_ticks = 0
+        self.resync_count = 0
+        self.interrupted_count = 0
+        self.max_jitter = 0.0
+        self._jitter_mean = 0.0
+        self._jitter_m2 = 0.0
+
+    def next_deadline(self, deadline: float, interval: float) -> float:
+        """计算下一个绝对截止时间。
+
+        按上一个截止时间累加间隔，误差不会逐帧累积；
+        若已落后超过一个完整间隔，则以当前时间为基准重新对齐，不补发错过的帧。
+
+        Args:
+            deadline: 上一个截止时间（time.perf_counter 时间基准）
+            interval: 帧间隔（秒）
+
+        Returns:
+            float: 下一个截止时间
+        """
+        next_deadline = deadline + interval
+        now = time.perf_counter()
+        if next_deadline < now - interval:
+            self.resync_count += 1
+            next_deadline = now + interval
+        return next_deadline
+
+    def sleep_until(self, deadline: float,
+                    wake_event: Optional[threading.Event] = None) -> Optional[float]:
+        """等待到指定的绝对截止时间。
+
+        Args:
+            deadline: 截止时间（time.perf_counter 时间基准）
+            wake_event: 可选的唤醒事件，等待期间被设置时提前返回（不清除事件）
+
+        Returns:
+            Optional[float]: 本次唤醒相对截止时间的偏差（秒），正数表示迟到；
+            被 wake_event 提前唤醒时返回 None，不计入抖动统计
+        """
+        sleep_target = deadline - self.spin_margin
+        now = time.perf_counter()
+        if sleep_target > now:
+            if wake_event is None:
+                time.sleep(sleep_target - now)
+            elif wake_event.wait(sleep_target - now):
+                self.interrupted_count += 1
+                return None
+            self._calibrate(time.perf_counter() - sleep_target)
+
+        # 自旋阶段使用 sleep(0) 让出 GIL，避免拖慢键盘钩子线程
+        while time.perf_counter() < deadline:
+            if wake_event is not None and wake_event.is_set():
+                self.interrupted_count += 1
+                return None
+            time.sleep(0)
+
+        jitter = time.perf_counter() - deadline
+        self._record(jitter)
+        return jitter
+
+    def _calibrate(self, overshoot: float) -> None:
+        """根据睡眠阶段的超时调整自旋余量。"""
+        rate = self.calibration_rate
+        self._overshoot_avg += rate * (overshoot - self._overshoot_avg)
+        self._overshoot_dev += rate * (abs(overshoot - self._overshoot_avg) - self._overshoot_dev)
+        margin = self._overshoot_avg + 2 * self._overshoot_dev
+        self.spin_margin = min(self.max_spin_margin, max(self.min_spin_margin, margin))
+
+    def _record(self, jitter: float) -> None:
+        """记录一次唤醒的抖动。"""
+        self.tick_count += 1
+        delta = jitter - self._jitter_mean
+        self._jitter_mean += delta / self.tick_count
+        self._jitter_m2 += delta * (jitter - self._jitter_mean)
+        if jitter > self.max_jitter:
+            self.max_jitter = jitter
+        # 迟到超过自旋余量上限，说明睡眠阶段已经越过了截止时间
+        if jitter > self.max_spin_margin:
+            self.late_ticks += 1
+
+    def get_stats(self) -> Dict[str, float]:
+        """获取抖动统计信息。
+
+        Returns:
+            Dict[str, float]: 包含帧数、平均/标准差/最大抖动（秒）、
+            迟到帧数、重新对齐次数、被提前唤醒的次数以及当前自旋余量
+        """
+        variance = self._jitter_m2 / self.tick_count if self.tick_count > 1 else 0.0
+        return {
+            'ticks': self.tick_count,
+            'mean_jitter': self._jitter_mean,
+            'stddev_jitter': math.sqrt(variance),
+            'max_jitter': self.max_jitter,
+            'late_ticks': self.late_ticks,
+            'resyncs': self.resync_count,
+            'interrupted': self.interrupted_count,
+            'spin_margin': self.spin_margin,
+        }
+
+    def reset_stats(self) -> None:
+        """清空抖动统计，保留校准结果。"""
+        self.tick_count = 0
+        self.late_ticks = 0
+        self.resync_count = 0
+        self.interrupted_count = 0
+        self.max_jitter = 0.0
+        self._jitter_mean = 0.0
+        self._jitter_m2 = 0.0
@@ -7,14 +7,27 @@
     coords_file = "coords.txt"   # 指定坐标输出文件
     selector = RegionSelector(layout_data, coords_file)
     selector.mainloop()
+
+常驻模式 (region_selector.py --resident):
+    由 region_selector_host.RegionSelectorHost 启动，从 stdin 收到布局后初始化并隐藏等待，
+    每收到一条 activate 消息就显示一次网格，结果写到 stdout，协议见 selector_protocol。
+
+进程内模式:
+    由 region_selector_host.InProcessRegionSelector 在主程序的专用 UI 线程上创建，
+    按键由主程序的键盘钩子通过 handle_key 送入，消息通过 listener 回调直接交回。
 """
 
 import tkinter as tk
+import tkinter.font as tkfont
 import sys
 import json
 import os
+import threading
 import traceback
-from typing import Dict, Set, List
+from typing import Callable, Dict, Optional, List, Tuple
+
+from selector_protocol import (MSG_ACTIVATE, MSG_CANCEL, MSG_LAYOUT, MSG_READY, MSG_RESULT,
+                               MSG_SHOWN, Message, ProtocolError, read_message, write_message)
 
 def log_to_file(message: str) -> None:
     """记录日志到文件。
@@ -30,33 +43,167 @@ def log_to_file(message: str) -> None:
     except Exception:
         pass
 
+# 网格配色。文字颜色与窗口的透明色相同，标签显示为镂空的字母
+CELL_BG_COLOR = "#333333"
+GRID_LINE_COLOR = "#FFD700"
+LABEL_PLATE_COLOR = "#FFD700"
+LABEL_TEXT_COLOR = "black"
+
+# 默认的选择级数（按键次数）
+DEFAULT_DEPTH = 2
+# 按最小格子尺寸自动确定级数时的上限
+MAX_DEPTH = 8
+
+Bounds = Tuple[float, float, float, float]
+
+
+def layout_index(layout: List[List[str]]) -> Dict[str, Tuple[int, int]]:
+    """布局键名 -> (行, 列)；同一个键出现多次时以第一次出现的位置为准"""
+    index: Dict[str, Tuple[int, int]] = {}
+    for row_index, row in enumerate(layout):
+        for col_index, key in enumerate(row):
+            index.setdefault(key, (row_index, col_index))
+    return index
+
+
+def cell_bounds(bounds: Bounds, rows: int, columns: int, row: int, col: int) -> Bounds:
+    """把 bounds 等分为 rows x columns 的网格，返回第 row 行第 col 列格子的边界"""
+    x1, y1, x2, y2 = bounds
+    cell_width = (x2 - x1) / columns
+    cell_height = (y2 - y1) / rows
+    cell_x1 = x1 + col * cell_width
+    cell_y1 = y1 + row * cell_height
+    return (cell_x1, cell_y1, cell_x1 + cell_width, cell_y1 + cell_height)
+
+
+def selection_depth(width: float, height: float, rows: int, columns: int,
+                    depth: int = DEFAULT_DEPTH, min_cell_size: float = 0) -> int:
+    """
+    一次选择需要的级数。
+
+    min_cell_size 为 0 时固定为 depth；大于 0 时忽略 depth，一直细分到最后选中的格子
+    宽高都小于 min_cell_size 像素为止（最多 MAX_DEPTH 级）。
+    """
+    if min_cell_size <= 0:
+        return max(1, depth)
+    levels = 1
+    while levels < MAX_DEPTH and (width / columns ** levels >= min_cell_size
+                                  or height / rows ** levels >= min_cell_size):
+        levels += 1
+    return levels
+
+
+class GridRenderer:
+    """以保留模式在画布上绘制区域选择网格。
+
+    每个格子的图元（格子矩形、标签底板、标签文字）只在设置布局时创建一次，
+    之后每一级选择只用 coords() 移动和缩放。所有标签共用一个命名字体，
+    字号变化时只需修改字体本身，不必逐个修改文字图元。
+    """
+
+    def __init__(self, canvas: tk.Canvas, layout: List[List[str]]) -> None:
+        self.canvas = canvas
+        self.font = tkfont.Font(root=canvas, family="Consolas", size=8, weight="bold")
+        self._font_size = 0
+        self._line_height = 0
+        # 标签文字 -> 当前字号下的宽度（像素）
+        self._label_widths: Dict[str, int] = {}
+        # (布局键名, 格子矩形, 标签底板, 标签文字)，按行优先顺序
+        self._cells: List[tuple] = []
+        self.set_layout(layout)
+
+    def set_layout(self, layout: List[List[str]]) -> None:
+        """按新布局重新创建格子图元（初始位置在画布原点，draw 之前不可见）"""
+        for _, rect, plate, label in self._cells:
+            self.canvas.delete(rect, plate, label)
+        self.layout = layout
+        self._cells = []
+        for row in layout:
+            for key in row:
+                rect = self.canvas.create_rectangle(0, 0, 0, 0, fill=CELL_BG_COLOR,
+                                                    outline=GRID_LINE_COLOR, width=1)
+                plate = self.canvas.create_rectangle(0, 0, 0, 0, fill=LABEL_PLATE_COLOR, width=0)
+                label = self.canvas.create_text(0, 0, text=key.upper(), font=self.font,
+                                                fill=LABEL_TEXT_COLOR)
+                self._cells.append((key, rect, plate, label))
+        self._font_size = 0
+
+    def draw(self, bounds: Bounds) -> None:
+        """把网格铺满 bounds"""
+        x1, y1, x2, y2 = bounds
+        columns = len(self.layout[0])
+        cell_width = (x2 - x1) / columns
+        cell_height = (y2 - y1) / len(self.layout)
+        self._set_font_size(max(8, int(cell_height * 0.6)))
+        coords = self.canvas.coords
+        # 底板覆盖标签的文字框，但不盖住格子边线
+        plate_half_height = max(0, min(self._line_height, cell_height - 4) / 2)
+        for index, (key, rect, plate, label) in enumerate(self._cells):
+            row_index, col_index = divmod(index, columns)
+            cell_x1 = x1 + col_index * cell_width
+            cell_y1 = y1 + row_index * cell_height
+            cell_x2, cell_y2 = cell_x1 + cell_width, cell_y1 + cell_height
+            center_x, center_y = cell_x1 + cell_width / 2, cell_y1 + cell_height / 2
+            plate_half_width = max(0, min(self._label_widths[key] / 2 + 2, cell_width / 2 - 2))
+            coords(rect, cell_x1, cell_y1, cell_x2, cell_y2)
+            coords(plate, center_x - plate_half_width, center_y - plate_half_height,
+                   center_x + plate_half_width, center_y + plate_half_height)
+            coords(label, center_x, center_y)
+
+    def _set_font_size(self, size: int) -> None:
+        if size == self._font_size:
+            return
+        self._font_size = size
+        self.font.configure(size=size)
+        self._line_height = self.font.metrics('linespace')
+        self._label_widths = {key: self.font.measure(key.upper())
+                              for row in self.layout for key in row}
+
+
 class RegionSelector(tk.Tk):
     """区域选择器的主窗口类。"""
     
-    def __init__(self, layout_data: List[List[str]], coords_file_path: str) -> None:
+    def __init__(self, layout_data: List[List[str]], coords_file_path: Optional[str],
+                 listener: Optional[Callable[[Message], None]] = None,
+                 take_focus: bool = True, depth: int = DEFAULT_DEPTH,
+                 min_cell_size: float = 0) -> None:
         """初始化区域选择器。
 
         Args:
             layout_data: 网格布局数据,二维列表
-            coords_file_path: 坐标输出文件路径
+            coords_file_path: 坐标输出文件路径（常驻模式下不使用）
+            listener: 常驻模式下接收 selector_protocol 消息的函数；给出时选择结束后
+                隐藏窗口而不是销毁，结果交给它而不写文件
+            take_focus: 显示时是否抢占键盘焦点；按键由外部送入时不需要
+            depth: 选择的级数，每级按一次键
+            min_cell_size: 大于 0 时改为细分到选中的格子小于这么多像素为止，见 selection_depth
         """
         super().__init__()
         
         # 基础配置数据
         self.layout_data = layout_data
         self.coords_file_path = coords_file_path
+        self.listener = listener
+        self.resident = listener is not None
+        self.take_focus = take_focus
         self.screen_width = self.winfo_screenwidth()
         self.screen_height = self.winfo_screenheight()
         
-        # 状态变量
+        # 状态变量: current_level 为 0 表示未显示；path 是本次选择中已选格子的 (行, 列)，
+        # region 是当前网格铺满的区域，由 path 逐级等分得到
         self.current_level: int = 0
-        self.macro_bounds = None
-        self.grid_rects: Dict[str, tuple] = {}
-        self.valid_keys: Set[str] = {key for row in self.layout_data for key in row}
+        self.path: Tuple[Tuple[int, int], ...] = ()
+        self.region: Bounds = (0, 0, self.screen_width, self.screen_height)
+        self._set_grid(layout_data, depth, min_cell_size)
         
         # 初始化界面
         self._setup_overlay_window()
-        self.start()
+        if self.resident:
+            # 提前完成窗口的创建，显示时不再有初始化开销
+            self.update_idletasks()
+            self.listener({'type': MSG_READY})
+        else:
+            self.start()
 
     def _setup_overlay_window(self):
         self.withdraw()
@@ -67,57 +214,145 @@ class RegionSelector(tk.Tk):
         self.canvas = tk.Canvas(self, bg='black', highlightthickness=0)
         self.canvas.pack(fill=tk.BOTH, expand=True)
         self.wm_attributes("-transparentcolor", 'black')
+        self.grid_renderer = GridRenderer(self.canvas, self.layout_data)
         self.bind('<Key>', self._on_key_press)
         self.bind('<Escape>', lambda e: self.stop())
         self.bind('<Button-1>', lambda e: self.stop())
 
+    def _set_grid(self, layout_data: List[List[str]], depth: int, min_cell_size: float) -> None:
+        """预先计算每个键的 (行, 列) 和选择级数，选择时只做算术"""
+        self.rows = len(layout_data)
+        self.columns = len(layout_data[0])
+        self.key_cells = layout_index(layout_data)
+        self.depth = selection_depth(self.screen_width, self.screen_height,
+                                     self.rows, self.columns, depth, min_cell_size)
+
     def start(self):
         self.current_level = 1
-        self._draw_grid((0, 0, self.screen_width, self.screen_height), self.layout_data)
+        self.path = ()
+        self.region = (0, 0, self.screen_width, self.screen_height)
+        self.grid_renderer.draw(self.region)
         self.deiconify()
-        self.focus_force()
-        self.after(100, self.focus_force)
+        if self.take_focus:
+            self.focus_force()
+            self.after(100, self.focus_force)
+        if self.resident:
+            self.update_idletasks()
+            self.listener({'type': MSG_SHOWN})
 
     def _on_key_press(self, event):
         key = event.keysym.lower()
         if key == 'semicolon': key = ';'
-        if key in self.valid_keys:
-            if self.current_level == 1:
-                self.macro_bounds = self.grid_rects[key]
-                self.canvas.delete("all")
-                self.current_level = 2
-                self._draw_grid(self.macro_bounds, self.layout_data)
-                self.focus_force()
-            elif self.current_level == 2:
-                micro_bounds = self.grid_rects[key]
-                target_x = micro_bounds[0] + (micro_bounds[2] - micro_bounds[0]) / 2
-                target_y = micro_bounds[1] + (micro_bounds[3] - micro_bounds[1]) / 2
-                try:
-                    with open(self.coords_file_path, 'w', encoding='utf-8') as f:
-                        f.write(f"{target_x},{target_y}")
-                    log_to_file(f"坐标成功写入: {self.coords_file_path}")
-                except Exception as e:
-                    log_to_file(f"!!! 写入坐标文件失败: {e} !!!")
-                self.stop()
-        else:
-            self.stop()
+        self.handle_key(key)
         return "break"
 
-    def _draw_grid(self, bounds, layout):
-        x1, y1, x2, y2 = bounds; region_width, region_height = x2 - x1, y2 - y1; grid_size_y = len(layout); grid_size_x = len(layout[0]); cell_width, cell_height = region_width / grid_size_x, region_height / grid_size_y; self.grid_rects.clear(); font_size = max(8, int(cell_height * 0.6)); cell_bg_color = "#333333"; outline_color = "#FFD700"; text_color = "black"; grid_line_color = "#FFD700"
-        for row_index, row in enumerate(layout):
-            for col_index, key in enumerate(row):
-                cell_x1, cell_y1 = x1 + col_index * cell_width, y1 + row_index * cell_height; cell_x2, cell_y2 = cell_x1 + cell_width, cell_y1 + cell_height; self.canvas.create_rectangle(cell_x1, cell_y1, cell_x2, cell_y2, fill=cell_bg_color, outline=grid_line_color, width=1); center_x, center_y = cell_x1 + cell_width / 2, cell_y1 + cell_height / 2; text = key.upper(); offsets = [(-1, -1), (1, -1), (-1, 1), (1, 1)]
-                for ox, oy in offsets: self.canvas.create_text(center_x + ox, center_y + oy, text=text, font=("Consolas", font_size, "bold"), fill=outline_color)
-                self.canvas.create_text(center_x, center_y, text=text, font=("Consolas", font_size, "bold"), fill=text_color)
-                self.grid_rects[key] = (cell_x1, cell_y1, cell_x2, cell_y2)
+    def handle_key(self, key: Optional[str]) -> None:
+        """处理一次选择按键；不在布局中的按键（或 None）取消选择，未显示时忽略"""
+        if self.current_level == 0:
+            return
+        cell = self.key_cells.get(key)
+        if cell is None:
+            self.stop()
+            return
+        self.path += (cell,)
+        self.region = cell_bounds(self.region, self.rows, self.columns, *cell)
+        if len(self.path) < self.depth:
+            # 在选中的格子内显示下一级网格
+            self.current_level += 1
+            self.grid_renderer.draw(self.region)
+            if self.take_focus:
+                self.focus_force()
+            return
+
+        x1, y1, x2, y2 = self.region
+        target_x = x1 + (x2 - x1) / 2
+        target_y = y1 + (y2 - y1) / 2
+        if self.resident:
+            self.listener({'type': MSG_RESULT, 'x': target_x, 'y': target_y})
+            self._hide()
+            return
+        try:
+            with open(self.coords_file_path, 'w', encoding='utf-8') as f:
+                f.write(f"{target_x},{target_y}")
+            log_to_file(f"坐标成功写入: {self.coords_file_path}")
+        except Exception as e:
+            log_to_file(f"!!! 写入坐标文件失败: {e} !!!")
+        self.stop()
 
     def stop(self):
-        self.destroy()
+        if self.resident:
+            if self.current_level == 0:
+                return
+            self.listener({'type': MSG_CANCEL})
+            self._hide()
+        else:
+            self.destroy()
+
+    def _hide(self):
+        """常驻模式下结束一次选择: 隐藏窗口，网格图元保留到下一次 show 时重新定位"""
+        self.withdraw()
+        self.current_level = 0
+
+    def show(self):
+        """常驻模式下开始一次选择（已在显示时忽略）"""
+        if self.current_level == 0:
+            self.start()
+
+    def set_layout(self, layout_data: List[List[str]], depth: int = DEFAULT_DEPTH,
+                   min_cell_size: float = 0) -> None:
+        """更换网格布局和选择级数，从下一次选择开始生效"""
+        self.layout_data = layout_data
+        self._set_grid(layout_data, depth, min_cell_size)
+        self.grid_renderer.set_layout(layout_data)
+
+
+def send_message(message: Message) -> None:
+    """常驻模式下向宿主进程发送一条消息（只在 Tk 主线程上调用）"""
+    write_message(sys.stdout.buffer, message)
+
+
+def read_commands(app: RegionSelector) -> None:
+    """
+    常驻模式下读取宿主进程的消息，在独立线程上运行。
+
+    Tcl 以线程模式编译（Windows 版 Python 自带的 Tcl 即是如此）时，
+    从其他线程调用 after() 会被转交给 Tk 主线程执行。stdin 关闭即宿主退出，随之退出。
+    """
+    try:
+        while True:
+            message = read_message(sys.stdin.buffer)
+            if message is None:
+                break
+            kind = message['type']
+            if kind == MSG_ACTIVATE:
+                app.after(0, app.show)
+            elif kind == MSG_LAYOUT:
+                app.after(0, app.set_layout, message['layout'],
+                          message.get('depth', DEFAULT_DEPTH), message.get('min_cell_size', 0))
+            else:
+                log_to_file(f"忽略未知消息: {message!r}")
+    except ProtocolError as e:
+        log_to_file(f"!!! 与宿主进程的通信出错: {e} !!!")
+    app.after(0, app.destroy)
+
 
 if __name__ == '__main__':
     try:
         log_to_file("\n--- region_selector.exe started ---")
+        if len(sys.argv) >= 2 and sys.argv[1] == '--resident':
+            # 宿主进程启动后首先发送布局
+            message = read_message(sys.stdin.buffer)
+            if message is None or message['type'] != MSG_LAYOUT:
+                log_to_file(f"!!! 致命错误: 未收到布局消息: {message!r}")
+                sys.exit(1)
+            app = RegionSelector(message['layout'], None, listener=send_message,
+                                 depth=message.get('depth', DEFAULT_DEPTH),
+                                 min_cell_size=message.get('min_cell_size', 0))
+            threading.Thread(target=read_commands, args=(app,), daemon=True).start()
+            app.mainloop()
+            log_to_file("Exiting cleanly.")
+            sys.exit(0)
+
         if len(sys.argv) < 3:
             log_to_file("!!! 致命错误: 未提供布局文件和坐标文件路径。")
             sys.exit(1)
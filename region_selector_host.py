@@ -0,0 +1,427 @@
+"""常驻区域选择器的宿主模块
+
+主程序启动时就创建区域选择器进程（`region_selector.py --resident` 或
+`RegionSelector.exe --resident`），进程完成 tkinter 导入、Tk 根窗口和画布的创建后
+隐藏等待。每次进入区域选择只需向它发送一条激活消息，不再承担启动新进程的开销。
+选择器进程意外退出时自动重启。
+
+布局、激活、结果和取消都以 selector_protocol 定义的帧在子进程的 stdin/stdout 上传递，
+激活路径上不读写任何文件，结果由读取线程直接交给回调。
+
+InProcessRegionSelector 是可选的进程内实现: 覆盖窗口在主程序的专用 Tk 线程上只创建一次，
+按需显示和隐藏。选择期间键盘钩子保持安装，由钩子拦截按键并通过内存队列交给 UI 线程，
+不需要暂停钩子，也就没有暂停期间按键漏到前台程序的窗口。
+"""
+
+import ctypes
+import logging
+import os
+import queue
+import subprocess
+import sys
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from selector_protocol import (MSG_ACTIVATE, MSG_CANCEL, MSG_LAYOUT, MSG_READY, MSG_RESULT,
+                               MSG_SHOWN, Message, ProtocolError, read_message, write_message)
+
+# 选择器进程启动后很快退出时，等待这么久（秒）再重启，避免反复崩溃时空转
+RESTART_BACKOFF = 1.0
+# 进程存活超过这个时长（秒）才算正常运行过，之后的退出立即重启
+STABLE_UPTIME = 5.0
+# 进程内选择器的 UI 线程在网格显示期间处理 Tk 事件的间隔（秒）；隐藏期间不处理，只阻塞等待命令
+VISIBLE_PUMP_INTERVAL = 0.015
+
+# 选择结果回调: 参数为目标坐标，取消或失败时为 None
+ResultCallback = Callable[[Optional[Tuple[float, float]]], None]
+
+
+class RegionSelectorHost:
+    """
+    管理常驻的区域选择器进程。
+
+    activate() 只写入一帧消息就返回，选择结果在读取线程上通过 on_result 回调送回。
+    每次 activate() 都保证恰好对应一次 on_result 回调（结果、取消，或进程退出时的 None）。
+    """
+
+    def __init__(self, layout: List[List[str]], on_result: ResultCallback,
+                 command: Optional[List[str]] = None, depth: int = 2,
+                 min_cell_size: float = 0) -> None:
+        """
+        Args:
+            layout: 区域选择的网格布局
+            on_result: 选择结束时调用的函数，在读取线程上执行
+            command: 启动选择器进程的命令，默认按是否打包自动选择
+            depth: 选择的级数
+            min_cell_size: 大于 0 时改为细分到选中的格子小于这么多像素为止
+        """
+        self.layout = layout
+        self.on_result = on_result
+        self.command = command or self._default_command()
+        self.depth = depth
+        self.min_cell_size = min_cell_size
+
+        self._process: Optional[subprocess.Popen] = None
+        self._reader: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._stopping = False
+        self._ready = False
+        # 进程尚未就绪时收到的激活请求，就绪后立即显示
+        self._show_pending = False
+        # 已经激活、尚未收到结果的选择
+        self._active = False
+
+        self.activations = 0
+        self.restarts = 0
+        self._activate_time = 0.0
+        self._latency_total = 0.0
+        self._latency_max = 0.0
+        self._latency_count = 0
+
+    @staticmethod
+    def _default_command() -> List[str]:
+        """源码运行时用当前解释器运行 region_selector.py，打包后运行 RegionSelector.exe"""
+        from config_loader import get_base_path
+        base_path = get_base_path()
+        if getattr(sys, 'frozen', False):
+            return [os.path.join(base_path, "RegionSelector.exe"), '--resident']
+        return [sys.executable, os.path.join(base_path, "region_selector.py"), '--resident']
+
+    def start(self) -> None:
+        """启动选择器进程并发送布局。"""
+        with self._lock:
+            self._stopping = False
+            self._spawn_locked()
+
+    def stop(self, timeout: float = 2.0) -> None:
+        """关闭选择器进程。"""
+        with self._lock:
+            self._stopping = True
+            process = self._process
+        if process is not None:
+            try:
+                # 关闭 stdin 后选择器进程自行退出
+                process.stdin.close()
+            except OSError:
+                pass
+            try:
+                process.wait(timeout)
+            except subprocess.TimeoutExpired:
+                process.kill()
+        if self._reader is not None and self._reader is not threading.current_thread():
+            self._reader.join(timeout)
+
+    def activate(self) -> bool:
+        """
+        显示区域选择网格。
+
+        Returns:
+            bool: 请求是否已接受；返回 False 时不会有 on_result 回调
+        """
+        with self._lock:
+            if self._stopping or self._active:
+                return False
+            self._active = True
+            self.activations += 1
+            self._activate_time = time.perf_counter()
+            if not self._ready:
+                # 进程正在启动或重启，就绪后由读取线程发送显示命令
+                self._show_pending = True
+                return True
+            if self._send_locked({'type': MSG_ACTIVATE}):
+                return True
+            self._active = False
+            return False
+
+    def is_alive(self) -> bool:
+        """选择器进程是否在运行"""
+        process = self._process
+        return process is not None and process.poll() is None
+
+    def get_stats(self) -> Dict[str, float]:
+        """激活次数、重启次数，以及从 activate() 到网格显示的平均/最大延迟（毫秒）"""
+        count = self._latency_count
+        return {
+            'activations': self.activations,
+            'restarts': self.restarts,
+            'activate_latency_mean_ms': round(self._latency_total / count * 1000, 3) if count else 0,
+            'activate_latency_max_ms': round(self._latency_max * 1000, 3),
+        }
+
+    def _spawn_locked(self) -> None:
+        startupinfo = None
+        if hasattr(subprocess, 'STARTUPINFO'):
+            startupinfo = subprocess.STARTUPINFO()
+            startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
+        self._ready = False
+        self._process = subprocess.Popen(
+            self.command, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+            bufsize=0, startupinfo=startupinfo
+        )
+        self._send_locked({'type': MSG_LAYOUT, 'layout': self.layout,
+                           'depth': self.depth, 'min_cell_size': self.min_cell_size})
+        self._reader = threading.Thread(target=self._read_loop, args=(self._process,),
+                                        name='RegionSelectorReader', daemon=True)
+        self._reader.start()
+
+    def _send_locked(self, message: Message) -> bool:
+        process = self._process
+        if process is None:
+            return False
+        if message['type'] == MSG_ACTIVATE and hasattr(ctypes, 'windll'):
+            # 允许选择器进程把自己的窗口切到前台，否则常驻进程的 focus_force 可能被系统拒绝
+            ctypes.windll.user32.AllowSetForegroundWindow(process.pid)
+        try:
+            write_message(process.stdin, message)
+            return True
+        except (OSError, ValueError) as e:
+            logging.error(f"向区域选择器发送消息失败: {e}")
+            return False
+
+    def _read_loop(self, process: subprocess.Popen) -> None:
+        """读取选择器进程的输出，进程退出后按需重启"""
+        started = time.monotonic()
+        try:
+            while True:
+                message = read_message(process.stdout)
+                if message is None:
+                    break
+                self._handle_message(message)
+        except ProtocolError as e:
+            # 数据流已不可信，结束进程后按意外退出处理
+            logging.error(f"区域选择器消息格式错误: {e}")
+            process.kill()
+        process.wait()
+
+        with self._lock:
+            if self._process is process:
+                self._ready = False
+            was_active = self._active
+            self._active = False
+            self._show_pending = False
+            stopping = self._stopping
+        if was_active:
+            self._deliver(None)
+        if stopping:
+            return
+
+        logging.warning(f"区域选择器进程意外退出，退出码: {process.returncode}，正在重启")
+        if time.monotonic() - started < STABLE_UPTIME:
+            time.sleep(RESTART_BACKOFF)
+        with self._lock:
+            if self._stopping:
+                return
+            self.restarts += 1
+            try:
+                self._spawn_locked()
+            except OSError as e:
+                logging.error(f"重启区域选择器进程失败: {e}")
+
+    def _handle_message(self, message: Message) -> None:
+        kind = message['type']
+        if kind == MSG_READY:
+            with self._lock:
+                self._ready = True
+                failed = False
+                if self._show_pending:
+                    self._show_pending = False
+                    failed = not self._send_locked({'type': MSG_ACTIVATE})
+                    if failed:
+                        self._active = False
+            if failed:
+                self._deliver(None)
+        elif kind == MSG_SHOWN:
+            latency = time.perf_counter() - self._activate_time
+            self._latency_total += latency
+            self._latency_count += 1
+            if latency > self._latency_max:
+                self._latency_max = latency
+        elif kind == MSG_RESULT:
+            try:
+                coords = (float(message['x']), float(message['y']))
+            except (KeyError, TypeError, ValueError):
+                logging.error(f"无法解析区域选择器的结果: {message!r}")
+                coords = None
+            self._finish(coords)
+        elif kind == MSG_CANCEL:
+            self._finish(None)
+        else:
+            logging.warning(f"未知的区域选择器消息: {message!r}")
+
+    def _finish(self, coords: Optional[Tuple[float, float]]) -> None:
+        with self._lock:
+            if not self._active:
+                return
+            self._active = False
+        self._deliver(coords)
+
+    def _deliver(self, coords: Optional[Tuple[float, float]]) -> None:
+        try:
+            self.on_result(coords)
+        except Exception as e:
+            logging.error(f"处理区域选择结果时发生错误: {e}", exc_info=True)
+
+
+class InProcessRegionSelector:
+    """
+    在主程序内的专用 UI 线程上运行的区域选择器，接口与 RegionSelectorHost 相同。
+
+    Tk 根窗口由 UI 线程创建并只在该线程上使用。激活命令和选择按键都经由同一个队列送入，
+    按键由键盘钩子线程通过 feed_key() 放入，结果在 UI 线程上直接交给 on_result。
+    每次 activate() 都保证恰好对应一次 on_result 回调。
+    """
+
+    # 队列中的控制命令，其余元素都是按键
+    _ACTIVATE = object()
+    _STOP = object()
+
+    def __init__(self, layout: List[List[str]], on_result: ResultCallback,
+                 depth: int = 2, min_cell_size: float = 0) -> None:
+        """
+        Args:
+            layout: 区域选择的网格布局
+            on_result: 选择结束时调用的函数，在 UI 线程上执行
+            depth: 选择的级数
+            min_cell_size: 大于 0 时改为细分到选中的格子小于这么多像素为止
+        """
+        self.layout = layout
+        self.on_result = on_result
+        self.depth = depth
+        self.min_cell_size = min_cell_size
+
+        # UI 线程的输入: _ACTIVATE、按键名（str，无效按键为 None）或 _STOP
+        self._commands: queue.Queue = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._stopping = False
+        self._active = False
+
+        self.activations = 0
+        self._activate_time = 0.0
+        self._latency_total = 0.0
+        self._latency_max = 0.0
+        self._latency_count = 0
+
+    def start(self) -> None:
+        """启动 UI 线程，覆盖窗口在该线程上创建后隐藏等待。"""
+        self._stopping = False
+        self._thread = threading.Thread(target=self._ui_loop, name='RegionSelectorUI', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 2.0) -> None:
+        """销毁覆盖窗口并结束 UI 线程。"""
+        with self._lock:
+            self._stopping = True
+        self._commands.put(self._STOP)
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+
+    def activate(self) -> bool:
+        """
+        显示区域选择网格。
+
+        Returns:
+            bool: 请求是否已接受；返回 False 时不会有 on_result 回调
+        """
+        with self._lock:
+            if self._stopping or self._active or not self.is_alive():
+                return False
+            self._active = True
+            self.activations += 1
+            self._activate_time = time.perf_counter()
+        self._commands.put(self._ACTIVATE)
+        return True
+
+    def feed_key(self, key: Optional[str]) -> None:
+        """
+        送入一次选择按键（在键盘钩子线程上调用，只做一次入队）。
+
+        Args:
+            key: 布局中的按键名；不在布局中的按键传入 None，会取消选择
+        """
+        if self._active:
+            self._commands.put(key)
+
+    def is_alive(self) -> bool:
+        """UI 线程是否在运行"""
+        thread = self._thread
+        return thread is not None and thread.is_alive()
+
+    def get_stats(self) -> Dict[str, float]:
+        """激活次数，以及从 activate() 到网格显示的平均/最大延迟（毫秒）"""
+        count = self._latency_count
+        return {
+            'activations': self.activations,
+            'restarts': 0,
+            'activate_latency_mean_ms': round(self._latency_total / count * 1000, 3) if count else 0,
+            'activate_latency_max_ms': round(self._latency_max * 1000, 3),
+        }
+
+    def _ui_loop(self) -> None:
+        """UI 线程: 创建覆盖窗口，之后按队列中的命令显示网格、处理按键"""
+        selector = None
+        try:
+            # tkinter 只在启用进程内模式时导入
+            from region_selector import RegionSelector
+            selector = RegionSelector(self.layout, None, listener=self._handle_message,
+                                      take_focus=False, depth=self.depth,
+                                      min_cell_size=self.min_cell_size)
+            while True:
+                if not selector.current_level:
+                    # 网格隐藏时没有需要处理的 Tk 事件，线程一直阻塞到下一条命令，不产生任何唤醒
+                    command = self._commands.get()
+                else:
+                    try:
+                        command = self._commands.get(timeout=VISIBLE_PUMP_INTERVAL)
+                    except queue.Empty:
+                        selector.update()
+                        continue
+                if command is self._STOP:
+                    break
+                if command is self._ACTIVATE:
+                    selector.show()
+                else:
+                    selector.handle_key(command)
+                # 立即重绘，不等到下一个处理间隔
+                selector.update()
+        except Exception as e:
+            logging.error(f"进程内区域选择器出错: {e}", exc_info=True)
+        finally:
+            with self._lock:
+                was_active = self._active
+                self._active = False
+            if was_active:
+                self._deliver(None)
+            if selector is not None:
+                try:
+                    selector.destroy()
+                except Exception:
+                    pass
+
+    def _handle_message(self, message: Message) -> None:
+        """RegionSelector 的消息回调，在 UI 线程上执行"""
+        kind = message['type']
+        if kind == MSG_SHOWN:
+            latency = time.perf_counter() - self._activate_time
+            self._latency_total += latency
+            self._latency_count += 1
+            if latency > self._latency_max:
+                self._latency_max = latency
+        elif kind == MSG_RESULT:
+            self._finish((float(message['x']), float(message['y'])))
+        elif kind == MSG_CANCEL:
+            self._finish(None)
+
+    def _finish(self, coords: Optional[Tuple[float, float]]) -> None:
+        with self._lock:
+            if not self._active:
+                return
+            self._active = False
+        self._deliver(coords)
+
+    def _deliver(self, coords: Optional[Tuple[float, float]]) -> None:
+        try:
+            self.on_result(coords)
+        except Exception as e:
+            logging.error(f"处理区域选择结果时发生错误: {e}", exc_info=True)
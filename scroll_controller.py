@@ -1,134 +1,256 @@
 # scroll_controller.py
 
-# collections 是 Python 内置的集合模块，提供了额外的数据结构
-# 这里主要使用其中的 deque（双端队列）来实现滚动方向的堆栈管理
-import collections
+import math
+
+# 滚动方向位: 每个方向占一位，按下时置位、释放时清零，
+# 判断“是否在滚动”和“某方向是否按下”都只需要一次位运算
+SCROLL_UP = 1 << 0
+SCROLL_DOWN = 1 << 1
+SCROLL_LEFT = 1 << 2
+SCROLL_RIGHT = 1 << 3
+
+_VERTICAL = SCROLL_UP | SCROLL_DOWN
+_HORIZONTAL = SCROLL_LEFT | SCROLL_RIGHT
+
+# 方向位 -> (轴, 符号)。垂直轴正数向上，水平轴正数向右，与滚轮事件的符号一致
+_DIRECTION_AXIS = {
+    SCROLL_UP: ('y', 1),
+    SCROLL_DOWN: ('y', -1),
+    SCROLL_LEFT: ('x', -1),
+    SCROLL_RIGHT: ('x', 1),
+}
+
 
 class ScrollController:
     """
     管理平滑滚动的状态和物理计算。
     这个类的核心是 update(delta) 方法，它被一个高频循环调用。
+
+    垂直和水平两个轴在同一次 update 中一起积分，共用同一个按住时长（速度曲线），
+    各自保留小数累加器。对角滚动时两个轴的滚轮事件写入输出后端的同一批次，
+    由每帧末尾的一次 flush() 一起提交。
+
+    开启惯性滚动时，一个轴上的滚动键全部释放后，该轴以释放时的速度继续滑行，
+    速度按摩擦系数指数衰减 v(t) = v0 * e^(-k*t)。滑行距离同样按解析积分计算，
+    与帧率无关；该轴上任何新的滚动输入都会立即结束滑行。
     """
-    def __init__(self, config, platform_scroller):
+    def __init__(self, config, output):
         """
         初始化滚动控制器。
-        
+
         Args:
-            config (AppConfig): 应用程序的配置对象，用于获取滚动参数。
-            platform_scroller (WinPlatformScroller): 平台特定的滚动实现对象。
+            config (AppConfig): 应用程序的配置对象，提供编译好的加速曲线 SCROLL_CURVE。
+            output (OutputBackend): 输出后端，滚轮事件写入其当前批次。
         """
         # --- 依赖注入 ---
         self.config = config
-        self.platform_scroller = platform_scroller
-        
+        self.output = output
+        # 加载配置时编译好的加速曲线（scroll_curves.ScrollCurve）
+        self.curve = config.SCROLL_CURVE
+
         # --- 状态变量 ---
-        # 使用双端队列(deque)作为栈，来跟踪当前生效的滚动方向。
-        # 当用户按下'向上'键，一个'up'标志被推入，释放时弹出。
-        # 这样做可以正确处理用户同时按下'向上'和'向下'键的情况。
-        self.y_wheel_stack = collections.deque()
-        
+        # `direction_mask`: 当前按下的滚动方向位（SCROLL_UP/DOWN/LEFT/RIGHT 的组合）。
+        self.direction_mask = 0
+        # `y_direction` / `x_direction`: 每个轴当前生效的方向（+1、-1 或 0）。
+        # 同一个轴上两个相反方向同时按下时，后按下的方向生效；
+        # 释放它后回到仍然按着的另一个方向，与之前用栈管理方向时的行为一致。
+        self.y_direction = 0
+        self.x_direction = 0
+
         # --- 物理计算变量 ---
         # `wheel_duration`: 浮点数，持续按住滚动键的时间（秒）。
         # 按住时间越长，此值越大，导致滚动速度越快。
         self.wheel_duration = 0.0
-        
-        # `scroll_accumulator`: 浮点数，用于累积计算出的、带有小数的滚动距离。
-        # 因为我们每次只能滚动整数个像素，这个累加器可以防止丢失小数部分的精度，
+
+        # `y_accumulator` / `x_accumulator`: 浮点数，每个轴各自累积带有小数的滚动距离。
+        # 因为我们每次只能滚动整数个像素，累加器可以防止丢失小数部分的精度，
         # 使得长期滚动更加平滑。
-        self.scroll_accumulator = 0.0
+        self.y_accumulator = 0.0
+        self.x_accumulator = 0.0
+
+        # --- 惯性滚动 ---
+        # `kinetic_friction`: 滑行速度的指数衰减系数（1/秒），为 0 时不滑行。
+        self.kinetic_friction = config.SCROLL_KINETIC_FRICTION if config.SCROLL_KINETIC else 0.0
+        # `kinetic_stop_velocity`: 滑行速度低于此值（像素/秒）时停止。
+        self.kinetic_stop_velocity = config.SCROLL_KINETIC_STOP_VELOCITY
+        # `y_glide` / `x_glide`: 每个轴当前的滑行速度（像素/秒，带方向符号），0 表示没有滑行。
+        self.y_glide = 0.0
+        self.x_glide = 0.0
 
     def is_wheeling(self) -> bool:
         """
         检查当前是否处于任何滚动状态。
-        
+
         Returns:
-            bool: 如果y_wheel_stack不为空，则为True，表示正在滚动。
+            bool: 如果有任何滚动方向被按下，或仍在惯性滑行，则为True。
         """
-        return bool(self.y_wheel_stack)
+        return self.direction_mask != 0 or self.y_glide != 0.0 or self.x_glide != 0.0
 
     def _calculate_velocity(self) -> float:
         """
-        根据按住滚动键的持续时间，动态计算当前的滚动速度。
-        
-        公式: 当前速度 = min(最大速度, 初始速度 + 加速度 * 持续时间)
-        
+        根据按住滚动键的持续时间，从加速曲线中查出当前的滚动速度。
+
         Returns:
-            float: 计算出的当前滚动速度（像素/秒）。
+            float: 当前的瞬时滚动速度（像素/秒）。
         """
-        # 从配置中获取物理参数
-        initial_v = self.config.SCROLL_INITIAL_VELOCITY
-        max_v = self.config.SCROLL_MAX_VELOCITY
-        accel = self.config.SCROLL_ACCELERATION
-        
-        # 应用公式
-        velocity = initial_v + accel * self.wheel_duration
-        
-        # 确保速度不超过最大值
-        return min(max_v, velocity)
+        return self.curve.velocity_at(self.wheel_duration)
 
     def update(self, delta: float):
         """
         主更新方法，由外部循环（如mouse_movement_worker）在高频调用。
-        
+
         Args:
             delta (float): 距离上次调用的时间间隔（秒）。
         """
-        # 如果当前没有滚动，重置持续时间并退出
-        if not self.is_wheeling():
+        # 没有按下任何滚动键时重置持续时间，下次按下重新加速
+        if not self.direction_mask:
             self.wheel_duration = 0.0
-            self.scroll_accumulator = 0.0
+            # 既没有按键也没有滑行时清空累加器并退出
+            if not self.y_glide and not self.x_glide:
+                self.y_accumulator = 0.0
+                self.x_accumulator = 0.0
+                return
+            self._update_glide(delta)
             return
-        
-        # 累积按住滚动键的时间
-        self.wheel_duration += delta
-        
-        # 计算当前帧的速度
-        velocity = self._calculate_velocity()
-        
-        # 计算当前帧理论上应该滚动的距离（带小数）
-        # 距离 = 速度 * 时间
-        distance = velocity * delta
-        
-        # 根据栈顶的方向决定滚动的正负
-        # 栈顶元素 'down' 表示向下滚动，对应负距离
-        direction = -1 if self.y_wheel_stack[-1] == 'down' else 1
-        
-        # 累积滚动距离
-        self.scroll_accumulator += distance * direction
-        
-        # 取出累加器中的整数部分作为本次实际要滚动的像素值
-        pixels_to_scroll = int(self.scroll_accumulator)
-        
-        # 从累加器中减去已滚动的整数部分，保留小数部分以供下次计算
-        self.scroll_accumulator -= pixels_to_scroll
-        
-        # 如果有实际需要滚动的像素，则调用平台实现
-        if pixels_to_scroll != 0:
-            self.platform_scroller.scroll_vertical(pixels_to_scroll)
+
+        # 当前帧理论上应该滚动的距离（带小数）是速度曲线在 [t, t + delta] 上的积分，两个轴共用。
+        # 累计距离查表得到，与帧间隔无关: 不论以什么帧率调用，按住同样时长滚动的总距离都相同
+        start = self.wheel_duration
+        self.wheel_duration = start + delta
+        distance_at = self.curve.distance_at
+        distance = distance_at(self.wheel_duration) - distance_at(start)
+
+        # 每个轴按各自的方向累积，取出整数部分交给输出后端，保留小数部分以供下次计算
+        if self.y_direction:
+            self.y_accumulator += distance * self.y_direction
+            pixels_y = int(self.y_accumulator)
+            self.y_accumulator -= pixels_y
+            if pixels_y != 0:
+                self.output.wheel(pixels_y)
+        if self.x_direction:
+            self.x_accumulator += distance * self.x_direction
+            pixels_x = int(self.x_accumulator)
+            self.x_accumulator -= pixels_x
+            if pixels_x != 0:
+                self.output.hwheel(pixels_x)
+
+        # 另一个轴可能仍在滑行（例如释放向右后继续按住向下）
+        if self.y_glide or self.x_glide:
+            self._update_glide(delta)
+
+    def _update_glide(self, delta: float):
+        """
+        推进惯性滑行。速度 v * e^(-k*t) 在 [0, delta] 上的积分为 v * (1 - e^(-k*delta)) / k。
+
+        Args:
+            delta (float): 距离上次调用的时间间隔（秒）。
+        """
+        friction = self.kinetic_friction
+        decay = math.exp(-friction * delta)
+        scale = (1.0 - decay) / friction
+        stop_velocity = self.kinetic_stop_velocity
+
+        if self.y_glide:
+            self.y_accumulator += self.y_glide * scale
+            pixels_y = int(self.y_accumulator)
+            self.y_accumulator -= pixels_y
+            if pixels_y != 0:
+                self.output.wheel(pixels_y)
+            self.y_glide *= decay
+            if abs(self.y_glide) < stop_velocity:
+                self.y_glide = 0.0
+                self.y_accumulator = 0.0
+        if self.x_glide:
+            self.x_accumulator += self.x_glide * scale
+            pixels_x = int(self.x_accumulator)
+            self.x_accumulator -= pixels_x
+            if pixels_x != 0:
+                self.output.hwheel(pixels_x)
+            self.x_glide *= decay
+            if abs(self.x_glide) < stop_velocity:
+                self.x_glide = 0.0
+                self.x_accumulator = 0.0
+
+    def cancel_glide(self):
+        """立即结束两个轴上的惯性滑行（例如离开鼠标控制模式时）。"""
+        self.y_glide = 0.0
+        self.x_glide = 0.0
+
+    def start_scroll(self, direction: int):
+        """注册开始向某个方向（SCROLL_* 方向位）滚动的意图，同时结束该轴上的滑行。"""
+        axis, sign = _DIRECTION_AXIS[direction]
+        self.direction_mask |= direction
+        if axis == 'y':
+            self.y_direction = sign
+            if self.y_glide:
+                self.y_glide = 0.0
+                self.y_accumulator = 0.0
+        else:
+            self.x_direction = sign
+            if self.x_glide:
+                self.x_glide = 0.0
+                self.x_accumulator = 0.0
+
+    def stop_scroll(self, direction: int):
+        """注册停止向某个方向滚动的意图。方向未按下时（例如异常退出时）直接忽略。"""
+        if not self.direction_mask & direction:
+            return
+        self.direction_mask &= ~direction
+        axis, _ = _DIRECTION_AXIS[direction]
+        # 该轴上的滚动键全部释放时，按释放瞬间的速度开始滑行
+        glide = self.curve.velocity_at(self.wheel_duration) if self.kinetic_friction > 0 else 0.0
+        if axis == 'y':
+            released = self.y_direction
+            self.y_direction = self._axis_direction(_VERTICAL, SCROLL_UP, SCROLL_DOWN)
+            if not self.y_direction:
+                self.y_glide = glide * released
+                if not self.y_glide:
+                    self.y_accumulator = 0.0
+        else:
+            released = self.x_direction
+            self.x_direction = self._axis_direction(_HORIZONTAL, SCROLL_RIGHT, SCROLL_LEFT)
+            if not self.x_direction:
+                self.x_glide = glide * released
+                if not self.x_glide:
+                    self.x_accumulator = 0.0
+
+    def _axis_direction(self, axis_mask: int, positive: int, negative: int) -> int:
+        """根据方向位计算某个轴释放一个方向后仍然生效的方向。"""
+        held = self.direction_mask & axis_mask
+        if held & positive:
+            return 1
+        if held & negative:
+            return -1
+        return 0
 
     def start_scroll_down(self):
         """注册开始向下滚动的意图。"""
-        # 为避免重复添加，先检查 'down' 是否已在栈中
-        if 'down' not in self.y_wheel_stack:
-            self.y_wheel_stack.append('down')
+        self.start_scroll(SCROLL_DOWN)
 
     def stop_scroll_down(self):
         """注册停止向下滚动的意图。"""
-        try:
-            # 安全地从栈中移除 'down'
-            self.y_wheel_stack.remove('down')
-        except ValueError:
-            # 如果 'down' 不在栈中（例如，异常退出时），则忽略错误
-            pass
+        self.stop_scroll(SCROLL_DOWN)
 
     def start_scroll_up(self):
         """注册开始向上滚动的意图。"""
-        if 'up' not in self.y_wheel_stack:
-            self.y_wheel_stack.append('up')
+        self.start_scroll(SCROLL_UP)
 
     def stop_scroll_up(self):
         """注册停止向上滚动的意图。"""
-        try:
-            self.y_wheel_stack.remove('up')
-        except ValueError:
-            pass
\ No newline at end of file
+        self.stop_scroll(SCROLL_UP)
+
+    def start_scroll_left(self):
+        """注册开始向左滚动的意图。"""
+        self.start_scroll(SCROLL_LEFT)
+
+    def stop_scroll_left(self):
+        """注册停止向左滚动的意图。"""
+        self.stop_scroll(SCROLL_LEFT)
+
+    def start_scroll_right(self):
+        """注册开始向右滚动的意图。"""
+        self.start_scroll(SCROLL_RIGHT)
+
+    def stop_scroll_right(self):
+        """注册停止向右滚动的意图。"""
+        self.stop_scroll(SCROLL_RIGHT)
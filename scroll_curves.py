@@ -0,0 +1,204 @@
+"""滚动加速曲线模块
+
+按住滚动键后速度随时间变化的曲线。每条曲线在加载配置时编译一次，
+把加速阶段的速度和累计滚动距离预先计算成等间隔的查找表，
+滚动控制器每帧只做一次查表加线性插值，与曲线本身的计算开销无关。
+
+可选的曲线（[SmoothScrolling] 中的 curve）:
+    linear:   线性加速到最大速度，min(max_velocity, initial_velocity + acceleration * t)
+    ease_in:  指数缓入，开始时加速平缓、接近加速阶段末尾时加速最快
+    s_curve:  S 形（smoothstep），两端平缓、中间加速最快
+    table:    用户提供的 (时间, 速度) 点，点之间线性插值（curve_points）
+
+除 table 外，各曲线都在 ramp_time = (max_velocity - initial_velocity) / acceleration
+时到达最大速度，因此切换曲线只改变加速过程的形状，不改变到达最大速度的时间。
+加速阶段结束后速度保持不变，之后的距离直接按匀速计算，查找表只覆盖加速阶段。
+"""
+
+import math
+from array import array
+from typing import Callable, List, Sequence, Tuple
+
+# 查找表的默认时间步长（秒）
+DEFAULT_TABLE_STEP = 0.001
+# 查找表的最大格数，加速阶段很长时自动加大步长
+MAX_TABLE_CELLS = 1 << 16
+# 指数缓入曲线的陡峭程度，越大开始越平缓、末尾越陡
+EASE_IN_SHARPNESS = 4.0
+
+CURVE_NAMES = ('linear', 'ease_in', 's_curve', 'table')
+
+
+class ScrollCurve:
+    """
+    编译成查找表的滚动速度曲线。
+
+    distances[i] 为从 0 到 i * step 秒的累计滚动距离，每格用辛普森公式积分，
+    对线性、二次和三次速度曲线是精确的。end_time 之后速度恒为 end_velocity。
+    """
+    __slots__ = ('step', 'end_time', 'end_velocity', 'end_distance',
+                 'velocities', 'distances', '_inv_step', '_last_cell')
+
+    def __init__(self, velocity: Callable[[float], float], ramp_time: float,
+                 step: float = DEFAULT_TABLE_STEP) -> None:
+        """
+        Args:
+            velocity: 速度函数（像素/秒），只在编译时调用
+            ramp_time: 加速阶段的时长（秒），之后速度保持 velocity(ramp_time)
+            step: 查找表的时间步长（秒）
+        """
+        if ramp_time <= 0:
+            # 没有加速阶段，速度恒定
+            self.step = step
+            self.end_time = 0.0
+            self.end_velocity = velocity(0.0)
+            self.end_distance = 0.0
+            self.velocities = array('d', [self.end_velocity])
+            self.distances = array('d', [0.0])
+            self._inv_step = 1.0 / step
+            self._last_cell = 0
+            return
+
+        cells = min(MAX_TABLE_CELLS, max(1, math.ceil(ramp_time / step)))
+        step = ramp_time / cells
+        velocities = array('d', (velocity(i * step) for i in range(cells + 1)))
+        distances = array('d', bytes(8 * (cells + 1)))
+        total = 0.0
+        for i in range(cells):
+            middle = velocity((i + 0.5) * step)
+            total += step * (velocities[i] + 4.0 * middle + velocities[i + 1]) / 6.0
+            distances[i + 1] = total
+
+        self.step = step
+        self.end_time = ramp_time
+        self.end_velocity = velocities[cells]
+        self.end_distance = total
+        self.velocities = velocities
+        self.distances = distances
+        self._inv_step = 1.0 / step
+        self._last_cell = cells - 1
+
+    def velocity_at(self, t: float) -> float:
+        """按住 t 秒时的瞬时速度（像素/秒）。"""
+        if t >= self.end_time:
+            return self.end_velocity
+        if t <= 0:
+            return self.velocities[0]
+        x = t * self._inv_step
+        # t 略小于 end_time 时 x 可能舍入到 cells，下标不能越过最后一格
+        i = min(int(x), self._last_cell)
+        v = self.velocities
+        return v[i] + (v[i + 1] - v[i]) * (x - i)
+
+    def distance_at(self, t: float) -> float:
+        """从 0 到 t 秒的累计滚动距离（像素），每帧的距离为两次调用之差。"""
+        if t >= self.end_time:
+            return self.end_distance + self.end_velocity * (t - self.end_time)
+        if t <= 0:
+            return 0.0
+        x = t * self._inv_step
+        # t 略小于 end_time 时 x 可能舍入到 cells，下标不能越过最后一格
+        i = min(int(x), self._last_cell)
+        d = self.distances
+        return d[i] + (d[i + 1] - d[i]) * (x - i)
+
+
+def linear_curve(initial_velocity: float, max_velocity: float, acceleration: float) -> ScrollCurve:
+    """线性加速曲线: min(max_velocity, initial_velocity + acceleration * t)"""
+    if acceleration <= 0 or initial_velocity >= max_velocity:
+        return ScrollCurve(lambda t: min(initial_velocity, max_velocity), 0.0)
+    span = max_velocity - initial_velocity
+    return ScrollCurve(lambda t: initial_velocity + acceleration * t, span / acceleration)
+
+
+def ease_in_curve(initial_velocity: float, max_velocity: float, acceleration: float,
+                  sharpness: float = EASE_IN_SHARPNESS) -> ScrollCurve:
+    """指数缓入曲线: 速度增量按 (e^(k*u) - 1) / (e^k - 1) 增长，u 为加速阶段的进度"""
+    if acceleration <= 0 or initial_velocity >= max_velocity:
+        return linear_curve(initial_velocity, max_velocity, acceleration)
+    span = max_velocity - initial_velocity
+    ramp_time = span / acceleration
+    scale = span / math.expm1(sharpness)
+    return ScrollCurve(lambda t: initial_velocity + scale * math.expm1(sharpness * t / ramp_time), ramp_time)
+
+
+def s_curve(initial_velocity: float, max_velocity: float, acceleration: float) -> ScrollCurve:
+    """S 形曲线: 速度增量按 smoothstep 3u^2 - 2u^3 增长，u 为加速阶段的进度"""
+    if acceleration <= 0 or initial_velocity >= max_velocity:
+        return linear_curve(initial_velocity, max_velocity, acceleration)
+    span = max_velocity - initial_velocity
+    ramp_time = span / acceleration
+
+    def velocity(t: float) -> float:
+        u = t / ramp_time
+        return initial_velocity + span * u * u * (3.0 - 2.0 * u)
+
+    return ScrollCurve(velocity, ramp_time)
+
+
+def table_curve(points: Sequence[Tuple[float, float]]) -> ScrollCurve:
+    """
+    由 (时间, 速度) 点构成的分段线性曲线。
+
+    第一个点之前速度为第一个点的速度，最后一个点之后速度保持不变。
+
+    Raises:
+        ValueError: 点为空、时间为负或不严格递增、速度为负时抛出
+    """
+    if not points:
+        raise ValueError("滚动曲线至少需要一个 (时间, 速度) 点！")
+    times = [t for t, _ in points]
+    speeds = [v for _, v in points]
+    if times[0] < 0 or any(b <= a for a, b in zip(times, times[1:])):
+        raise ValueError("滚动曲线各点的时间必须非负且严格递增！")
+    if any(v < 0 for v in speeds):
+        raise ValueError("滚动曲线各点的速度不能为负！")
+
+    def velocity(t: float) -> float:
+        if t <= times[0]:
+            return speeds[0]
+        for i in range(1, len(times)):
+            if t <= times[i]:
+                u = (t - times[i - 1]) / (times[i] - times[i - 1])
+                return speeds[i - 1] + (speeds[i] - speeds[i - 1]) * u
+        return speeds[-1]
+
+    return ScrollCurve(velocity, times[-1])
+
+
+def parse_curve_points(text: str) -> List[Tuple[float, float]]:
+    """
+    解析 curve_points 配置，格式为以逗号分隔的 时间:速度，例如 "0:150, 0.5:400, 1.5:1500"。
+
+    Raises:
+        ValueError: 格式无效时抛出
+    """
+    points = []
+    for item in text.split(','):
+        item = item.strip()
+        if not item:
+            continue
+        t, sep, v = item.partition(':')
+        if not sep:
+            raise ValueError(f"无效的滚动曲线点 '{item}'，应为 时间:速度！")
+        points.append((float(t), float(v)))
+    return points
+
+
+def build_scroll_curve(name: str, initial_velocity: float, max_velocity: float,
+                       acceleration: float, points: Sequence[Tuple[float, float]] = ()) -> ScrollCurve:
+    """
+    按名称编译滚动曲线。
+
+    Raises:
+        ValueError: 曲线名称未知，或 table 曲线的点无效时抛出
+    """
+    if name == 'linear':
+        return linear_curve(initial_velocity, max_velocity, acceleration)
+    if name == 'ease_in':
+        return ease_in_curve(initial_velocity, max_velocity, acceleration)
+    if name == 's_curve':
+        return s_curve(initial_velocity, max_velocity, acceleration)
+    if name == 'table':
+        return table_curve(points)
+    raise ValueError(f"未知的滚动曲线 '{name}'，可选: {', '.join(CURVE_NAMES)}")
@@ -0,0 +1,96 @@
+"""区域选择器进程间通信协议
+
+主程序与常驻区域选择器进程通过子进程的 stdin/stdout 交换消息，激活路径上不读写任何文件。
+每条消息是一帧: 4 字节大端无符号长度，后跟该长度的 UTF-8 JSON 对象，
+对象的 "type" 字段为消息类型。
+
+主程序 -> 选择器:
+    {"type": "layout", "layout": [[...], ...],   设置网格布局，启动后必须先发送，之后可以随时更新；
+     "depth": <int>, "min_cell_size": <float>}   depth 和 min_cell_size 可省略，含义见 region_selector.selection_depth
+    {"type": "activate"}                         显示网格，开始一次选择
+选择器 -> 主程序:
+    {"type": "ready"}                            收到布局并完成初始化，可以接受 activate
+    {"type": "shown"}                            网格已显示（用于测量激活延迟）
+    {"type": "result", "x": <float>, "y": <float>}  选择完成，光标应移动到的屏幕坐标
+    {"type": "cancel"}                           选择被取消
+主程序关闭 stdin 时选择器进程退出。
+"""
+
+import json
+import struct
+from typing import Any, BinaryIO, Dict, Optional
+
+MSG_LAYOUT = 'layout'
+MSG_ACTIVATE = 'activate'
+MSG_READY = 'ready'
+MSG_SHOWN = 'shown'
+MSG_RESULT = 'result'
+MSG_CANCEL = 'cancel'
+
+# 帧头: 4 字节大端无符号长度
+_HEADER = struct.Struct('>I')
+# 单帧允许的最大长度（字节），超过时视为数据流损坏
+MAX_FRAME_SIZE = 1 << 20
+
+Message = Dict[str, Any]
+
+
+class ProtocolError(Exception):
+    """数据流中出现无法解析的帧"""
+
+
+def encode_message(message: Message) -> bytes:
+    """把一条消息编码为一帧。"""
+    payload = json.dumps(message, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    if len(payload) > MAX_FRAME_SIZE:
+        raise ProtocolError(f"消息过长: {len(payload)} 字节")
+    return _HEADER.pack(len(payload)) + payload
+
+
+def write_message(stream: BinaryIO, message: Message) -> None:
+    """向二进制流写入一条消息并立即刷新。"""
+    stream.write(encode_message(message))
+    stream.flush()
+
+
+def _read_exact(stream: BinaryIO, size: int) -> Optional[bytes]:
+    """读取恰好 size 字节；在帧边界处遇到流结束时返回 None。"""
+    chunks = []
+    remaining = size
+    while remaining:
+        chunk = stream.read(remaining)
+        if not chunk:
+            if remaining == size:
+                return None
+            raise ProtocolError("数据流在帧中间结束")
+        chunks.append(chunk)
+        remaining -= len(chunk)
+    return b''.join(chunks)
+
+
+def read_message(stream: BinaryIO) -> Optional[Message]:
+    """
+    从二进制流读取一条消息。
+
+    Returns:
+        解码后的消息；流正常结束（对端关闭）时返回 None
+
+    Raises:
+        ProtocolError: 帧不完整、过长或内容不是带 type 字段的 JSON 对象时抛出
+    """
+    header = _read_exact(stream, _HEADER.size)
+    if header is None:
+        return None
+    (length,) = _HEADER.unpack(header)
+    if length > MAX_FRAME_SIZE:
+        raise ProtocolError(f"帧长度无效: {length} 字节")
+    payload = _read_exact(stream, length) if length else b''
+    if payload is None:
+        raise ProtocolError("数据流在帧中间结束")
+    try:
+        message = json.loads(payload.decode('utf-8'))
+    except (UnicodeDecodeError, ValueError) as e:
+        raise ProtocolError(f"无法解析消息: {e}") from e
+    if not isinstance(message, dict) or not isinstance(message.get('type'), str):
+        raise ProtocolError(f"消息缺少 type 字段: {message!r}")
+    return message
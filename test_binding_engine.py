@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""测试按键绑定引擎
+
+绑定文本由 config_loader.parse_binding 解析，覆盖前缀冲突、序列超时、
+修饰键的精确匹配与左右区分，以及按住不放时的重复按下。
+"""
+
+import unittest
+
+from binding_engine import BindingMatcher, BindingTrie
+from config_loader import parse_binding
+from utool import MOD_LALT, MOD_LCTRL, MOD_LSHIFT, MOD_RALT, MOD_RCTRL
+
+VK_A, VK_B, VK_G, VK_I, VK_LSHIFT = 0x41, 0x42, 0x47, 0x49, 0xA0
+TIMEOUT = 1.0
+
+
+def compile_bindings(*bindings):
+    """(绑定文本, 动作名) -> 前缀树，按给出的顺序作为优先级"""
+    return BindingTrie([(parse_binding(text), action, text) for text, action in bindings])
+
+
+class BindingEngineTest(unittest.TestCase):
+
+    def matcher(self, *bindings, **kwargs):
+        return BindingMatcher({'mode': compile_bindings(*bindings)}, TIMEOUT, **kwargs)
+
+    def test_prefix_conflicts_are_rejected(self):
+        with self.assertRaises(ValueError):
+            compile_bindings(('g', 'single'), ('g i', 'sequence'))
+        with self.assertRaises(ValueError):
+            compile_bindings(('g i', 'sequence'), ('g', 'single'))
+        # 完全相同的绑定保留优先级高的动作
+        trie = compile_bindings(('i', 'first'), ('i', 'second'))
+        self.assertEqual(BindingMatcher({'mode': trie}, TIMEOUT).feed('mode', VK_I, True, 0, 0.0),
+                         ('first', True))
+
+    def test_sequence_and_timeout(self):
+        matcher = self.matcher(('g i', 'sequence'))
+        self.assertEqual(matcher.feed('mode', VK_G, True, 0, 0.0), (None, True))
+        self.assertEqual(matcher.feed('mode', VK_G, False, 0, 0.1), (None, True))
+        self.assertEqual(matcher.feed('mode', VK_I, True, 0, 0.5), ('sequence', True))
+        self.assertEqual(matcher.feed('mode', VK_I, False, 0, 0.6), ('sequence', True))
+
+        # 两键间隔超过超时后从头匹配，第二个键不再完成序列
+        matcher.feed('mode', VK_G, True, 0, 10.0)
+        matcher.feed('mode', VK_G, False, 0, 10.1)
+        self.assertEqual(matcher.feed('mode', VK_I, True, 0, 10.0 + TIMEOUT + 0.1), (None, False))
+
+    def test_modifier_does_not_break_sequence(self):
+        matcher = self.matcher(('g <shift>+i', 'sequence'))
+        matcher.feed('mode', VK_G, True, 0, 0.0)
+        self.assertEqual(matcher.feed('mode', VK_LSHIFT, True, 0, 0.1), (None, False))
+        self.assertEqual(matcher.feed('mode', VK_I, True, MOD_LSHIFT, 0.2), ('sequence', True))
+
+    def test_modifiers_match_exactly(self):
+        matcher = self.matcher(('<ctrl>+a', 'ctrl_a'), ('b', 'bare'))
+        self.assertEqual(matcher.feed('mode', VK_A, True, 0, 0.0), (None, False))
+        # 多按了一个修饰键时组合键不匹配
+        self.assertEqual(matcher.feed('mode', VK_A, True, MOD_LCTRL | MOD_LSHIFT, 0.0), (None, False))
+        self.assertEqual(matcher.feed('mode', VK_A, True, MOD_LCTRL, 0.0), ('ctrl_a', True))
+        # 不带修饰键的单键忽略修饰键状态
+        self.assertEqual(matcher.feed('mode', VK_B, True, MOD_LSHIFT, 0.0), ('bare', True))
+
+    def test_left_and_right_modifiers(self):
+        matcher = self.matcher(('<ralt>+a', 'right_alt_a'), ('<ctrl>+b', 'ctrl_b'))
+        self.assertEqual(matcher.feed('mode', VK_A, True, MOD_LALT, 0.0), (None, False))
+        self.assertEqual(matcher.feed('mode', VK_A, True, MOD_RALT, 0.0), ('right_alt_a', True))
+        # 不区分左右的修饰键: 左、右或两侧同时按下都匹配
+        for state in (MOD_LCTRL, MOD_RCTRL, MOD_LCTRL | MOD_RCTRL):
+            with self.subTest(state=state):
+                matcher.feed('mode', VK_B, False, state, 0.0)
+                self.assertEqual(matcher.feed('mode', VK_B, True, state, 0.0), ('ctrl_b', True))
+
+    def test_exact_state_takes_priority_over_bare_key(self):
+        # <shift>+g 是序列前缀，按 Shift+G 时不能触发不带修饰键的 g
+        matcher = self.matcher(('g', 'bare'), ('<shift>+g i', 'sequence'))
+        self.assertEqual(matcher.feed('mode', VK_G, True, MOD_LSHIFT, 0.0), (None, True))
+        self.assertEqual(matcher.feed('mode', VK_I, True, MOD_LSHIFT, 0.1), ('sequence', True))
+        self.assertEqual(matcher.feed('mode', VK_G, True, 0, 0.2), ('bare', True))
+
+    def test_repeated_key_down(self):
+        matcher = self.matcher(('i', 'move'))
+        self.assertEqual(matcher.feed('mode', VK_I, True, 0, 0.0), ('move', True))
+        # 自动重复的按下被拦截，但不重复触发动作
+        self.assertEqual(matcher.feed('mode', VK_I, True, 0, 0.03), (None, True))
+        self.assertEqual(matcher.feed('mode', VK_I, True, 0, 0.06), (None, True))
+        self.assertEqual(matcher.feed('mode', VK_I, False, 0, 0.1), ('move', True))
+        self.assertEqual(matcher.feed('mode', VK_I, True, 0, 0.2), ('move', True))
+
+    def test_unsuppressed_prefix_and_unknown_context(self):
+        matcher = self.matcher(('g i', 'sequence'), suppress_prefix={'mode': False})
+        self.assertEqual(matcher.feed('mode', VK_G, True, 0, 0.0), (None, False))
+        self.assertEqual(matcher.feed('mode', VK_G, False, 0, 0.1), (None, False))
+        self.assertEqual(matcher.feed('mode', VK_I, True, 0, 0.2), ('sequence', True))
+        self.assertEqual(matcher.feed('mode', VK_I, False, 0, 0.3), ('sequence', True))
+        # 没有前缀树的上下文不匹配任何按键
+        self.assertEqual(matcher.feed('other', VK_I, True, 0, 0.4), (None, False))
+
+
+if __name__ == '__main__':
+    unittest.main()
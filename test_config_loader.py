@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""测试配置加载
+
+以仓库中的 config.ini 为模板，改写个别配置项后写入临时目录再加载。
+"""
+
+import configparser
+import os
+import tempfile
+import unittest
+
+from config_loader import AppConfig
+from ini_writer import write_config
+
+SHIPPED_CONFIG = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'config.ini')
+VK_A, VK_F12 = 0x41, 0x7B
+# RegisterHotKey 的修饰键标志
+OS_MOD_ALT, OS_MOD_CONTROL = 0x0001, 0x0002
+
+
+def load_config(**sections):
+    """按 {节名: {配置项: 值}} 改写默认配置并加载"""
+    parser = configparser.ConfigParser()
+    parser.read(SHIPPED_CONFIG, encoding='utf-8')
+    for section, options in sections.items():
+        for option, value in options.items():
+            parser.set(section, option, value)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'config.ini')
+        with open(SHIPPED_CONFIG, encoding='utf-8') as src, open(path, 'w', encoding='utf-8') as dst:
+            dst.write(src.read())
+        write_config(path, parser)
+        return AppConfig(path)
+
+
+class HotkeySettingsTest(unittest.TestCase):
+
+    def test_default_hotkey_is_registrable(self):
+        config = load_config()
+        self.assertTrue(config.HOTKEY_REGISTRABLE)
+        self.assertEqual((config.HOTKEY_OS_MODIFIERS, config.HOTKEY_TRIGGER_VK), (OS_MOD_ALT, VK_A))
+        self.assertEqual(config.HOTKEY_MODIFIERS, ['alt'])
+
+    def test_leader_alias_is_not_registered_as_bare_key(self):
+        config = load_config(Keybindings={'leader': '<alt>+a', 'toggle_mode_hotkey': 'leader'})
+        self.assertFalse(config.HOTKEY_REGISTRABLE)
+        # 修饰键来自展开后的绑定，而不是原始文本 "leader"
+        self.assertEqual(config.HOTKEY_MODIFIERS, ['alt'])
+        self.assertEqual(config.HOTKEY_OS_MODIFIERS, OS_MOD_ALT)
+        self.assertEqual(config.HOTKEY_TRIGGER_VK, VK_A)
+
+    def test_sequences_and_sided_modifiers_are_not_registrable(self):
+        config = load_config(Keybindings={'toggle_mode_hotkey': '<ctrl>+a f12'})
+        self.assertFalse(config.HOTKEY_REGISTRABLE)
+        self.assertEqual(config.HOTKEY_TRIGGER_VK, VK_F12)
+
+        config = load_config(Keybindings={'toggle_mode_hotkey': '<ralt>+<ctrl>+a'})
+        self.assertFalse(config.HOTKEY_REGISTRABLE)
+        self.assertEqual(config.HOTKEY_MODIFIERS, ['ctrl', 'ralt'])
+        self.assertEqual(config.HOTKEY_OS_MODIFIERS, OS_MOD_CONTROL)
+
+    def test_bare_key_hotkey(self):
+        config = load_config(Keybindings={'toggle_mode_hotkey': 'f12'})
+        self.assertTrue(config.HOTKEY_REGISTRABLE)
+        self.assertEqual((config.HOTKEY_OS_MODIFIERS, config.HOTKEY_TRIGGER_VK), (0, VK_F12))
+
+
+class KineticScrollingTest(unittest.TestCase):
+
+    def test_friction_and_stop_velocity_must_be_positive(self):
+        for option in ('kinetic_friction', 'kinetic_stop_velocity'):
+            for value in ('0', '-5'):
+                with self.subTest(option=option, value=value):
+                    with self.assertRaisesRegex(ValueError, option):
+                        load_config(SmoothScrolling={'kinetic': 'true', option: value})
+
+    def test_values_are_only_checked_when_kinetic_is_enabled(self):
+        config = load_config(SmoothScrolling={'kinetic': 'false', 'kinetic_stop_velocity': '0'})
+        self.assertEqual(config.SCROLL_KINETIC_STOP_VELOCITY, 0.0)
+        config = load_config(SmoothScrolling={'kinetic': 'true', 'kinetic_stop_velocity': '12.5'})
+        self.assertEqual(config.SCROLL_KINETIC_STOP_VELOCITY, 12.5)
+
+
+if __name__ == '__main__':
+    unittest.main()
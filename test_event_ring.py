@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""测试钩子事件环形缓冲区
+
+单生产者/单消费者: 记录按写入顺序取出，写指针绕过容量后槽位复用，写满时丢弃并计数。
+"""
+
+import threading
+import unittest
+
+from event_ring import EVENT_ACTION, EventRing
+
+
+def record(i):
+    return (EVENT_ACTION, f'action{i}', i % 2 == 0)
+
+
+class EventRingTest(unittest.TestCase):
+
+    def test_capacity_rounds_up_to_power_of_two(self):
+        self.assertEqual(EventRing(5).capacity, 8)
+        self.assertEqual(EventRing(8).capacity, 8)
+
+    def test_fifo_across_wraparound(self):
+        ring = EventRing(4)
+        popped = []
+        # 写读交错，读写计数多次越过容量
+        for i in range(10):
+            self.assertTrue(ring.push(record(i)))
+            self.assertTrue(ring.push(record(100 + i)))
+            popped.append(ring.pop())
+            popped.append(ring.pop())
+        self.assertIsNone(ring.pop())
+        expected = [r for i in range(10) for r in (record(i), record(100 + i))]
+        self.assertEqual(popped, expected)
+        self.assertEqual(ring.get_stats()['max_depth'], 2)
+
+    def test_overflow_drops_newest(self):
+        ring = EventRing(4)
+        for i in range(6):
+            ring.push(record(i))
+        stats = ring.get_stats()
+        self.assertEqual((stats['depth'], stats['pushed'], stats['overflow']), (4, 4, 2))
+        # 已写入的记录不受影响，溢出的记录被丢弃
+        self.assertEqual([ring.pop() for _ in range(4)], [record(i) for i in range(4)])
+        self.assertTrue(ring.push(record(9)))
+        self.assertEqual(ring.pop(), record(9))
+
+    def test_wait(self):
+        ring = EventRing()
+        self.assertFalse(ring.wait(timeout=0.01))
+        ring.push(record(0))
+        self.assertTrue(ring.wait(timeout=0))
+        ring.pop()
+        # notify 只唤醒等待者，不产生记录
+        ring.notify()
+        self.assertIsNone(ring.pop())
+
+    def test_threaded_producer_consumer(self):
+        ring = EventRing(16)
+        total = 20000
+        received = []
+
+        def consume():
+            while len(received) < total:
+                item = ring.pop()
+                if item is None:
+                    ring.wait(timeout=0.1)
+                    continue
+                received.append(item[1])
+
+        consumer = threading.Thread(target=consume)
+        consumer.start()
+        for i in range(total):
+            # 缓冲区满时生产者重试，验证顺序而不是溢出
+            while not ring.push((EVENT_ACTION, i, True)):
+                pass
+        consumer.join(10)
+        self.assertEqual(received, list(range(total)))
+
+
+if __name__ == '__main__':
+    unittest.main()
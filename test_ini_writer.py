@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""测试保留注释的配置文件写入"""
+
+import configparser
+import os
+import unittest
+
+from ini_writer import render_config
+
+ORIGINAL = """[Keybindings]
+move_up = i
+scroll_left = u
+
+[Settings]
+; 区域选择器在主程序内运行
+region_select_in_process = false
+mouse_move_speed = 20
+
+[SmoothScrolling]
+curve = linear
+; curve_points = 0:150, 0.5:400, 1.5:1500
+"""
+
+
+def parse(text):
+    parser = configparser.ConfigParser()
+    parser.read_string(text)
+    return parser
+
+
+class RenderConfigTest(unittest.TestCase):
+
+    def test_unchanged_parser_reproduces_file(self):
+        self.assertEqual(render_config(ORIGINAL, parse(ORIGINAL)), ORIGINAL)
+
+    def test_changes_keep_comments(self):
+        parser = parse(ORIGINAL)
+        parser.set('Keybindings', 'move_up', 'w')
+        parser.set('Keybindings', 'scroll_right', 'o')
+        parser.remove_option('Settings', 'mouse_move_speed')
+        parser.set('Settings', 'mouse_move_velocity', '2000.0')
+        text = render_config(ORIGINAL, parser)
+
+        self.assertIn("; 区域选择器在主程序内运行\n", text)
+        self.assertIn("; curve_points = 0:150, 0.5:400, 1.5:1500\n", text)
+        self.assertNotIn("mouse_move_speed", text)
+        # 新配置项追加在所在节的末尾、节之间的空行之前
+        self.assertIn("move_up = w\nscroll_left = u\nscroll_right = o\n\n[Settings]", text)
+        self.assertIn("region_select_in_process = false\nmouse_move_velocity = 2000.0\n\n", text)
+        # 写出的文本与解析器内容一致
+        reparsed = parse(text)
+        for section in parser.sections():
+            self.assertEqual(dict(reparsed.items(section)), dict(parser.items(section)))
+
+    def test_new_section_is_appended(self):
+        parser = parse(ORIGINAL)
+        parser.add_section('RegionSelectLayout')
+        parser.set('RegionSelectLayout', 'row1', '1 2 3')
+        text = render_config(ORIGINAL, parser)
+        self.assertTrue(text.endswith("\n\n[RegionSelectLayout]\nrow1 = 1 2 3\n"), text)
+
+    def test_shipped_config_round_trips(self):
+        path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'config.ini')
+        with open(path, encoding='utf-8') as f:
+            original = f.read()
+        self.assertEqual(render_config(original, parse(original)), original)
+
+
+if __name__ == '__main__':
+    unittest.main()
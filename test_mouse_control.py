@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""无界面地测试 MouseControl 的按键处理
+
+按键由 ScriptedSource 回放给 handle_key_event，鼠标输出写入 RecordingBackend，
+钩子事件记录在测试线程中同步处理，不需要键盘钩子或图形界面。
+"""
+
+import copy
+import threading
+import time
+import unittest
+from unittest import mock
+
+import config_loader
+from input_source import ScriptedSource
+from main import MouseControl
+from modeswitch import AppMode
+from output_backend import RecordingBackend
+from tick_governor import TickTier
+
+# 与默认 config.ini 一致的虚拟键码
+VK_A, VK_L, VK_M, VK_SEMICOLON, VK_LALT = 0x41, 0x4C, 0x4D, 0xBA, 0xA4
+
+
+class SteppedTimer:
+    """代替 PrecisionTimer: 每一帧把假时钟推进到给定的时长，回放完毕后停止工作线程"""
+
+    def __init__(self, frame_times, stop_event):
+        self.now = 0.0
+        self.frame_times = list(frame_times)
+        self.stop_event = stop_event
+
+    def perf_counter(self):
+        return self.now
+
+    def next_deadline(self, deadline, interval):
+        return self.now + self.frame_times.pop(0)
+
+    def sleep_until(self, deadline, wake_event=None):
+        self.now = deadline
+        if not self.frame_times:
+            self.stop_event.set()
+
+    def get_stats(self):
+        return {}
+
+
+class MouseControlTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.config = config_loader.AppConfig()
+
+    def setUp(self):
+        self.control = MouseControl(self.config, output_factory=RecordingBackend)
+        self.output = self.control.mouse_action.output
+
+    def play(self, events):
+        """回放按键并处理钩子写入的事件记录，返回每个事件的拦截结果"""
+        decisions = ScriptedSource(events).run(self.control.handle_key_event)
+        ring = self.control.event_ring
+        record = ring.pop()
+        while record is not None:
+            self.control._process_hook_event(*record)
+            record = ring.pop()
+        return decisions
+
+    def test_normal_mode_passes_keys_through(self):
+        self.assertEqual(self.play([(VK_L, True), (VK_L, False)]), [False, False])
+        self.assertFalse(self.control.active_direction_keys)
+        self.assertEqual(self.control.event_ring.get_stats()['pushed'], 0)
+
+    def test_hotkey_enters_mouse_control(self):
+        decisions = self.play([(VK_LALT, True), (VK_A, True), (VK_A, False), (VK_LALT, False)])
+        self.assertIs(self.control.mode_switch.current_mode, AppMode.MOUSE_CONTROL)
+        # 修饰键本身不拦截，触发键的按下和释放都拦截
+        self.assertEqual(decisions, [False, True, True, False])
+
+    def test_direction_key_and_repeat_collapsing(self):
+        self.control.mode_switch.set_mode(AppMode.MOUSE_CONTROL)
+        self.play([(VK_L, True), (VK_L, True), (VK_L, True)])
+        self.assertEqual(self.control.active_direction_keys, {self.config.MOVE_RIGHT_CHAR})
+        self.assertEqual(self.play([(VK_L, False)]), [True])
+        self.assertFalse(self.control.active_direction_keys)
+
+        stats = self.control.get_hook_stats()
+        # 自动重复的按下直接拦截，不写入事件记录
+        self.assertEqual(stats['repeat_collapsed'], 2)
+        self.assertEqual(stats['pushed'], 2)
+
+    def test_click_is_sent_to_backend(self):
+        self.control.mode_switch.set_mode(AppMode.MOUSE_CONTROL)
+        self.assertEqual(self.play([(VK_SEMICOLON, True), (VK_SEMICOLON, False)]), [True, True])
+        self.assertEqual([(e.kind, e.button) for e in self.output.events],
+                         [('press', 'left'), ('release', 'left')])
+
+    def test_movement_worker_moves_held_direction(self):
+        self.control.mode_switch.set_mode(AppMode.MOUSE_CONTROL)
+        self.play([(VK_L, True)])
+        stop_event = threading.Event()
+        worker = threading.Thread(target=self.control.mouse_action.mouse_movement_worker,
+                                  args=(stop_event,))
+        worker.start()
+        time.sleep(0.1)
+        stop_event.set()
+        self.control.mouse_action.wake()
+        worker.join(1)
+        self.assertFalse(worker.is_alive())
+
+        dx, dy = self.output.total('move')
+        self.assertGreater(dx, 0)
+        self.assertEqual(dy, 0)
+
+    def run_frames(self, frame_times, velocity):
+        """按给定的帧时长同步运行工作线程的循环，返回光标的总位移"""
+        action = self.control.mouse_action
+        action.config = copy.copy(self.config)
+        action.config.MOUSE_MOVE_VELOCITY = velocity
+        stop_event = threading.Event()
+        timer = action.tick_timer = SteppedTimer(frame_times, stop_event)
+        with mock.patch('main.time.perf_counter', timer.perf_counter):
+            action.mouse_movement_worker(stop_event)
+        return self.output.total('move')
+
+    def test_sub_pixel_motion_accumulates(self):
+        # 每帧 0.3 像素: 单帧取整会一直是 0，累加器保证 1 秒后走满 30 像素
+        # （第一帧的时长为 0，101 帧共经过 1 秒）
+        self.control.mode_switch.set_mode(AppMode.MOUSE_CONTROL)
+        self.play([(VK_L, True)])
+        dx, dy = self.run_frames([0.01] * 101, velocity=30.0)
+        self.assertIn(dx, (29, 30))
+        self.assertEqual(dy, 0)
+
+    def test_distance_is_frame_rate_independent(self):
+        # 两种帧时长都共经过 0.95 秒，位移只取决于时间
+        self.control.mode_switch.set_mode(AppMode.MOUSE_CONTROL)
+        self.play([(VK_L, True)])
+        uneven = self.run_frames([0.004, 0.021, 0.009, 0.016, 0.05] * 10, velocity=1234.0)[0]
+        self.output.clear()
+        even = self.run_frames([0.01] * 96, velocity=1234.0)[0]
+        self.assertAlmostEqual(uneven, 1234.0 * 0.95, delta=1)
+        self.assertAlmostEqual(even, 1234.0 * 0.95, delta=1)
+
+    def wait_for(self, condition, timeout=1.0):
+        """轮询等待条件成立"""
+        deadline = time.perf_counter() + timeout
+        while not condition():
+            self.assertLess(time.perf_counter(), deadline, "等待超时")
+            time.sleep(0.005)
+
+    def test_movement_worker_parks_without_motion(self):
+        self.control.mode_switch.set_mode(AppMode.MOUSE_CONTROL)
+        action = self.control.mouse_action
+        stop_event = threading.Event()
+        worker = threading.Thread(target=action.mouse_movement_worker, args=(stop_event,))
+        worker.start()
+        try:
+            # 没有运动源时工作线程阻塞在唤醒事件上，不再计帧
+            time.sleep(0.05)
+            ticks = action.tick_timer.tick_count
+            time.sleep(0.1)
+            self.assertEqual(action.tick_timer.tick_count, ticks)
+            self.assertFalse(self.output.events)
+
+            # 方向键的动作唤醒工作线程，松开后重新休眠
+            self.play([(VK_L, True)])
+            self.wait_for(lambda: self.output.total('move')[0] > 0)
+            self.play([(VK_L, False)])
+            time.sleep(0.05)
+            ticks = action.tick_timer.tick_count
+            time.sleep(0.1)
+            self.assertEqual(action.tick_timer.tick_count, ticks)
+
+            # 区域选择的结果通过动作队列唤醒工作线程
+            self.control._on_region_selected((100, 200))
+            self.wait_for(lambda: any(e.kind == 'move_to' for e in self.output.events))
+            self.assertEqual([(e.x, e.y) for e in self.output.events if e.kind == 'move_to'],
+                             [(100, 200)])
+        finally:
+            stop_event.set()
+            action.wake()
+            worker.join(1)
+        self.assertFalse(worker.is_alive())
+
+    def assert_moves_promptly(self):
+        """按下方向键后，光标应在约一个 MOVE 间隔内开始移动"""
+        start = time.perf_counter()
+        self.play([(VK_L, True)])
+        self.wait_for(lambda: self.output.total('move')[0] > 0)
+        self.assertLess(time.perf_counter() - start, 0.1)
+
+    def start_worker(self):
+        action = self.control.mouse_action
+        stop_event = threading.Event()
+        worker = threading.Thread(target=action.mouse_movement_worker, args=(stop_event,))
+        worker.start()
+
+        def stop():
+            stop_event.set()
+            action.wake()
+            worker.join(1)
+        self.addCleanup(stop)
+
+    def test_direction_key_after_region_select_is_not_delayed(self):
+        self.control.mode_switch.set_mode(AppMode.MOUSE_CONTROL)
+        self.control.mode_switch.set_mode(AppMode.REGION_SELECT)
+        # 把较慢档位的间隔拉长到 0.5 秒，等待不可打断时测试必然超时
+        self.control.mouse_action.tick_governor.intervals[TickTier.IDLE] = 0.5
+        self.start_worker()
+        # 区域选择结果让工作线程进入 IDLE 档位处理 move_to
+        self.control._on_region_selected((100, 200))
+        self.wait_for(lambda: any(e.kind == 'move_to' for e in self.output.events))
+        self.assert_moves_promptly()
+
+    def test_direction_key_interrupts_scroll_tick(self):
+        self.control.mode_switch.set_mode(AppMode.MOUSE_CONTROL)
+        self.control.mouse_action.tick_governor.intervals[TickTier.SCROLL] = 0.5
+        self.start_worker()
+        self.play([(VK_M, True)])
+        self.wait_for(lambda: self.control.mouse_action.tick_governor.current_tier is TickTier.SCROLL)
+        self.assert_moves_promptly()
+
+
+if __name__ == '__main__':
+    unittest.main()
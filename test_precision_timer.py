@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""测试高精度定时器的截止时间计算与自校准
+
+截止时间按上一个截止时间累加，不随处理耗时漂移；落后超过一个完整间隔时重新对齐。
+"""
+
+import threading
+import time
+import unittest
+from unittest import mock
+
+from precision_timer import PrecisionTimer
+
+
+def at(now):
+    """把 time.perf_counter 固定为 now"""
+    return mock.patch('precision_timer.time.perf_counter', return_value=now)
+
+
+class NextDeadlineTest(unittest.TestCase):
+
+    def test_accumulates_from_previous_deadline(self):
+        timer = PrecisionTimer()
+        # 处理耗时不影响下一个截止时间，误差不会逐帧累积
+        with at(100.004):
+            self.assertAlmostEqual(timer.next_deadline(100.0, 0.01), 100.01)
+        # 稍微落后（不足一个间隔）时仍按原节奏追赶
+        with at(100.025):
+            self.assertAlmostEqual(timer.next_deadline(100.01, 0.01), 100.02)
+        self.assertEqual(timer.resync_count, 0)
+
+    def test_resyncs_when_more_than_one_interval_behind(self):
+        timer = PrecisionTimer()
+        with at(100.5):
+            self.assertAlmostEqual(timer.next_deadline(100.0, 0.01), 100.51)
+        self.assertEqual(timer.resync_count, 1)
+
+
+class CalibrationTest(unittest.TestCase):
+
+    def test_margin_follows_observed_overshoot(self):
+        timer = PrecisionTimer(max_spin_margin=0.002, min_spin_margin=0.0002, calibration_rate=0.5)
+        for _ in range(50):
+            timer._calibrate(0.0005)
+        # 超时稳定时偏差趋于 0，余量收敛到平均超时
+        self.assertAlmostEqual(timer.spin_margin, 0.0005, places=6)
+
+    def test_margin_is_clamped(self):
+        timer = PrecisionTimer(max_spin_margin=0.002, min_spin_margin=0.0002, calibration_rate=1.0)
+        timer._calibrate(0.05)
+        self.assertEqual(timer.spin_margin, 0.002)
+        for _ in range(20):
+            timer._calibrate(0.0)
+        self.assertEqual(timer.spin_margin, 0.0002)
+
+
+class SleepUntilTest(unittest.TestCase):
+
+    def test_never_wakes_early(self):
+        timer = PrecisionTimer(max_spin_margin=0.002)
+        deadline = time.perf_counter()
+        for _ in range(5):
+            deadline = timer.next_deadline(deadline, 0.005)
+            jitter = timer.sleep_until(deadline)
+            self.assertGreaterEqual(jitter, 0.0)
+            self.assertGreaterEqual(time.perf_counter(), deadline)
+        self.assertEqual(timer.get_stats()['ticks'], 5)
+
+    def test_wake_event_interrupts_sleep(self):
+        timer = PrecisionTimer(max_spin_margin=0.002)
+        wake_event = threading.Event()
+        threading.Timer(0.02, wake_event.set).start()
+        start = time.perf_counter()
+        self.assertIsNone(timer.sleep_until(start + 1.0, wake_event))
+        self.assertLess(time.perf_counter() - start, 0.5)
+        # 提前唤醒不计入抖动统计
+        stats = timer.get_stats()
+        self.assertEqual((stats['ticks'], stats['interrupted']), (0, 1))
+        # 事件未设置时照常等到截止时间
+        wake_event.clear()
+        deadline = time.perf_counter() + 0.005
+        self.assertGreaterEqual(timer.sleep_until(deadline, wake_event), 0.0)
+
+    def test_jitter_statistics(self):
+        timer = PrecisionTimer(max_spin_margin=0.002)
+        for jitter in (0.0001, 0.0003, 0.005):
+            timer._record(jitter)
+        stats = timer.get_stats()
+        self.assertAlmostEqual(stats['mean_jitter'], 0.0018)
+        self.assertEqual(stats['max_jitter'], 0.005)
+        # 只有超过自旋余量上限的一帧算作迟到
+        self.assertEqual(stats['late_ticks'], 1)
+        timer.reset_stats()
+        self.assertEqual(timer.get_stats()['ticks'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""测试区域选择网格的算术
+
+格子边界由键的 (行, 列) 逐级等分得到，选择级数由 depth 或最小格子尺寸决定。
+"""
+
+import unittest
+
+from region_selector import MAX_DEPTH, cell_bounds, layout_index, selection_depth
+
+# 与默认 config.ini 的 [RegionSelectLayout] 一致
+LAYOUT = [
+    ['1', '2', '3', '4', '5'],
+    ['6', '7', '8', '9', '0'],
+    ['w', 'e', 'r', 't', 'y'],
+    ['z', 'x', 'c', 'v', 'b'],
+]
+ROWS, COLUMNS = 4, 5
+SCREEN_4K = (0, 0, 3840, 2160)
+
+
+class RegionGridTest(unittest.TestCase):
+
+    def test_layout_index(self):
+        index = layout_index(LAYOUT)
+        self.assertEqual(index['1'], (0, 0))
+        self.assertEqual(index['8'], (1, 2))
+        self.assertEqual(index['b'], (3, 4))
+        # 重复的键以第一次出现的位置为准
+        self.assertEqual(layout_index([['a', 'b'], ['b', 'a']]), {'a': (0, 0), 'b': (0, 1)})
+
+    def test_cell_bounds(self):
+        self.assertEqual(cell_bounds(SCREEN_4K, ROWS, COLUMNS, 0, 0), (0, 0, 768, 540))
+        self.assertEqual(cell_bounds(SCREEN_4K, ROWS, COLUMNS, 3, 4), (3072, 1620, 3840, 2160))
+
+    def test_path_refines_arithmetically(self):
+        # 每一级都选右下角，n 级之后的格子是屏幕右下角宽 W/5^n、高 H/4^n 的区域
+        bounds = SCREEN_4K
+        for level in range(1, 6):
+            bounds = cell_bounds(bounds, ROWS, COLUMNS, ROWS - 1, COLUMNS - 1)
+            with self.subTest(level=level):
+                self.assertAlmostEqual(bounds[2] - bounds[0], 3840 / COLUMNS ** level)
+                self.assertAlmostEqual(bounds[3] - bounds[1], 2160 / ROWS ** level)
+                self.assertAlmostEqual(bounds[2], 3840)
+                self.assertAlmostEqual(bounds[3], 2160)
+
+    def test_fixed_depth(self):
+        self.assertEqual(selection_depth(3840, 2160, ROWS, COLUMNS), 2)
+        self.assertEqual(selection_depth(3840, 2160, ROWS, COLUMNS, depth=3), 3)
+        self.assertEqual(selection_depth(3840, 2160, ROWS, COLUMNS, depth=0), 1)
+
+    def test_refine_until_cell_is_small(self):
+        # 4K: 第 3 级格子约 30.7x33.8 像素，第 4 级约 6.1x8.4 像素
+        self.assertEqual(selection_depth(3840, 2160, ROWS, COLUMNS, min_cell_size=20), 4)
+        self.assertEqual(selection_depth(3840, 2160, ROWS, COLUMNS, min_cell_size=40), 3)
+        # 1080p 的第 2 级格子为 76.8x67.5 像素
+        self.assertEqual(selection_depth(1920, 1080, ROWS, COLUMNS, min_cell_size=80), 2)
+        # 单列布局的宽度永远不会变小，级数受 MAX_DEPTH 限制
+        self.assertEqual(selection_depth(3840, 2160, 4, 1, min_cell_size=20), MAX_DEPTH)
+
+
+if __name__ == '__main__':
+    unittest.main()
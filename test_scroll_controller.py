@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""测试平滑滚动的积分与帧率无关
+
+按住滚动键同样时长时，以 50 Hz、100 Hz 和 1000 Hz 调用 update 滚动的总距离应当相同
+（误差不超过取整留下的 1 像素），并且等于速度曲线的解析积分。
+"""
+
+import unittest
+from types import SimpleNamespace
+
+from output_backend import RecordingBackend
+from scroll_controller import ScrollController
+from scroll_curves import linear_curve
+
+
+def make_config(initial_velocity, max_velocity, acceleration, kinetic_friction=0.0):
+    """构造只包含滚动设置的配置，与 AppConfig 一样编译线性加速曲线"""
+    return SimpleNamespace(
+        SCROLL_INITIAL_VELOCITY=initial_velocity,
+        SCROLL_MAX_VELOCITY=max_velocity,
+        SCROLL_ACCELERATION=acceleration,
+        SCROLL_CURVE=linear_curve(initial_velocity, max_velocity, acceleration),
+        SCROLL_KINETIC=kinetic_friction > 0,
+        SCROLL_KINETIC_FRICTION=kinetic_friction,
+        SCROLL_KINETIC_STOP_VELOCITY=30.0,
+    )
+
+
+# 与默认 config.ini 的 [SmoothScrolling] 一致
+CONFIG = make_config(150.0, 1500.0, 700.0)
+
+TICK_RATES_HZ = (50, 100, 1000)
+
+
+def expected_distance(cfg, duration):
+    """速度曲线 min(v_max, v0 + a*t) 在 [0, duration] 上的积分"""
+    t_cap = (cfg.SCROLL_MAX_VELOCITY - cfg.SCROLL_INITIAL_VELOCITY) / cfg.SCROLL_ACCELERATION
+    if duration <= t_cap:
+        return cfg.SCROLL_INITIAL_VELOCITY * duration + 0.5 * cfg.SCROLL_ACCELERATION * duration ** 2
+    ramp = cfg.SCROLL_INITIAL_VELOCITY * t_cap + 0.5 * cfg.SCROLL_ACCELERATION * t_cap ** 2
+    return ramp + cfg.SCROLL_MAX_VELOCITY * (duration - t_cap)
+
+
+def scroll_for(duration, rate_hz, start='start_scroll_down', cfg=CONFIG):
+    """以给定帧率按住滚动键 duration 秒，返回 (垂直总距离, 水平总距离)"""
+    backend = RecordingBackend()
+    controller = ScrollController(cfg, backend)
+    getattr(controller, start)()
+    ticks = round(duration * rate_hz)
+    for _ in range(ticks):
+        controller.update(1.0 / rate_hz)
+        backend.flush()
+    return backend.total('wheel')[0], backend.total('hwheel')[0]
+
+
+class TickRateIndependenceTest(unittest.TestCase):
+
+    def assert_same_distance(self, duration):
+        expected = expected_distance(CONFIG, duration)
+        totals = {rate: scroll_for(duration, rate)[0] for rate in TICK_RATES_HZ}
+        for rate, total in totals.items():
+            with self.subTest(rate_hz=rate):
+                # 向下滚动为负数；每个轴最多留下不足 1 像素的小数
+                self.assertLessEqual(abs(-total - expected), 1, totals)
+        self.assertLessEqual(max(totals.values()) - min(totals.values()), 1, totals)
+
+    def test_acceleration_phase(self):
+        # 默认参数下约 1.93 秒后到达最大速度，1 秒完全处于加速阶段
+        self.assert_same_distance(1.0)
+
+    def test_across_velocity_cap(self):
+        self.assert_same_distance(3.0)
+
+    def test_tick_straddling_velocity_cap(self):
+        # 到达最大速度的时刻落在 50 Hz 的一帧之内，该帧需要分段积分
+        cfg = make_config(100.0, 1000.0, 900.0 / 0.905)
+        expected = expected_distance(cfg, 2.0)
+        for rate in TICK_RATES_HZ:
+            with self.subTest(rate_hz=rate):
+                self.assertLessEqual(abs(scroll_for(2.0, rate, 'start_scroll_up', cfg)[0] - expected), 1)
+
+    def test_horizontal_axis(self):
+        expected = expected_distance(CONFIG, 2.0)
+        for rate in TICK_RATES_HZ:
+            with self.subTest(rate_hz=rate):
+                vertical, horizontal = scroll_for(2.0, rate, 'start_scroll_right')
+                self.assertEqual(vertical, 0)
+                self.assertLessEqual(abs(horizontal - expected), 1)
+
+    def test_irregular_ticks(self):
+        # 帧间隔抖动（例如定时器超时）不影响总距离
+        backend = RecordingBackend()
+        controller = ScrollController(CONFIG, backend)
+        controller.start_scroll_up()
+        pattern = (0.004, 0.019, 0.001, 0.016)
+        elapsed = 0.0
+        for i in range(200):
+            delta = pattern[i % len(pattern)]
+            controller.update(delta)
+            elapsed += delta
+        backend.flush()
+        self.assertLessEqual(abs(backend.total('wheel')[0] - expected_distance(CONFIG, elapsed)), 1)
+
+    def test_constant_velocity_without_acceleration(self):
+        cfg = make_config(400.0, 1500.0, 0.0)
+        for rate in TICK_RATES_HZ:
+            with self.subTest(rate_hz=rate):
+                self.assertLessEqual(abs(scroll_for(1.5, rate, 'start_scroll_up', cfg)[0] - 600), 1)
+
+
+class KineticScrollTest(unittest.TestCase):
+    """释放滚动键后的惯性滑行"""
+
+    FRICTION = 4.0
+
+    def glide(self, rate_hz, hold=1.0, glide=3.0, cfg=None):
+        """按住向下 hold 秒后释放，再滑行 glide 秒，返回 (滑行距离, 控制器)"""
+        cfg = cfg or make_config(150.0, 1500.0, 700.0, self.FRICTION)
+        backend = RecordingBackend()
+        controller = ScrollController(cfg, backend)
+        controller.start_scroll_down()
+        for _ in range(round(hold * rate_hz)):
+            controller.update(1.0 / rate_hz)
+        backend.flush()
+        held = backend.total('wheel')[0]
+        controller.stop_scroll_down()
+        for _ in range(round(glide * rate_hz)):
+            controller.update(1.0 / rate_hz)
+        backend.flush()
+        return backend.total('wheel')[0] - held, controller
+
+    def test_glide_distance_is_tick_rate_independent(self):
+        # 释放速度 850 像素/秒，滑行到停止速度 30 像素/秒为止的解析距离
+        release_v = 150.0 + 700.0 * 1.0
+        expected = (release_v - 30.0) / self.FRICTION
+        for rate in TICK_RATES_HZ:
+            with self.subTest(rate_hz=rate):
+                distance, controller = self.glide(rate)
+                # 滑行方向与释放前一致（向下为负）；停止速度落在帧内时多滑行不足一帧
+                self.assertLess(distance, 0)
+                self.assertLessEqual(abs(-distance - expected), 1 + 30.0 / rate, rate)
+                self.assertFalse(controller.is_wheeling())
+
+    def test_glide_keeps_controller_wheeling(self):
+        _, controller = self.glide(100, glide=0.1)
+        self.assertTrue(controller.is_wheeling())
+
+    def test_opposite_input_cancels_glide(self):
+        _, controller = self.glide(100, glide=0.1)
+        controller.start_scroll_up()
+        self.assertEqual(controller.y_glide, 0.0)
+        self.assertEqual(controller.y_direction, 1)
+
+    def test_disabled_by_default(self):
+        distance, controller = self.glide(100, cfg=CONFIG)
+        self.assertEqual(distance, 0)
+        self.assertFalse(controller.is_wheeling())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""测试滚动加速曲线的查找表
+
+查表得到的速度和累计距离应当与曲线的直接计算和数值积分一致，
+各曲线都在加速阶段末尾到达最大速度，并且之后保持匀速。
+"""
+
+import math
+import unittest
+
+from scroll_curves import (build_scroll_curve, ease_in_curve, linear_curve,
+                           parse_curve_points, s_curve, table_curve)
+
+V0, VMAX, ACCEL = 150.0, 1500.0, 700.0
+RAMP_TIME = (VMAX - V0) / ACCEL
+
+
+def integrate(velocity, t, steps=20000):
+    """梯形公式数值积分，作为查找表的参照"""
+    h = t / steps
+    return h * (sum(velocity(i * h) for i in range(1, steps)) + 0.5 * (velocity(0) + velocity(t)))
+
+
+class ScrollCurveTest(unittest.TestCase):
+
+    def test_linear_matches_closed_form(self):
+        curve = linear_curve(V0, VMAX, ACCEL)
+        for t in (0.0, 0.3337, 1.0, RAMP_TIME, 2.5):
+            with self.subTest(t=t):
+                ramp = min(t, RAMP_TIME)
+                expected = V0 * ramp + 0.5 * ACCEL * ramp ** 2 + VMAX * (t - ramp)
+                self.assertAlmostEqual(curve.distance_at(t), expected, places=3)
+                self.assertAlmostEqual(curve.velocity_at(t), min(VMAX, V0 + ACCEL * t), places=6)
+
+    def test_shaped_curves_reach_max_velocity_at_ramp_end(self):
+        for name in ('linear', 'ease_in', 's_curve'):
+            with self.subTest(curve=name):
+                curve = build_scroll_curve(name, V0, VMAX, ACCEL)
+                self.assertAlmostEqual(curve.velocity_at(0.0), V0, places=6)
+                self.assertAlmostEqual(curve.end_time, RAMP_TIME)
+                self.assertAlmostEqual(curve.velocity_at(RAMP_TIME + 1.0), VMAX, places=6)
+
+    def test_ease_in_distance_matches_numeric_integral(self):
+        span = VMAX - V0
+        k = 4.0
+        curve = ease_in_curve(V0, VMAX, ACCEL, sharpness=k)
+
+        def velocity(t):
+            return V0 + span * math.expm1(k * min(t, RAMP_TIME) / RAMP_TIME) / math.expm1(k)
+
+        for t in (0.5, 1.2, 3.0):
+            with self.subTest(t=t):
+                self.assertAlmostEqual(curve.distance_at(t), integrate(velocity, t), delta=0.05)
+
+    def test_s_curve_distance_matches_numeric_integral(self):
+        curve = s_curve(V0, VMAX, ACCEL)
+
+        def velocity(t):
+            u = min(t, RAMP_TIME) / RAMP_TIME
+            return V0 + (VMAX - V0) * u * u * (3 - 2 * u)
+
+        for t in (0.5, 1.2, 3.0):
+            with self.subTest(t=t):
+                self.assertAlmostEqual(curve.distance_at(t), integrate(velocity, t), delta=0.05)
+
+    def test_table_curve(self):
+        curve = table_curve(parse_curve_points("0:100, 1:300, 2:300, 2.5:1300"))
+        self.assertAlmostEqual(curve.velocity_at(0.5), 200.0, places=6)
+        self.assertAlmostEqual(curve.velocity_at(1.5), 300.0, places=6)
+        self.assertAlmostEqual(curve.velocity_at(9.0), 1300.0, places=6)
+        # 各段梯形面积: 200 + 300 + 400，之后以 1300 匀速
+        self.assertAlmostEqual(curve.distance_at(2.5), 900.0, delta=0.01)
+        self.assertAlmostEqual(curve.distance_at(3.5), 2200.0, delta=0.01)
+
+    def test_just_before_ramp_end(self):
+        # 这些参数下 t * (1 / step) 会舍入到格数本身，查表下标必须限制在最后一格内
+        for v0, vmax, accel in ((127.9, 2240.0, 1691.5), (373.5, 2490.3, 564.7),
+                                (142.6, 1447.1, 2055.0)):
+            curve = linear_curve(v0, vmax, accel)
+            t = math.nextafter(curve.end_time, 0.0)
+            with self.subTest(v0=v0, vmax=vmax, accel=accel):
+                self.assertAlmostEqual(curve.velocity_at(t), curve.end_velocity, places=6)
+                self.assertAlmostEqual(curve.distance_at(t), curve.end_distance, places=6)
+
+    def test_constant_velocity(self):
+        curve = linear_curve(400.0, 1500.0, 0.0)
+        self.assertEqual(curve.end_time, 0.0)
+        self.assertAlmostEqual(curve.distance_at(1.5), 600.0)
+
+    def test_invalid_configuration(self):
+        with self.assertRaises(ValueError):
+            build_scroll_curve('cubic', V0, VMAX, ACCEL)
+        with self.assertRaises(ValueError):
+            table_curve([(0.0, 100.0), (0.0, 200.0)])
+        with self.assertRaises(ValueError):
+            parse_curve_points("0-100")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""测试区域选择器的分帧消息协议"""
+
+import io
+import struct
+import unittest
+
+from selector_protocol import (MAX_FRAME_SIZE, MSG_LAYOUT, MSG_RESULT, ProtocolError,
+                               encode_message, read_message, write_message)
+
+
+class SelectorProtocolTest(unittest.TestCase):
+
+    def test_round_trip(self):
+        stream = io.BytesIO()
+        messages = [
+            {'type': MSG_LAYOUT, 'layout': [['1', '2'], [';', '中']]},
+            {'type': MSG_RESULT, 'x': 960.5, 'y': 540.0},
+        ]
+        for message in messages:
+            write_message(stream, message)
+        stream.seek(0)
+        self.assertEqual([read_message(stream), read_message(stream)], messages)
+        # 帧边界处的流结束表示对端正常关闭
+        self.assertIsNone(read_message(stream))
+
+    def test_frame_split_across_reads(self):
+        class Trickle(io.RawIOBase):
+            """每次最多返回 3 字节，模拟管道分段到达"""
+            def __init__(self, data):
+                self.data = data
+
+            def readable(self):
+                return True
+
+            def read(self, size=-1):
+                chunk, self.data = self.data[:min(size, 3)], self.data[min(size, 3):]
+                return chunk
+
+        frame = encode_message({'type': 'activate'})
+        self.assertEqual(read_message(Trickle(frame)), {'type': 'activate'})
+
+    def test_truncated_frame(self):
+        frame = encode_message({'type': 'activate'})
+        with self.assertRaises(ProtocolError):
+            read_message(io.BytesIO(frame[:-2]))
+        with self.assertRaises(ProtocolError):
+            read_message(io.BytesIO(frame[:2]))
+
+    def test_invalid_frames(self):
+        oversized = struct.pack('>I', MAX_FRAME_SIZE + 1)
+        not_json = struct.pack('>I', 3) + b'abc'
+        no_type = encode_message({'layout': []})
+        for data in (oversized, not_json, no_type):
+            with self.subTest(data=data[:8]):
+                with self.assertRaises(ProtocolError):
+                    read_message(io.BytesIO(data))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""测试帧率调节器的档位选择
+
+档位按 移动 > 滚动 > 一次性动作 > 休眠 的优先级选择，循环间隔取自对应的配置项。
+"""
+
+import unittest
+from types import SimpleNamespace
+
+from tick_governor import TickGovernor, TickTier
+
+CONFIG = SimpleNamespace(DELAY_PER_STEP=0.010, SCROLL_DELAY_PER_STEP=0.016, IDLE_DELAY_PER_STEP=0.100)
+
+
+class TickGovernorTest(unittest.TestCase):
+
+    def test_starts_parked(self):
+        governor = TickGovernor(CONFIG)
+        self.assertIs(governor.current_tier, TickTier.PARKED)
+        self.assertIsNone(governor.interval())
+
+    def test_priority(self):
+        governor = TickGovernor(CONFIG)
+        cases = [
+            ((True, True, True), TickTier.MOVE, 0.010),
+            ((False, True, True), TickTier.SCROLL, 0.016),
+            ((False, False, True), TickTier.IDLE, 0.100),
+            ((False, False, False), TickTier.PARKED, None),
+        ]
+        for activity, tier, interval in cases:
+            with self.subTest(activity=activity):
+                self.assertIs(governor.select(*activity), tier)
+                self.assertEqual(governor.interval(), interval)
+
+    def test_transitions_are_counted(self):
+        governor = TickGovernor(CONFIG)
+        # 休眠 -> 移动 -> 移动 -> 滚动 -> 休眠: 三次切换
+        for activity in ((True, False, False), (True, False, False),
+                         (False, True, False), (False, False, False)):
+            governor.select(*activity)
+        stats = governor.get_stats()
+        self.assertEqual(stats['tier_changes'], 3)
+        self.assertEqual(stats['move_ticks'], 2)
+        self.assertEqual(stats['scroll_ticks'], 1)
+        self.assertEqual(stats['idle_ticks'], 0)
+        self.assertEqual(stats['parked_ticks'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""测试 SendInput 输出后端的坐标换算
+
+SendInput 等函数由记录调用的替身代替，虚拟桌面为单个 1920x1080 显示器，
+因此在任何平台上都可以运行。
+"""
+
+import ctypes
+import unittest
+
+from win_platform import INPUT, Win32OutputBackend
+
+
+class RecordingUser32:
+    """记录 SendInput 提交的移动目标的 user32 替身"""
+
+    def __init__(self, cursor=(100, 100)):
+        self.cursor = cursor
+        self.moves = []
+        self.SendInput = self._send_input
+        self.GetCursorPos = self._get_cursor_pos
+        self.GetSystemMetrics = lambda index: {78: 1920, 79: 1080}.get(index, 0)
+
+    def _send_input(self, count, inputs, size):
+        array = ctypes.cast(inputs, ctypes.POINTER(INPUT))
+        for i in range(count):
+            mi = array[i].ii.mi
+            self.moves.append((mi.dx, mi.dy))
+        return count
+
+    def _get_cursor_pos(self, point_ptr):
+        point_ptr.contents.x, point_ptr.contents.y = self.cursor
+        return 1
+
+
+def normalized(x, y):
+    """像素坐标对应的 0..65535 归一化坐标（与后端相同的向上取整）"""
+    return ((x * 65536 + 1919) // 1920, (y * 65536 + 1079) // 1080)
+
+
+class Win32OutputBackendTest(unittest.TestCase):
+
+    def test_move_to_accepts_fractional_coordinates(self):
+        user32 = RecordingUser32()
+        backend = Win32OutputBackend(user32=user32)
+        # 区域选择的结果是格子中心，可能带小数
+        backend.move_to(960.5, 540.4)
+        backend.flush()
+        self.assertEqual(backend.position(), (960, 540))
+        self.assertEqual(user32.moves, [normalized(960, 540)])
+
+    def test_relative_move_from_shadow_cursor(self):
+        user32 = RecordingUser32(cursor=(100, 200))
+        backend = Win32OutputBackend(user32=user32)
+        backend.move(5, -3)
+        backend.move(5, -3)
+        backend.flush()
+        # 同一批次中的连续移动合并为一个事件
+        self.assertEqual(user32.moves, [normalized(110, 194)])
+        self.assertEqual(backend.position(), (110, 194))
+
+    def test_physical_mouse_motion_is_kept(self):
+        user32 = RecordingUser32(cursor=(100, 200))
+        backend = Win32OutputBackend(user32=user32)
+        backend.move(5, 0)
+        backend.flush()
+        # 两帧之间用户用物理鼠标移动了光标
+        user32.cursor = (400, 300)
+        backend.move(5, 0)
+        backend.flush()
+        # 下一次移动在真实位置上累加，而不是把光标拉回影子光标
+        self.assertEqual(user32.moves, [normalized(105, 200), normalized(405, 300)])
+        self.assertEqual(backend.get_stats()['drift_resyncs'], 1)
+
+    def test_cursor_checked_once_per_batch(self):
+        user32 = RecordingUser32(cursor=(100, 200))
+        backend = Win32OutputBackend(user32=user32)
+        for _ in range(3):
+            backend.move(1, 0)
+            backend.move(1, 0)
+            backend.flush()
+            user32.cursor = backend.position()
+        self.assertEqual(backend.get_stats()['position_queries'], 3)
+        self.assertEqual(backend.get_stats()['drift_resyncs'], 0)
+
+    def test_move_is_clamped_to_virtual_desktop(self):
+        user32 = RecordingUser32()
+        backend = Win32OutputBackend(user32=user32)
+        backend.move_to(5000.0, -20.0)
+        backend.flush()
+        self.assertEqual(backend.position(), (1919, 0))
+
+
+if __name__ == '__main__':
+    unittest.main()
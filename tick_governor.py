@@ -0,0 +1,73 @@
+"""帧率调节模块
+
+根据当前实际产生输出的活动（光标移动、滚动、一次性动作）为鼠标移动工作线程
+选择循环间隔。没有任何活动时返回 PARKED，工作线程据此进入休眠。
+"""
+
+from enum import Enum, auto
+from typing import Dict, Optional
+
+
+class TickTier(Enum):
+    """工作线程的帧率档位，按优先级从高到低排列"""
+    MOVE = auto()
+    SCROLL = auto()
+    IDLE = auto()
+    PARKED = auto()
+
+
+class TickGovernor:
+    """帧率调节器，从活动状态中选出档位并给出对应的循环间隔。"""
+
+    def __init__(self, config) -> None:
+        """初始化帧率调节器。
+
+        Args:
+            config (AppConfig): 应用程序配置，提供各档位的循环间隔
+        """
+        self.intervals: Dict[TickTier, Optional[float]] = {
+            TickTier.MOVE: config.DELAY_PER_STEP,
+            TickTier.SCROLL: config.SCROLL_DELAY_PER_STEP,
+            TickTier.IDLE: config.IDLE_DELAY_PER_STEP,
+            TickTier.PARKED: None,
+        }
+        self.current_tier: TickTier = TickTier.PARKED
+        self.tier_changes = 0
+        self.tier_ticks: Dict[TickTier, int] = {tier: 0 for tier in TickTier}
+
+    def select(self, moving: bool, wheeling: bool, pending: bool) -> TickTier:
+        """根据当前活动选择档位。
+
+        Args:
+            moving: 是否有方向键按下（光标正在移动）
+            wheeling: 滚动控制器是否正在输出滚动
+            pending: 是否有待处理的一次性动作（队列命令、粘滞点击）
+
+        Returns:
+            TickTier: 选中的档位
+        """
+        if moving:
+            tier = TickTier.MOVE
+        elif wheeling:
+            tier = TickTier.SCROLL
+        elif pending:
+            tier = TickTier.IDLE
+        else:
+            tier = TickTier.PARKED
+
+        if tier is not self.current_tier:
+            self.current_tier = tier
+            self.tier_changes += 1
+        self.tier_ticks[tier] += 1
+        return tier
+
+    def interval(self) -> Optional[float]:
+        """获取当前档位的循环间隔（秒），PARKED 档位返回 None。"""
+        return self.intervals[self.current_tier]
+
+    def get_stats(self) -> Dict[str, int]:
+        """获取档位切换次数与各档位的帧数。"""
+        stats = {'tier_changes': self.tier_changes}
+        for tier, ticks in self.tier_ticks.items():
+            stats[f'{tier.name.lower()}_ticks'] = ticks
+        return stats
@@ -1,9 +1,24 @@
 """
     该文件是分离保存主程序的的工具
 """
-import win32con
-from pynput.keyboard import Key
-        
+
+# 用到的 Windows 虚拟键码，取值与 win32con 中的同名常量相同。
+# 虚拟键码只是整数，Linux 的 EvdevSource 也把按键映射到同一套键码，因此不依赖 win32con
+VK_SHIFT = 0x10
+VK_CONTROL = 0x11
+VK_MENU = 0x12               # Alt
+VK_CAPITAL = 0x14            # CapsLock
+VK_ESCAPE = 0x1B
+VK_LWIN = 0x5B
+VK_RWIN = 0x5C
+VK_F1 = 0x70                 # F1-F12 连续编号
+VK_LSHIFT = 0xA0
+VK_RSHIFT = 0xA1
+VK_LCONTROL = 0xA2
+VK_RCONTROL = 0xA3
+VK_LMENU = 0xA4
+VK_RMENU = 0xA5
+
 # 映射人类可读的键名到Windows虚拟键码(vkCode)
 KEY_TO_VK = {
     # 字母
@@ -28,32 +43,59 @@ KEY_TO_VK = {
     'enter': 0x0D,              # (VK_RETURN)
 
     # 功能键
-    'esc': win32con.VK_ESCAPE,
-    'f1': win32con.VK_F1, 'f2': win32con.VK_F2, 'f3': win32con.VK_F3,
-    'f4': win32con.VK_F4, 'f5': win32con.VK_F5, 'f6': win32con.VK_F6,
-    'f7': win32con.VK_F7, 'f8': win32con.VK_F8, 'f9': win32con.VK_F9,
-    'f10': win32con.VK_F10, 'f11': win32con.VK_F11, 'f12': win32con.VK_F12,
+    'esc': VK_ESCAPE,
+    **{f'f{n}': VK_F1 + n - 1 for n in range(1, 13)},
 
     # 控制键
-    'shift': win32con.VK_SHIFT,
-    'lshift': win32con.VK_LSHIFT,
-    'rshift': win32con.VK_RSHIFT,
-    'shift_r': win32con.VK_RSHIFT,
-    'ctrl': win32con.VK_CONTROL,
-    'lctrl': win32con.VK_LCONTROL,
-    'rctrl': win32con.VK_RCONTROL,
-    'alt': win32con.VK_MENU, # Alt key
-    'lalt': win32con.VK_LMENU,
-    'ralt': win32con.VK_RMENU,
+    'shift': VK_SHIFT,
+    'lshift': VK_LSHIFT,
+    'rshift': VK_RSHIFT,
+    'shift_r': VK_RSHIFT,
+    'ctrl': VK_CONTROL,
+    'lctrl': VK_LCONTROL,
+    'rctrl': VK_RCONTROL,
+    'alt': VK_MENU, # Alt key
+    'lalt': VK_LMENU,
+    'ralt': VK_RMENU,
 }
 
-# 映射键名到pynput的Key对象，用于on_press/on_release监听器
-NAME_TO_PYNPUT_KEY = {
-    'esc': Key.esc,
-    'shift_l': Key.shift_l,
-    'caps_lock': Key.caps_lock,
-    'alt': Key.alt,
+# 修饰键位掩码，左右两侧分别占一位，同一修饰键的左侧位于偶数位
+MOD_LCTRL = 1 << 0
+MOD_RCTRL = 1 << 1
+MOD_LALT = 1 << 2
+MOD_RALT = 1 << 3
+MOD_LSHIFT = 1 << 4
+MOD_RSHIFT = 1 << 5
+MOD_LWIN = 1 << 6
+MOD_RWIN = 1 << 7
+
+# 低级键盘钩子报告的是区分左右的虚拟键码
+MODIFIER_VK_TO_BIT = {
+    VK_LCONTROL: MOD_LCTRL,
+    VK_RCONTROL: MOD_RCTRL,
+    VK_LMENU: MOD_LALT,
+    VK_RMENU: MOD_RALT,
+    VK_LSHIFT: MOD_LSHIFT,
+    VK_RSHIFT: MOD_RSHIFT,
+    VK_LWIN: MOD_LWIN,
+    VK_RWIN: MOD_RWIN,
 }
 
-        
+# 按虚拟键码直接索引的修饰键位表，非修饰键为 0
+MODIFIER_BITS_BY_VK = tuple(MODIFIER_VK_TO_BIT.get(vk, 0) for vk in range(256))
 
+# 热键字符串中的修饰键名 -> (不区分左右的掩码, 指定侧的掩码)
+MODIFIER_NAME_TO_MASKS = {
+    'ctrl': (MOD_LCTRL, 0), 'control': (MOD_LCTRL, 0),
+    'lctrl': (0, MOD_LCTRL), 'ctrl_l': (0, MOD_LCTRL),
+    'rctrl': (0, MOD_RCTRL), 'ctrl_r': (0, MOD_RCTRL),
+    'alt': (MOD_LALT, 0),
+    'lalt': (0, MOD_LALT), 'alt_l': (0, MOD_LALT),
+    'ralt': (0, MOD_RALT), 'alt_r': (0, MOD_RALT), 'alt_gr': (0, MOD_RALT),
+    'shift': (MOD_LSHIFT, 0),
+    'lshift': (0, MOD_LSHIFT), 'shift_l': (0, MOD_LSHIFT),
+    'rshift': (0, MOD_RSHIFT), 'shift_r': (0, MOD_RSHIFT),
+    'win': (MOD_LWIN, 0), 'cmd': (MOD_LWIN, 0),
+    'lwin': (0, MOD_LWIN), 'cmd_l': (0, MOD_LWIN),
+    'rwin': (0, MOD_RWIN), 'cmd_r': (0, MOD_RWIN),
+}
@@ -1,16 +1,68 @@
 """
-该文件负责封装win平台的相关函数,目前主要是封装关于鼠标滚动效果相关的函数
+该文件负责封装win平台的相关函数,目前主要是基于 SendInput 的鼠标输出后端（移动、按键、像素级滚动）
+以及基于低级键盘钩子的按键输入源
 """
 # win_platform.py
 
 import ctypes
 import ctypes.wintypes
+import logging
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from input_source import InputSource, KeyEvent, KeyEventHandler
+from output_backend import OutputBackend
 
 # 定义Windows API中需要的常量
 INPUT_MOUSE = 0
+MOUSEEVENTF_MOVE = 0x0001
+MOUSEEVENTF_LEFTDOWN = 0x0002
+MOUSEEVENTF_LEFTUP = 0x0004
+MOUSEEVENTF_RIGHTDOWN = 0x0008
+MOUSEEVENTF_RIGHTUP = 0x0010
+MOUSEEVENTF_MIDDLEDOWN = 0x0020
+MOUSEEVENTF_MIDDLEUP = 0x0040
 MOUSEEVENTF_WHEEL = 0x0800
+MOUSEEVENTF_HWHEEL = 0x1000
+MOUSEEVENTF_VIRTUALDESK = 0x4000
+MOUSEEVENTF_ABSOLUTE = 0x8000
 WHEEL_DELTA = 120  # 标准的滚轮滚动单位，我们这里不用它，但SendInput内部可能参考
 
+# 低级键盘钩子相关常量
+WH_KEYBOARD_LL = 13
+HC_ACTION = 0
+WM_QUIT = 0x0012
+WM_KEYDOWN = 0x0100
+WM_SYSKEYDOWN = 0x0104
+WM_HOTKEY = 0x0312
+WM_APP = 0x8000
+MOD_NOREPEAT = 0x4000
+
+# 空闲状态切换时投递给钩子线程的私有消息
+_WM_APP_IDLE = WM_APP + 1
+_WM_APP_ACTIVE = WM_APP + 2
+# 空闲状态下注册的系统热键编号（RegisterHotKey 的 id，线程内唯一即可）
+_IDLE_HOTKEY_ID = 1
+# 重新安装钩子后需要同步按下状态的修饰键: 左右 Shift/Ctrl/Alt 和左右 Win
+_RESYNC_MODIFIER_VKS = (0xA0, 0xA1, 0xA2, 0xA3, 0xA4, 0xA5, 0x5B, 0x5C)
+
+# GetSystemMetrics 中虚拟桌面（所有显示器的外接矩形）的索引
+SM_XVIRTUALSCREEN = 76
+SM_YVIRTUALSCREEN = 77
+SM_CXVIRTUALSCREEN = 78
+SM_CYVIRTUALSCREEN = 79
+
+# 鼠标按键名 -> (按下标志, 释放标志)
+BUTTON_FLAGS: Dict[str, Tuple[int, int]] = {
+    'left': (MOUSEEVENTF_LEFTDOWN, MOUSEEVENTF_LEFTUP),
+    'right': (MOUSEEVENTF_RIGHTDOWN, MOUSEEVENTF_RIGHTUP),
+    'middle': (MOUSEEVENTF_MIDDLEDOWN, MOUSEEVENTF_MIDDLEUP),
+}
+
+# 绝对移动使用的标志组合
+_ABSOLUTE_MOVE_FLAGS = MOUSEEVENTF_MOVE | MOUSEEVENTF_ABSOLUTE | MOUSEEVENTF_VIRTUALDESK
+
 # 定义SendInput函数需要的C语言结构体
 # 详情请参阅Microsoft文档: https://docs.microsoft.com/en-us/windows/win32/api/winuser/ns-winuser-mouseinput
 class MOUSEINPUT(ctypes.Structure):
@@ -28,35 +80,509 @@ class INPUT(ctypes.Structure):
     _fields_ = [("type", ctypes.wintypes.DWORD),
                 ("ii", INPUT_I)]
 
-class WinPlatformScroller:
+# 低级键盘钩子回调收到的结构体，回调中只读取第一个字段 vkCode
+class KBDLLHOOKSTRUCT(ctypes.Structure):
+    _fields_ = [("vkCode", ctypes.wintypes.DWORD),
+                ("scanCode", ctypes.wintypes.DWORD),
+                ("flags", ctypes.wintypes.DWORD),
+                ("time", ctypes.wintypes.DWORD),
+                ("dwExtraInfo", ctypes.c_size_t)]
+
+# 钩子回调类型: LRESULT CALLBACK LowLevelKeyboardProc(int nCode, WPARAM wParam, LPARAM lParam)
+# WINFUNCTYPE 只在 Windows 上存在，其他平台上本模块仍可导入（例如运行基准测试）
+HOOKPROC = (ctypes.WINFUNCTYPE(ctypes.wintypes.LPARAM, ctypes.c_int,
+                               ctypes.wintypes.WPARAM, ctypes.wintypes.LPARAM)
+            if hasattr(ctypes, 'WINFUNCTYPE') else None)
+
+_user32 = None
+
+def _load_user32():
+    """
+    加载 user32.dll 并一次性声明用到的函数签名。
+
+    使用独立的 WinDLL 实例，而不是 ctypes.windll.user32，
+    避免修改与其他库（如 pynput）共享的函数对象的 argtypes。
     """
-    一个封装了Windows平台底层滚动API的控制器。
-    它使用ctypes和Win32 SendInput函数来发送像素级的滚轮事件，
-    从而绕过pynput.scroll()的操作系统单位限制。
+    global _user32
+    if _user32 is None:
+        user32 = ctypes.WinDLL('user32', use_last_error=True)
+        user32.SendInput.argtypes = (ctypes.wintypes.UINT, ctypes.POINTER(INPUT), ctypes.c_int)
+        user32.SendInput.restype = ctypes.wintypes.UINT
+        user32.GetCursorPos.argtypes = (ctypes.POINTER(ctypes.wintypes.POINT),)
+        user32.GetCursorPos.restype = ctypes.wintypes.BOOL
+        user32.GetSystemMetrics.argtypes = (ctypes.c_int,)
+        user32.GetSystemMetrics.restype = ctypes.c_int
+        user32.SetWindowsHookExW.argtypes = (ctypes.c_int, HOOKPROC,
+                                             ctypes.wintypes.HINSTANCE, ctypes.wintypes.DWORD)
+        user32.SetWindowsHookExW.restype = ctypes.wintypes.HHOOK
+        user32.CallNextHookEx.argtypes = (ctypes.wintypes.HHOOK, ctypes.c_int,
+                                          ctypes.wintypes.WPARAM, ctypes.wintypes.LPARAM)
+        user32.CallNextHookEx.restype = ctypes.wintypes.LPARAM
+        user32.UnhookWindowsHookEx.argtypes = (ctypes.wintypes.HHOOK,)
+        user32.UnhookWindowsHookEx.restype = ctypes.wintypes.BOOL
+        user32.GetMessageW.argtypes = (ctypes.POINTER(ctypes.wintypes.MSG), ctypes.wintypes.HWND,
+                                       ctypes.wintypes.UINT, ctypes.wintypes.UINT)
+        user32.GetMessageW.restype = ctypes.wintypes.BOOL
+        user32.PostThreadMessageW.argtypes = (ctypes.wintypes.DWORD, ctypes.wintypes.UINT,
+                                              ctypes.wintypes.WPARAM, ctypes.wintypes.LPARAM)
+        user32.PostThreadMessageW.restype = ctypes.wintypes.BOOL
+        user32.RegisterHotKey.argtypes = (ctypes.wintypes.HWND, ctypes.c_int,
+                                          ctypes.wintypes.UINT, ctypes.wintypes.UINT)
+        user32.RegisterHotKey.restype = ctypes.wintypes.BOOL
+        user32.UnregisterHotKey.argtypes = (ctypes.wintypes.HWND, ctypes.c_int)
+        user32.UnregisterHotKey.restype = ctypes.wintypes.BOOL
+        user32.GetAsyncKeyState.argtypes = (ctypes.c_int,)
+        user32.GetAsyncKeyState.restype = ctypes.c_short
+        _user32 = user32
+    return _user32
+
+_kernel32 = None
+
+def _load_kernel32():
+    """加载 kernel32.dll 并声明钩子线程用到的函数签名。"""
+    global _kernel32
+    if _kernel32 is None:
+        kernel32 = ctypes.WinDLL('kernel32', use_last_error=True)
+        kernel32.GetModuleHandleW.argtypes = (ctypes.wintypes.LPCWSTR,)
+        kernel32.GetModuleHandleW.restype = ctypes.wintypes.HMODULE
+        kernel32.GetCurrentThreadId.argtypes = ()
+        kernel32.GetCurrentThreadId.restype = ctypes.wintypes.DWORD
+        _kernel32 = kernel32
+    return _kernel32
+
+class Win32OutputBackend(OutputBackend):
     """
-    def scroll_vertical(self, distance: int):
-        """
-        以像素为单位执行垂直滚动。
+    Windows 输出后端: 把一帧内产生的所有鼠标输入收集到预分配的 INPUT 数组中，用一次 SendInput 提交。
+
+    顺序保证:
+    - 所有事件严格按写入顺序提交，同一批次内不会重排。
+    - 按键事件（按下/释放）写入后立即提交，连同之前已排队的移动和滚轮一起，
+      因此按键不会被推迟到下一帧，也不会越过在它之前产生的移动。
+    - 连续的移动只保留最后一个目标位置（绝对坐标），不会改变最终的光标位置。
+    - 每批次的第一次相对移动前读取一次真实光标，用户同时使用物理鼠标时以真实位置为准。
 
+    可以从多个线程调用，内部用一把锁保护缓冲区。
+    """
+    def __init__(self, capacity: int = 32, user32=None):
+        """
         Args:
-            distance (int): 滚动的像素距离。
-                           正数表示向上滚动（远离用户）。
-                           负数表示向下滚动（朝向用户）。
+            capacity (int): 单批次最多容纳的事件数，写满时提前提交。
+            user32: 提供 SendInput/GetCursorPos/GetSystemMetrics 的对象，
+                    默认加载系统的 user32.dll；基准测试可传入不产生输入的替身。
+        """
+        self.capacity = capacity
+        if user32 is None:
+            user32 = _load_user32()
+        self._send_input = user32.SendInput
+        self._get_cursor_pos = user32.GetCursorPos
+        self._get_system_metrics = user32.GetSystemMetrics
+        self._input_size = ctypes.sizeof(INPUT)
+
+        # 所有 ctypes 对象都在这里一次性分配，发送路径上只原地改写字段
+        self._buffer = (INPUT * capacity)()
+        self._buffer_ptr = ctypes.cast(self._buffer, ctypes.POINTER(INPUT))
+        for entry in self._buffer:
+            entry.type = INPUT_MOUSE
+        # 预先取出每个槽位的 MOUSEINPUT 视图，避免每次下标访问都创建新的包装对象
+        self._slots = tuple(entry.ii.mi for entry in self._buffer)
+        self._point = ctypes.wintypes.POINT()
+        self._point_ptr = ctypes.pointer(self._point)
+        self._count = 0
+        # 本批次中最后一个移动事件的下标，用于合并连续移动
+        self._move_index = -1
+        # 影子光标: 所有已排队移动生效后的光标位置，跨批次保留，
+        # 同一批次内的相对移动直接在它上面累加，不必每次读取真实光标位置
+        self._shadow: Optional[Tuple[int, int]] = None
+        # 虚拟桌面矩形 (left, top, width, height)，与影子光标一起同步
+        self._screen = (0, 0, 1, 1)
+        self._lock = threading.Lock()
+
+        # 统计: 调用方请求的事件数、实际提交的 INPUT 数、SendInput 调用次数
+        self.requested_count = 0
+        self.input_count = 0
+        self.syscall_count = 0
+        # 影子光标统计: 读取真实光标位置的次数、发现偏移后重新同步的次数
+        self.position_query_count = 0
+        self.drift_resync_count = 0
+
+    def position(self) -> Tuple[int, int]:
+        """获取光标位置，包括本批次中尚未提交的移动。"""
+        with self._lock:
+            if self._shadow is None:
+                self._resync()
+            return self._shadow
+
+    def move(self, dx: int, dy: int):
+        """
+        相对当前位置移动光标。
+
+        目标位置由影子光标累加得到，再以绝对坐标发送，并且与 SetCursorPos 一样
+        不受系统指针加速（"提高指针精确度"）影响。
+        每批次的第一次移动前用 GetCursorPos 校验影子光标（每帧一次），真实光标与上次
+        提交的位置不同（用户同时使用物理鼠标、光标被显示器边缘挡住）时在真实位置上累加，
+        物理鼠标的移动不会被下一次绝对移动覆盖。
+        """
+        with self._lock:
+            if self._shadow is None:
+                self._resync()
+            elif self._move_index < 0:
+                # 本批次还没有未提交的移动，此时真实光标应停在上次提交的位置
+                self._check_drift()
+            x, y = self._shadow
+            self._queue_move(x + dx, y + dy)
+
+    def move_to(self, x: float, y: float):
+        """把光标移动到屏幕坐标 (x, y)，影子光标随之精确更新。
+
+        坐标可以是小数（例如区域选择得到的格子中心），按四舍五入取整到像素。
+        """
+        with self._lock:
+            if self._shadow is None:
+                self._resync()
+            self._queue_move(int(round(x)), int(round(y)))
+
+    def invalidate_position(self):
+        """
+        丢弃影子光标，下一次移动前重新读取真实光标位置。
+
+        在一段时间没有键盘移动之后调用（例如工作线程从休眠中唤醒），
+        期间用户可能已经用物理鼠标移动了光标。
         """
+        with self._lock:
+            self._shadow = None
+
+    def wheel(self, distance: int):
+        """排队一个像素级的垂直滚轮事件，正数向上，负数向下。"""
+        if distance == 0:
+            return
+        with self._lock:
+            self.requested_count += 1
+            self._append(0, 0, distance, MOUSEEVENTF_WHEEL)
+
+    def hwheel(self, distance: int):
+        """排队一个像素级的水平滚轮事件，正数向右，负数向左。"""
         if distance == 0:
             return
-            
-        # 准备输入事件结构体
-        inp = INPUT_I()
-        # MOUSEEVENTF_WHEEL 表示这是一个滚轮事件
-        # mouseData 字段携带了滚动的距离信息
-        inp.mi = MOUSEINPUT(0, 0, distance, MOUSEEVENTF_WHEEL, 0, None)
-        
-        # 将MOUSEINPUT封装在通用的INPUT结构体中
-        command = INPUT(INPUT_MOUSE, inp)
-        
-        # 调用SendInput API发送事件
-        # 第一个参数是要发送的事件数量
-        # 第二个参数是指向事件数组的指针
-        # 第三个参数是每个事件结构体的大小
-        ctypes.windll.user32.SendInput(1, ctypes.pointer(command), ctypes.sizeof(command))
\ No newline at end of file
+        with self._lock:
+            self.requested_count += 1
+            self._append(0, 0, distance, MOUSEEVENTF_HWHEEL)
+
+    def press(self, button: str):
+        """按下鼠标按键（'left'、'right' 或 'middle'）并立即提交。"""
+        self._button(BUTTON_FLAGS[button][0])
+
+    def release(self, button: str):
+        """释放鼠标按键并立即提交。"""
+        self._button(BUTTON_FLAGS[button][1])
+
+    def flush(self):
+        """提交本批次中排队的所有事件。"""
+        with self._lock:
+            self._flush_locked()
+
+    def get_stats(self) -> Dict[str, int]:
+        """
+        获取批量提交的统计信息。
+
+        Returns:
+            Dict[str, int]: 请求的事件数、实际提交的事件数、SendInput 调用次数，
+                            以及相对每个事件单独调用一次所节省的调用次数。
+        """
+        with self._lock:
+            return {
+                'requested': self.requested_count,
+                'inputs': self.input_count,
+                'syscalls': self.syscall_count,
+                'saved_syscalls': self.requested_count - self.syscall_count,
+                'position_queries': self.position_query_count,
+                'drift_resyncs': self.drift_resync_count,
+            }
+
+    def _button(self, flags: int):
+        with self._lock:
+            self.requested_count += 1
+            self._append(0, 0, 0, flags)
+            self._flush_locked()
+
+    def _read_cursor(self) -> Tuple[int, int]:
+        self._get_cursor_pos(self._point_ptr)
+        self.position_query_count += 1
+        point = self._point
+        return point.x, point.y
+
+    def _read_screen(self):
+        metrics = self._get_system_metrics
+        self._screen = (
+            metrics(SM_XVIRTUALSCREEN),
+            metrics(SM_YVIRTUALSCREEN),
+            max(metrics(SM_CXVIRTUALSCREEN), 1),
+            max(metrics(SM_CYVIRTUALSCREEN), 1),
+        )
+
+    def _resync(self):
+        """从真实光标和当前显示器布局重新建立影子光标。"""
+        self._read_screen()
+        self._shadow = self._read_cursor()
+
+    def _check_drift(self):
+        actual = self._read_cursor()
+        if actual != self._shadow:
+            self.drift_resync_count += 1
+            # 显示器布局变化也会表现为偏移，一并刷新
+            self._read_screen()
+            self._shadow = actual
+
+    def _queue_move(self, x: int, y: int):
+        self.requested_count += 1
+        # 把屏幕坐标映射到虚拟桌面的 0..65535 归一化坐标，向上取整保证落在同一个像素上
+        left, top, width, height = self._screen
+        x = min(max(x, left), left + width - 1)
+        y = min(max(y, top), top + height - 1)
+        nx = ((x - left) * 65536 + width - 1) // width
+        ny = ((y - top) * 65536 + height - 1) // height
+
+        if self._move_index == self._count - 1 and self._move_index >= 0:
+            # 上一个事件也是移动，直接改写它的目标位置
+            mi = self._slots[self._move_index]
+            mi.dx = nx
+            mi.dy = ny
+        else:
+            self._append(nx, ny, 0, _ABSOLUTE_MOVE_FLAGS)
+            self._move_index = self._count - 1
+        self._shadow = (x, y)
+
+    def _append(self, dx: int, dy: int, data: int, flags: int):
+        if self._count == self.capacity:
+            self._flush_locked()
+        mi = self._slots[self._count]
+        mi.dx = dx
+        mi.dy = dy
+        # mouseData 为 DWORD，负的滚动距离按补码写入
+        mi.mouseData = data & 0xFFFFFFFF
+        mi.dwFlags = flags
+        self._count += 1
+
+    def _flush_locked(self):
+        count = self._count
+        if count == 0:
+            return
+        self._send_input(count, self._buffer_ptr, self._input_size)
+        self.syscall_count += 1
+        self.input_count += count
+        self._count = 0
+        self._move_index = -1
+
+
+class Win32HookSource(InputSource):
+    """
+    基于 ctypes 低级键盘钩子（WH_KEYBOARD_LL）的按键输入源。
+
+    钩子安装在专用线程上，该线程只运行一个 GetMessageW 消息循环。
+    系统上的每一次按键都会经过钩子回调，因此回调分为两条路径:
+
+    - 直通路径: passthrough_mask 中标记为 1、且之前没有把按下事件交给处理函数的按键，
+      只读取 vkCode 后立即调用 CallNextHookEx，不创建 KeyEvent，也不调用处理函数。
+    - 处理路径: 其余按键归一化为 KeyEvent 交给处理函数，返回 True 时拦截。
+
+    一个按键的按下事件交给了处理函数，它的释放事件也一定会交给处理函数，
+    即使期间 passthrough_mask 发生了变化。
+
+    提供 idle_hotkey 时支持空闲状态（set_idle(True)）: 钩子被卸载，改用 RegisterHotKey
+    注册的系统热键监听切换热键，系统不再为每次按键调用本进程。离开空闲状态时重新安装钩子，
+    并按 GetAsyncKeyState 的结果向处理函数补发修饰键事件，使处理函数的修饰键状态与实际一致。
+    系统热键触发时先离开空闲状态，再把触发键的按下事件交给处理函数，
+    之后的自动重复和释放事件都经过钩子，与钩子直接收到热键时完全相同。
+    """
+
+    def __init__(self, passthrough_mask: Optional[bytearray] = None,
+                 idle_hotkey: Optional[Tuple[int, int]] = None):
+        """
+        Args:
+            passthrough_mask: 以虚拟键码为下标的 256 字节掩码，由调用方原地更新
+                              （例如随应用模式变化）；省略时所有按键都交给处理函数
+            idle_hotkey: 空闲状态下注册的系统热键 (RegisterHotKey 修饰键标志, 虚拟键码)；
+                         省略时 set_idle 不起作用，钩子始终保持安装
+        """
+        self.passthrough_mask = passthrough_mask if passthrough_mask is not None else bytearray(256)
+        self.idle_hotkey = idle_hotkey
+        self._handler: Optional[KeyEventHandler] = None
+        self._thread: Optional[threading.Thread] = None
+        self._thread_id = 0
+        self._hook = None
+        self._ready = threading.Event()
+        # 按下事件已交给处理函数、尚未释放的按键，同时用于判断自动重复
+        self._delivered = bytearray(256)
+        # _delivered 中为 1 的按键数，降为 0 时才能安全地卸载钩子
+        self._down_count = 0
+        # 请求进入空闲状态时仍有按键按下，等这些按键全部释放后再卸载钩子
+        self._idle_pending = False
+        self._request_time = 0.0
+        # 回调对象必须在钩子存续期间保持引用，否则会被回收
+        self._proc = HOOKPROC(self._hook_proc) if HOOKPROC is not None else None
+
+        self.passthrough_count = 0
+        self.delivered_count = 0
+        self.hook_installs = 0
+        self.hook_uninstalls = 0
+        self.hotkey_presses = 0
+        self._switch_latency_total = 0.0
+        self._switch_latency_max = 0.0
+
+    def start(self, handler: KeyEventHandler):
+        self._handler = handler
+        self._ready.clear()
+        self._thread = threading.Thread(target=self._run, name='KeyboardHook', daemon=True)
+        self._thread.start()
+        self._ready.wait()
+
+    def set_idle(self, idle: bool):
+        """请求进入或离开空闲状态，实际切换在钩子线程上完成。"""
+        if self.idle_hotkey is None or not self._thread_id:
+            return
+        self._request_time = time.perf_counter()
+        _load_user32().PostThreadMessageW(self._thread_id, _WM_APP_IDLE if idle else _WM_APP_ACTIVE, 0, 0)
+
+    def stop(self):
+        if self._thread_id:
+            _load_user32().PostThreadMessageW(self._thread_id, WM_QUIT, 0, 0)
+
+    def is_alive(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def join(self, timeout: Optional[float] = None):
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def get_stats(self) -> Dict[str, int]:
+        switches = self.hook_installs + self.hook_uninstalls
+        return {
+            'passthrough': self.passthrough_count,
+            'delivered': self.delivered_count,
+            'hook_installs': self.hook_installs,
+            'hook_uninstalls': self.hook_uninstalls,
+            'hotkey_presses': self.hotkey_presses,
+            'switch_latency_mean_ms': round(self._switch_latency_total / switches * 1000, 3) if switches else 0,
+            'switch_latency_max_ms': round(self._switch_latency_max * 1000, 3),
+        }
+
+    def _run(self):
+        user32 = _load_user32()
+        kernel32 = _load_kernel32()
+        self._call_next = user32.CallNextHookEx
+        self._thread_id = kernel32.GetCurrentThreadId()
+        self._hook = user32.SetWindowsHookExW(WH_KEYBOARD_LL, self._proc,
+                                              kernel32.GetModuleHandleW(None), 0)
+        self._ready.set()
+        if not self._hook:
+            logging.error(f"安装键盘钩子失败，错误码: {ctypes.get_last_error()}")
+            return
+        try:
+            # 低级钩子回调在本线程的消息循环中执行，不需要分发消息；
+            # 线程消息（热键和空闲状态切换）没有目标窗口，直接在这里处理
+            msg = ctypes.wintypes.MSG()
+            while user32.GetMessageW(ctypes.byref(msg), None, 0, 0) > 0:
+                if msg.message == WM_HOTKEY and msg.wParam == _IDLE_HOTKEY_ID:
+                    self._on_idle_hotkey(user32, kernel32)
+                elif msg.message == _WM_APP_IDLE:
+                    self._enter_idle(user32)
+                elif msg.message == _WM_APP_ACTIVE:
+                    self._leave_idle(user32, kernel32)
+        finally:
+            if self._hook:
+                user32.UnhookWindowsHookEx(self._hook)
+            else:
+                user32.UnregisterHotKey(None, _IDLE_HOTKEY_ID)
+            self._hook = None
+            self._thread_id = 0
+
+    def _enter_idle(self, user32):
+        """卸载钩子并注册系统热键（在钩子线程上调用）"""
+        if not self._hook:
+            return
+        if self._down_count:
+            # 卸载后收不到这些按键的释放事件，推迟到全部释放后由 _hook_proc 再次投递
+            self._idle_pending = True
+            return
+        self._idle_pending = False
+        modifiers, vk = self.idle_hotkey
+        if not user32.RegisterHotKey(None, _IDLE_HOTKEY_ID, modifiers | MOD_NOREPEAT, vk):
+            # 热键已被其他程序占用时保留钩子，仍由钩子匹配切换热键
+            logging.warning(f"注册系统热键失败，错误码: {ctypes.get_last_error()}，保持键盘钩子")
+            return
+        user32.UnhookWindowsHookEx(self._hook)
+        self._hook = None
+        self.hook_uninstalls += 1
+        self._record_switch_latency()
+
+    def _leave_idle(self, user32, kernel32):
+        """重新安装钩子、注销系统热键并同步修饰键状态（在钩子线程上调用）"""
+        self._idle_pending = False
+        if self._hook:
+            return
+        self._hook = user32.SetWindowsHookExW(WH_KEYBOARD_LL, self._proc,
+                                              kernel32.GetModuleHandleW(None), 0)
+        if not self._hook:
+            logging.error(f"重新安装键盘钩子失败，错误码: {ctypes.get_last_error()}")
+            return
+        self.hook_installs += 1
+        self._record_switch_latency()
+        user32.UnregisterHotKey(None, _IDLE_HOTKEY_ID)
+        # 空闲期间的修饰键变化没有经过处理函数，按实际状态补发
+        for vk in _RESYNC_MODIFIER_VKS:
+            is_down = user32.GetAsyncKeyState(vk) < 0
+            self._mark_delivered(vk, is_down)
+            try:
+                self._handler(KeyEvent(vk, is_down, False, time.perf_counter()))
+            except Exception as e:
+                logging.error(f"同步修饰键状态时发生错误: {e}", exc_info=True)
+
+    def _on_idle_hotkey(self, user32, kernel32):
+        """空闲状态下系统热键触发: 重新安装钩子后补发触发键的按下事件"""
+        self.hotkey_presses += 1
+        self._request_time = time.perf_counter()
+        self._leave_idle(user32, kernel32)
+        vk = self.idle_hotkey[1]
+        self._mark_delivered(vk, True)
+        self.delivered_count += 1
+        suppress = False
+        try:
+            suppress = self._handler(KeyEvent(vk, True, False, time.perf_counter()))
+        except Exception as e:
+            logging.error(f"处理系统热键时发生错误: {e}", exc_info=True)
+        if not suppress:
+            # 处理函数没有匹配到切换热键，模式不变，也就不会再有人请求空闲状态；
+            # 自行重新进入空闲状态（触发键仍按着，等它释放后再卸载钩子）
+            self._enter_idle(user32)
+
+    def _record_switch_latency(self):
+        latency = time.perf_counter() - self._request_time
+        self._switch_latency_total += latency
+        if latency > self._switch_latency_max:
+            self._switch_latency_max = latency
+
+    def _mark_delivered(self, vk: int, is_down: bool):
+        """更新 _delivered 和 _down_count"""
+        if is_down != bool(self._delivered[vk]):
+            self._down_count += 1 if is_down else -1
+            self._delivered[vk] = is_down
+
+    def _hook_proc(self, n_code: int, w_param: int, l_param: int) -> int:
+        if n_code == HC_ACTION:
+            vk = ctypes.c_uint32.from_address(l_param).value & 0xFF
+            if self.passthrough_mask[vk] and not self._delivered[vk]:
+                self.passthrough_count += 1
+            else:
+                is_down = w_param == WM_KEYDOWN or w_param == WM_SYSKEYDOWN
+                is_repeat = is_down and self._delivered[vk] == 1
+                self._mark_delivered(vk, is_down)
+                self.delivered_count += 1
+                if self._idle_pending and not self._down_count:
+                    self._idle_pending = False
+                    self._request_time = time.perf_counter()
+                    _load_user32().PostThreadMessageW(self._thread_id, _WM_APP_IDLE, 0, 0)
+                try:
+                    if self._handler(KeyEvent(vk, is_down, is_repeat, time.perf_counter())):
+                        return 1
+                except Exception as e:
+                    logging.error(f"处理键盘事件时发生错误: {e}", exc_info=True)
+        return self._call_next(None, n_code, w_param, l_param)